@@ -1,3 +1,8 @@
 from .content_generator import AIContentGenerator
+from .offline import OfflineContentGenerator
+from .async_content_generator import AsyncAIContentGenerator, AsyncOfflineContentGenerator
+from .cassette import Cassette, CassetteMiss
+from .images import ImageBackend, OpenAIImageBackend, OfflineImageBackend, create_image_backend
 
-__all__ = ['AIContentGenerator']
+__all__ = ['AIContentGenerator', 'OfflineContentGenerator', 'AsyncAIContentGenerator', 'AsyncOfflineContentGenerator',
+           'Cassette', 'CassetteMiss', 'ImageBackend', 'OpenAIImageBackend', 'OfflineImageBackend', 'create_image_backend']
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import time
+from typing import Dict, List
+
+from runtime import deadline, metrics, usage
+from runtime.breaker import get_breaker, guard
+
+from .content_generator import AIContentGenerator
+from .offline import OfflineContentGenerator
+
+
+class AsyncAIContentGenerator(AIContentGenerator):
+    """
+    AIContentGenerator backed by the async OpenAI client.
+
+    The prompt-building ``generate_*`` methods are inherited unchanged; since
+    ``_generate_content`` is a coroutine here, each of them returns an
+    awaitable, e.g. ``await generator.generate_summary(case_input)``.
+    One instance (and its connection pool) can serve many concurrent requests.
+    """
+
+    def __init__(self, model: str = "gpt-3.5-turbo"):
+        self.model = model
+        from .cassette import AsyncCassetteClient, Cassette
+        cassette = Cassette.from_env()
+        if cassette is not None and cassette.mode == 'replay':
+            self.client = AsyncCassetteClient(None, cassette)
+            return
+        api_key = os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY environment variable is required")
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=api_key)
+        self.breaker = get_breaker('llm')
+        if cassette is not None:
+            self.client = AsyncCassetteClient(self.client, cassette)
+
+    async def _generate_content(self, messages: List[Dict[str, str]]) -> str:
+        """Generate content using the configured model."""
+        return (await self._generate_candidates(messages, 1))[0]
+
+    async def _generate_candidates(self, messages: List[Dict[str, str]], n: int) -> List[str]:
+        """Generate ``n`` alternative completions of one prompt in a single API call."""
+        timeout = deadline.call_timeout(messages, n)
+        started = time.perf_counter()
+        with guard(self.breaker):
+            try:
+                response = await self._client_for(timeout).chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.7,
+                    n=n,
+                    **({'timeout': timeout} if timeout is not None else {})
+                )
+            except asyncio.CancelledError:
+                # Cancelled mid-flight (deadline or disconnect); the tokens may be billed regardless
+                metrics.increment('deadline.calls_abandoned')
+                raise
+            except Exception as e:
+                if deadline.expired():
+                    raise deadline.DeadlineExceeded(deadline.current().reason) from e
+                raise
+        usage.record_call(self.model, response.usage, (time.perf_counter() - started) * 1000, n,
+                          replayed=getattr(response, 'replayed', False))
+        return [choice.message.content.strip() for choice in response.choices]
+
+
+class AsyncOfflineContentGenerator(OfflineContentGenerator):
+    """Async variant of the offline stand-in; waits without holding a thread."""
+
+    async def _generate_content(self, messages: List[Dict[str, str]]) -> str:
+        return (await self._generate_candidates(messages, 1))[0]
+
+    async def _generate_candidates(self, messages: List[Dict[str, str]], n: int) -> List[str]:
+        deadline.call_timeout(messages, n)
+        latency = self._simulated_latency()
+        try:
+            await asyncio.sleep(latency)
+        except asyncio.CancelledError:
+            metrics.increment('deadline.calls_abandoned')
+            raise
+        return self._record_usage(messages, [self._canned_content(i) for i in range(n)], latency)
@@ -0,0 +1,235 @@
+"""
+Record/replay of chat completions.
+
+A cassette maps a hash of the normalized request (model, ``n`` and the
+messages with indentation and blank-line runs collapsed) to the recorded
+completions, token usage and latency. ``AIContentGenerator`` wraps its
+OpenAI client in a ``CassetteClient`` when ``LLM_CASSETTE`` names a
+cassette file:
+
+- ``LLM_CASSETTE_MODE=replay`` (default) serves recorded responses and
+  raises ``CassetteMiss`` for anything not on the cassette; no API key or
+  network is needed.
+- ``record`` calls the API for every request and stores the response.
+- ``auto`` replays what is recorded and records the rest.
+
+``LLM_CASSETTE_LATENCY`` adds a delay to replayed responses: a number of
+milliseconds, or ``recorded`` to wait as long as the original call took.
+Cassettes ending in ``.gz`` are gzip-compressed.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+CASSETTE_VERSION = 1
+MODES = ('replay', 'record', 'auto')
+
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+
+class CassetteMiss(LookupError):
+    """A replayed request that was never recorded."""
+
+    def __init__(self, key: str, prompt: str):
+        # The end of the prompt is the part that differs between sections
+        preview = ' '.join(prompt.split())[-80:]
+        super().__init__(f"No recorded response for request {key} ('…{preview}'); "
+                         f"record it with LLM_CASSETTE_MODE=record or auto")
+        self.key = key
+
+
+def normalize_prompt(text: str) -> str:
+    """Strip per-line indentation and collapse blank-line runs, so cosmetic prompt edits keep their recordings."""
+    lines = '\n'.join(line.strip() for line in text.strip().split('\n'))
+    return _BLANK_LINES.sub('\n\n', lines)
+
+
+def request_key(model: str, messages: List[dict], n: int = 1) -> str:
+    normalized = [{'role': m.get('role'), 'content': normalize_prompt(m.get('content') or '')} for m in messages]
+    payload = json.dumps({'model': model, 'n': n, 'messages': normalized}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+class Cassette:
+    """One cassette file, loaded on open and rewritten atomically on every new recording."""
+
+    def __init__(self, path: str, mode: str = 'replay', latency=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}; expected one of {', '.join(MODES)}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self.entries: Dict[str, dict] = self._load()
+
+    @classmethod
+    def from_env(cls) -> Optional['Cassette']:
+        """The process-wide cassette named by ``LLM_CASSETTE``, or None."""
+        path = os.getenv('LLM_CASSETTE')
+        if not path:
+            return None
+        mode = os.getenv('LLM_CASSETTE_MODE', 'replay').lower()
+        latency = os.getenv('LLM_CASSETTE_LATENCY') or None
+        with _open_lock:
+            cassette = _open.get(path)
+            if cassette is None or (cassette.mode, cassette.latency) != (mode, latency):
+                cassette = _open[path] = cls(path, mode, latency)
+            return cassette
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            opener = gzip.open if self.path.endswith('.gz') else open
+            with opener(self.path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            if self.mode == 'replay':
+                raise
+            return {}
+        return data.get('entries', {})
+
+    def save(self) -> None:
+        data = json.dumps({'version': CASSETTE_VERSION, 'entries': self.entries},
+                          sort_keys=True, separators=(',', ':')).encode('utf-8')
+        if self.path.endswith('.gz'):
+            # mtime=0 keeps the file byte-identical when nothing changed
+            data = gzip.compress(data, mtime=0)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.cassette_', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def lookup(self, key: str) -> Optional[dict]:
+        if self.mode == 'record':
+            return None
+        return self.entries.get(key)
+
+    def record(self, key: str, response, latency_ms: float) -> None:
+        usage = getattr(response, 'usage', None)
+        details = getattr(usage, 'prompt_tokens_details', None)
+        entry = {
+            'choices': [choice.message.content for choice in response.choices],
+            'usage': {
+                'prompt_tokens': getattr(usage, 'prompt_tokens', 0) or 0,
+                'completion_tokens': getattr(usage, 'completion_tokens', 0) or 0,
+                'prompt_tokens_details': {'cached_tokens': getattr(details, 'cached_tokens', 0) or 0},
+            },
+            'latency_ms': round(latency_ms, 1),
+        }
+        with self._lock:
+            self.entries[key] = entry
+            self.save()
+
+    def replay_delay(self, entry: dict) -> float:
+        """Seconds to wait before serving ``entry``."""
+        if not self.latency:
+            return 0.0
+        if self.latency == 'recorded':
+            return entry.get('latency_ms', 0) / 1000
+        return float(self.latency) / 1000
+
+
+_open: Dict[str, Cassette] = {}
+_open_lock = threading.Lock()
+
+
+def replaying() -> bool:
+    """True when every LLM call will be served from a cassette (no API key needed)."""
+    return bool(os.getenv('LLM_CASSETTE')) and os.getenv('LLM_CASSETTE_MODE', 'replay').lower() == 'replay'
+
+
+# -- OpenAI-shaped responses ----------------------------------------------
+
+class _Message:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, index: int, content: str):
+        self.index = index
+        self.message = _Message(content)
+
+
+class _Response:
+    # Served from the cassette: no tokens were bought (see usage.record_call)
+    replayed = True
+
+    def __init__(self, model: str, entry: dict):
+        self.model = model
+        self.choices = [_Choice(i, content) for i, content in enumerate(entry['choices'])]
+        self.usage = entry.get('usage')
+
+
+class _Completions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, *, model: str, messages: List[dict], n: int = 1, **kwargs):
+        return self._owner._create(model, messages, n, kwargs)
+
+
+class _Chat:
+    def __init__(self, owner):
+        self.completions = _Completions(owner)
+
+
+class CassetteClient:
+    """
+    Stands in for ``OpenAI()``: ``client.chat.completions.create(...)`` goes
+    through the cassette and, when recording, on to the real client.
+    """
+
+    def __init__(self, client, cassette: Cassette):
+        self._client = client
+        self.cassette = cassette
+        self.chat = _Chat(self)
+
+    def with_options(self, **options) -> 'CassetteClient':
+        """Same cassette, with ``options`` applied to the real client (as ``OpenAI.with_options``)."""
+        client = self._client.with_options(**options) if self._client is not None else None
+        return type(self)(client, self.cassette)
+
+    def _create(self, model, messages, n, kwargs):
+        key = request_key(model, messages, n)
+        entry = self.cassette.lookup(key)
+        if entry is not None:
+            time.sleep(self.cassette.replay_delay(entry))
+            return _Response(model, entry)
+        if self._client is None:
+            raise CassetteMiss(key, messages[-1].get('content') or '')
+        started = time.perf_counter()
+        response = self._client.chat.completions.create(model=model, messages=messages, n=n, **kwargs)
+        self.cassette.record(key, response, (time.perf_counter() - started) * 1000)
+        return response
+
+
+class AsyncCassetteClient(CassetteClient):
+    """``CassetteClient`` for ``AsyncOpenAI``; ``create`` is a coroutine."""
+
+    async def _create(self, model, messages, n, kwargs):
+        key = request_key(model, messages, n)
+        entry = self.cassette.lookup(key)
+        if entry is not None:
+            await asyncio.sleep(self.cassette.replay_delay(entry))
+            return _Response(model, entry)
+        if self._client is None:
+            raise CassetteMiss(key, messages[-1].get('content') or '')
+        started = time.perf_counter()
+        response = await self._client.chat.completions.create(model=model, messages=messages, n=n, **kwargs)
+        # The rewrite is small, but keep file IO off the event loop
+        await asyncio.to_thread(self.cassette.record, key, response, (time.perf_counter() - started) * 1000)
+        return response
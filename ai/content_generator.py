@@ -1,133 +1,190 @@
 import os
-from openai import OpenAI
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List
 from models.case_study import CaseStudyInput
+from runtime import deadline, usage
+from runtime.breaker import get_breaker, guard
+
+
+# Every request starts with the same system message and, within one case
+# study, the same client fact sheet; only the section instruction at the end
+# differs. Providers cache long identical prefixes (OpenAI from 1024 tokens),
+# so keep anything request-specific out of these two. The prefix is well
+# under 1024 tokens, so it is kept short rather than padded: each section's
+# format stays in its own instruction, as five formats on every call would
+# cost more prompt tokens than a cache hit saves.
+BRAND_VOICE = """You write customer case studies for UCtel, a UK specialist in in-building mobile signal
+solutions. Write for facilities managers, IT leads and business owners: professional, plain-spoken and
+concrete, in British English. Say "all four UK networks" (EE, Vodafone, O2 and Three) and "4G and 5G".
+Results may be realistic estimates but must stay plausible; never invent named individuals or quotes,
+quote prices or name competitors.
+
+Plain text only: no headings, no Markdown emphasis. Separate paragraphs with a blank line and start
+each bullet point on its own line with "• ".
+
+You will be given the client fact sheet, then asked for one section. Write only that section."""
+
+
+def fact_sheet(case_input: CaseStudyInput) -> str:
+    """The client facts shared by all five section prompts, in a fixed order."""
+    facts = [
+        ("Client", case_input.client_name),
+        ("Industry", case_input.industry),
+        ("Location", case_input.location),
+        ("Project scale", case_input.project_scale),
+        ("Main challenge", case_input.main_challenge),
+        ("Solution provided", case_input.solution_provided),
+        ("Technologies used", ', '.join(case_input.technologies_used) if case_input.technologies_used else None),
+        ("Additional context", case_input.additional_context),
+    ]
+    lines = '\n'.join(f"{label}: {value}" for label, value in facts if value)
+    return f"Client fact sheet:\n{lines}"
 
 
 class AIContentGenerator:
     """Handles AI-powered content generation using OpenAI."""
     
+    # Process-wide circuit breaker around the API (runtime.breaker); replayed cassettes go without
+    breaker = None
+    
     def __init__(self, model: str = "gpt-3.5-turbo"):
+        self.model = model
+        # LLM_CASSETTE records or replays calls (see ai.cassette); replaying needs no API key
+        from .cassette import Cassette, CassetteClient
+        cassette = Cassette.from_env()
+        if cassette is not None and cassette.mode == 'replay':
+            self.client = CassetteClient(None, cassette)
+            return
         api_key = os.getenv('OPENAI_API_KEY')
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
+        # Imported here: the openai package alone takes ~0.5s to import
+        from openai import OpenAI
         self.client = OpenAI(api_key=api_key)
-        self.model = model
+        self.breaker = get_breaker('llm')
+        if cassette is not None:
+            self.client = CassetteClient(self.client, cassette)
     
-    def _generate_content(self, prompt: str) -> str:
+    def _generate_content(self, messages: List[Dict[str, str]]) -> str:
         """Generate content using the configured model."""
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
+        return self._generate_candidates(messages, 1)[0]
+    
+    def _generate_candidates(self, messages: List[Dict[str, str]], n: int) -> List[str]:
+        """Generate ``n`` alternative completions of one prompt in a single API call."""
+        # The call may take no longer than the request it serves has left (runtime.deadline)
+        timeout = deadline.call_timeout(messages, n)
+        started = time.perf_counter()
+        with guard(self.breaker):
+            try:
+                response = self._client_for(timeout).chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.7,
+                    n=n,
+                    **({'timeout': timeout} if timeout is not None else {})
+                )
+            except Exception as e:
+                if deadline.expired():
+                    raise deadline.DeadlineExceeded(deadline.current().reason) from e
+                raise
+        usage.record_call(self.model, response.usage, (time.perf_counter() - started) * 1000, n,
+                          replayed=getattr(response, 'replayed', False))
+        return [choice.message.content.strip() for choice in response.choices]
+    
+    def _client_for(self, timeout):
+        """
+        The client for one call. Under a deadline, openai's own retries are
+        off: each would get the whole ``timeout`` again, running past it.
+        """
+        return self.client if timeout is None else self.client.with_options(max_retries=0)
+    
+    def prompt_messages(self, section_type: str, case_input: CaseStudyInput, note: str = None) -> List[Dict[str, str]]:
+        """
+        Chat messages for one section: the shared system message and fact
+        sheet first, the section instruction (and an optional ``note``) last.
+        """
+        instruction = getattr(self, f"{section_type}_prompt")(case_input)
+        if note:
+            instruction = f"{instruction}\n\n{note}"
+        return [
+            {"role": "system", "content": BRAND_VOICE},
+            {"role": "user", "content": f"{fact_sheet(case_input)}\n\n{instruction}"},
+        ]
+    
+    def generate_section_candidates(self, section_type: str, case_input: CaseStudyInput, n: int) -> List[str]:
+        """``n`` candidate texts for one section (see ``ai.pipeline.CASE_STUDY_SECTIONS``)."""
+        return self._generate_candidates(self.prompt_messages(section_type, case_input), n)
+    
+    def regenerate_section(self, section_type: str, case_input: CaseStudyInput, problems: List[str]) -> str:
+        """Generate one section again, telling the model what was wrong with the last draft."""
+        fixes = '\n'.join(f"- The previous draft {problem}." for problem in problems)
+        return self._generate_content(self.prompt_messages(section_type, case_input, f"Fix these problems:\n{fixes}"))
     
     def generate_summary(self, case_input: CaseStudyInput) -> str:
         """Generate the summary section."""
-        prompt = f"""
-        Write a compelling summary for a case study about {case_input.client_name} in the {case_input.industry} industry.
-        
-        Main challenge: {case_input.main_challenge}
-        Solution provided: {case_input.solution_provided}
-        {f"Location: {case_input.location}" if case_input.location else ""}
-        {f"Project scale: {case_input.project_scale}" if case_input.project_scale else ""}
-        
-        Write 3-4 paragraphs that:
-        1. Introduce the challenge in the industry context
-        2. Highlight why this was particularly difficult
-        3. Briefly mention the solution approach
-        4. Tease the results/benefits
-        
-        Keep it engaging and professional. Focus on the business impact.
-        """
-        
-        return self._generate_content(prompt)
+        return self._generate_content(self.prompt_messages('summary', case_input))
     
     def generate_client_section(self, case_input: CaseStudyInput) -> str:
         """Generate the client description section."""
-        prompt = f"""
-        Write a professional description of the client for a case study.
-        
-        Client: {case_input.client_name}
-        Industry: {case_input.industry}
-        {f"Location: {case_input.location}" if case_input.location else ""}
-        {f"Additional context: {case_input.additional_context}" if case_input.additional_context else ""}
-        
-        Write 2-3 paragraphs that:
-        1. Introduce the client and what they do
-        2. Provide relevant background about their business
-        3. Set the context for why they needed this solution
-        
-        Make it informative but concise. Focus on details relevant to the case study.
-        """
-        
-        return self._generate_content(prompt)
+        return self._generate_content(self.prompt_messages('client', case_input))
     
     def generate_challenges_section(self, case_input: CaseStudyInput) -> str:
         """Generate the challenges section."""
-        prompt = f"""
-        Write a detailed challenges section for a case study.
-        
-        Client: {case_input.client_name}
-        Industry: {case_input.industry}
-        Main challenge: {case_input.main_challenge}
-        {f"Location: {case_input.location}" if case_input.location else ""}
-        {f"Project scale: {case_input.project_scale}" if case_input.project_scale else ""}
-        
-        Write content that:
-        1. Introduces the challenges with context
-        2. Lists 3-4 specific challenges as bullet points
-        3. Explains why these challenges were particularly difficult
-        4. Mentions any time constraints or special requirements
-        
-        Format with a brief intro paragraph, then a bulleted list of challenges, then a concluding paragraph.
-        Focus on technical and business challenges that make this case study compelling.
-        """
-        
-        return self._generate_content(prompt)
+        return self._generate_content(self.prompt_messages('challenges', case_input))
     
     def generate_solution_section(self, case_input: CaseStudyInput) -> str:
         """Generate the solution section."""
-        prompt = f"""
-        Write a detailed solution section for a case study.
-        
-        Client: {case_input.client_name}
-        Solution provided: {case_input.solution_provided}
-        {f"Technologies used: {', '.join(case_input.technologies_used)}" if case_input.technologies_used else ""}
-        {f"Project scale: {case_input.project_scale}" if case_input.project_scale else ""}
-        
-        Write content that:
-        1. Explains the solution approach
-        2. Details the specific technologies or methods used
-        3. Lists key benefits/features as bullet points
-        4. Describes the implementation process
-        5. Mentions any partnerships or collaboration
-        
-        Make it technical enough to be credible but accessible to business readers.
-        Focus on why this solution was the right choice.
-        """
-        
-        return self._generate_content(prompt)
+        return self._generate_content(self.prompt_messages('solution', case_input))
     
     def generate_results_section(self, case_input: CaseStudyInput) -> str:
         """Generate the results section."""
-        prompt = f"""
-        Write a compelling results section for a case study.
-        
-        Client: {case_input.client_name}
-        Solution provided: {case_input.solution_provided}
-        Original challenge: {case_input.main_challenge}
-        
-        Write content that:
-        1. Describes the positive outcomes achieved
-        2. Includes specific improvements (can be realistic but impressive)
-        3. Mentions implementation timeline
-        4. Concludes with client satisfaction
-        5. Includes a call-to-action paragraph for similar clients
-        
-        Focus on measurable business benefits and user experience improvements.
-        End with an engaging call-to-action that encourages similar prospects to get in touch.
-        """
-        
-        return self._generate_content(prompt)
+        return self._generate_content(self.prompt_messages('results', case_input))
+    
+    def summary_prompt(self, case_input: CaseStudyInput) -> str:
+        """Instruction for the summary section."""
+        return f"""Write the Summary section of the case study about {case_input.client_name}: 3-4 paragraphs that:
+1. Introduce the challenge in the industry context
+2. Highlight why this was particularly difficult
+3. Briefly mention the solution approach
+4. Tease the results/benefits
+Keep it engaging and professional. Focus on the business impact."""
+    
+    def client_prompt(self, case_input: CaseStudyInput) -> str:
+        """Instruction for the client description section."""
+        return f"""Write The Client section of the case study about {case_input.client_name}: 2-3 paragraphs that:
+1. Introduce the client and what they do
+2. Provide relevant background about their business
+3. Set the context for why they needed this solution
+Make it informative but concise. Focus on details relevant to the case study."""
+    
+    def challenges_prompt(self, case_input: CaseStudyInput) -> str:
+        """Instruction for the challenges section."""
+        return f"""Write The Challenges section of the case study about {case_input.client_name}: content that:
+1. Introduces the challenges with context
+2. Lists 3-4 specific challenges as bullet points
+3. Explains why these challenges were particularly difficult
+4. Mentions any time constraints or special requirements
+Format with a brief intro paragraph, then a bulleted list of challenges, then a concluding paragraph.
+Focus on technical and business challenges that make this case study compelling."""
+    
+    def solution_prompt(self, case_input: CaseStudyInput) -> str:
+        """Instruction for the solution section."""
+        return f"""Write The Solution section of the case study about {case_input.client_name}: content that:
+1. Explains the solution approach
+2. Details the specific technologies or methods used
+3. Lists key benefits/features as bullet points
+4. Describes the implementation process
+5. Mentions any partnerships or collaboration
+Make it technical enough to be credible but accessible to business readers.
+Focus on why this solution was the right choice."""
+    
+    def results_prompt(self, case_input: CaseStudyInput) -> str:
+        """Instruction for the results section."""
+        return f"""Write The Results section of the case study about {case_input.client_name}: content that:
+1. Describes the positive outcomes achieved
+2. Includes specific improvements (can be realistic but impressive)
+3. Mentions implementation timeline
+4. Concludes with client satisfaction
+5. Includes a call-to-action paragraph for similar clients
+Focus on measurable business benefits and user experience improvements.
+End with an engaging call-to-action that encourages similar prospects to get in touch."""
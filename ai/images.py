@@ -0,0 +1,149 @@
+"""
+Feature image generation for case studies.
+
+Backends share one ``generate(case_input)`` call so the pipeline can run
+the image stage alongside the section calls without caring which is in use.
+Select one with FEATURE_IMAGE_BACKEND=openai|offline (unset: no image).
+"""
+
+import base64
+import hashlib
+import os
+import random
+import struct
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from models.case_study import CaseStudyInput, FeatureImage
+
+
+def feature_image_prompt(case_input: CaseStudyInput) -> str:
+    """Image prompt built from the same input as the text sections."""
+    setting = f" in {case_input.location}" if case_input.location else ""
+    technologies = (f" Subtly show equipment such as {', '.join(case_input.technologies_used)}."
+                    if case_input.technologies_used else "")
+    return (
+        f"Professional editorial photograph for a case study about {case_input.client_name}, "
+        f"a {case_input.industry} organisation{setting}. The project addressed: "
+        f"{case_input.main_challenge}. The solution: {case_input.solution_provided}.{technologies} "
+        "Modern, bright, realistic, no text, no logos, wide landscape composition."
+    )
+
+
+def feature_image_alt_text(case_input: CaseStudyInput) -> str:
+    return f"{case_input.client_name} – {case_input.industry} mobile connectivity project"
+
+
+class ImageBackend(ABC):
+    """Generates a feature image for a case study input."""
+
+    name = 'base'
+
+    @abstractmethod
+    def generate_image(self, prompt: str) -> FeatureImage:
+        """An image for ``prompt``."""
+
+    def generate(self, case_input: CaseStudyInput) -> FeatureImage:
+        image = self.generate_image(feature_image_prompt(case_input))
+        image.alt_text = image.alt_text or feature_image_alt_text(case_input)
+        return image
+
+
+class OpenAIImageBackend(ImageBackend):
+    """Feature images from the OpenAI Images API."""
+
+    name = 'openai'
+
+    def __init__(self, model: str = None, size: str = None):
+        api_key = os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY environment variable is required")
+        # Imported here: the openai package alone takes ~0.5s to import
+        from openai import OpenAI
+        self.client = OpenAI(api_key=api_key)
+        self.model = model or os.getenv('FEATURE_IMAGE_MODEL', 'dall-e-3')
+        self.size = size or os.getenv('FEATURE_IMAGE_SIZE', '1792x1024')
+
+    def generate_image(self, prompt: str) -> FeatureImage:
+        response = self.client.images.generate(
+            model=self.model,
+            prompt=prompt,
+            size=self.size,
+            n=1,
+            response_format='b64_json',
+        )
+        width, _, height = self.size.partition('x')
+        return FeatureImage(
+            data=base64.b64decode(response.data[0].b64_json),
+            mime_type='image/png',
+            width=int(width),
+            height=int(height),
+            prompt=prompt,
+            backend=self.name,
+        )
+
+
+class OfflineImageBackend(ImageBackend):
+    """
+    Stand-in image backend for load tests and local development.
+
+    Returns a gradient PNG derived from the prompt after a simulated delay
+    around ``latency_ms`` (image models are typically slower than a section).
+    """
+
+    name = 'offline'
+
+    def __init__(self, latency_ms: float = None, jitter: float = None, width: int = 1200, height: int = 630):
+        self.latency_ms = (latency_ms if latency_ms is not None
+                           else float(os.getenv('OFFLINE_IMAGE_LATENCY_MS', '3000')))
+        self.jitter = jitter if jitter is not None else float(os.getenv('OFFLINE_LLM_JITTER', '0.3'))
+        self.width = width
+        self.height = height
+
+    def _simulated_latency(self) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        return random.lognormvariate(0, self.jitter) * self.latency_ms / 1000
+
+    def generate_image(self, prompt: str) -> FeatureImage:
+        time.sleep(self._simulated_latency())
+        return FeatureImage(
+            data=gradient_png(self.width, self.height, hashlib.sha256(prompt.encode('utf-8')).digest()),
+            mime_type='image/png',
+            width=self.width,
+            height=self.height,
+            prompt=prompt,
+            backend=self.name,
+        )
+
+
+def gradient_png(width: int, height: int, seed: bytes) -> bytes:
+    """A vertical two-colour gradient PNG (no imaging library needed)."""
+    top, bottom = seed[:3], seed[3:6]
+    rows = []
+    for y in range(height):
+        t = y / max(height - 1, 1)
+        colour = bytes(round(a + (b - a) * t) for a, b in zip(top, bottom))
+        rows.append(b'\x00' + colour * width)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(b''.join(rows), 6)) + chunk(b'IEND', b''))
+
+
+def create_image_backend(name: str = None) -> Optional[ImageBackend]:
+    """The configured image backend (FEATURE_IMAGE_BACKEND), or None when disabled."""
+    name = (name if name is not None else os.getenv('FEATURE_IMAGE_BACKEND', '')).lower()
+    if name in ('', 'none', 'off'):
+        return None
+    if name == 'offline':
+        return OfflineImageBackend()
+    if name == 'openai':
+        return OpenAIImageBackend()
+    raise ValueError(f"Unknown FEATURE_IMAGE_BACKEND: {name}")
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from typing import Dict, List
+
+from runtime import deadline, usage
+from .content_generator import AIContentGenerator
+
+
+OFFLINE_PARAGRAPH = (
+    "The client operates in a demanding environment where reliable mobile connectivity "
+    "underpins day-to-day operations, and the project team worked closely with on-site "
+    "staff to understand how coverage problems were affecting people across the building."
+)
+
+OFFLINE_BULLETS = [
+    "Building materials blocking signal from all major networks",
+    "High user density at peak times",
+    "Tight installation window with minimal disruption allowed",
+    "Coverage required across every floor and shared space",
+]
+
+OFFLINE_CTA = (
+    "Facing similar connectivity challenges? Contact us today to find out how we can help."
+)
+
+# Prefix caching as OpenAI does it: prompts of 1024+ tokens, cached in 128-token steps
+CACHE_MIN_TOKENS = 1024
+CACHE_STEP_TOKENS = 128
+CHARS_PER_TOKEN = 4
+
+
+class _PrefixCache:
+    """Remembers prompt prefixes seen recently to report ``cached_tokens`` like the real API."""
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def cached_tokens(self, text: str) -> int:
+        """Tokens of ``text`` covered by an earlier prompt; records this prompt's prefixes."""
+        total = len(text) // CHARS_PER_TOKEN
+        boundaries = range(CACHE_MIN_TOKENS, total + 1, CACHE_STEP_TOKENS)
+        digests = [hashlib.blake2b(text[:tokens * CHARS_PER_TOKEN].encode('utf-8'), digest_size=16).digest()
+                   for tokens in boundaries]
+        with self._lock:
+            cached = 0
+            for tokens, digest in zip(boundaries, digests):
+                if digest not in self._seen:
+                    break
+                cached = tokens
+            if len(self._seen) + len(digests) > self.max_entries:
+                self._seen.clear()
+            self._seen.update(digests)
+        return cached
+
+
+class OfflineContentGenerator(AIContentGenerator):
+    """
+    Stand-in for the OpenAI backend used for load tests and local development.
+
+    Returns canned, correctly structured section content after a simulated
+    network delay drawn from a log-normal distribution around ``latency_ms``.
+    """
+
+    def __init__(self, model: str = "offline", latency_ms: float = None, jitter: float = None):
+        self.client = None
+        self.model = model
+        self.latency_ms = latency_ms if latency_ms is not None else float(os.getenv('OFFLINE_LLM_LATENCY_MS', '1500'))
+        self.jitter = jitter if jitter is not None else float(os.getenv('OFFLINE_LLM_JITTER', '0.3'))
+
+    def _simulated_latency(self) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        return random.lognormvariate(0, self.jitter) * self.latency_ms / 1000
+
+    def _generate_content(self, messages: List[Dict[str, str]]) -> str:
+        """Return canned content after a realistic delay."""
+        return self._generate_candidates(messages, 1)[0]
+
+    def _generate_candidates(self, messages: List[Dict[str, str]], n: int) -> List[str]:
+        """Return ``n`` distinct canned candidates after a single delay, like one ``n=`` call."""
+        # Honours the request deadline like the real client, so load tests exercise cancellation
+        timeout = deadline.call_timeout(messages, n)
+        latency = self._simulated_latency()
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            deadline.current().check()
+        time.sleep(latency)
+        return self._record_usage(messages, [self._canned_content(i) for i in range(n)], latency)
+
+    def _record_usage(self, messages: List[Dict[str, str]], outputs: List[str], latency: float) -> List[str]:
+        # Roughly four characters per token, so load tests exercise the usage ledger realistically
+        prompt = ''.join(f"{message['role']}\n{message['content']}\n" for message in messages)
+        completion_tokens = sum(len(output) for output in outputs) // CHARS_PER_TOKEN
+        usage.record_call(self.model, {
+            'prompt_tokens': len(prompt) // CHARS_PER_TOKEN,
+            'completion_tokens': completion_tokens,
+            'prompt_tokens_details': {'cached_tokens': _prefix_cache.cached_tokens(prompt)},
+        }, latency * 1000, len(outputs))
+        return outputs
+
+    def _canned_content(self, variant: int = 0) -> str:
+        # Later candidates drop bullets so the ranking has something to choose between
+        bullets = '\n'.join(f"• {item}" for item in OFFLINE_BULLETS[:len(OFFLINE_BULLETS) - variant])
+        return f"{OFFLINE_PARAGRAPH}\n\n{bullets}\n\n{OFFLINE_PARAGRAPH}\n\n{OFFLINE_CTA}"
+
+
+_prefix_cache = _PrefixCache()
@@ -0,0 +1,383 @@
+"""
+Shared case study assembly used by the Flask app, the ASGI app and the CLI.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Union
+
+from models.case_study import CaseStudyInput, CaseStudySection, CaseStudy, FeatureImage
+from runtime import deadline, metrics, usage
+from runtime.breaker import CircuitOpen
+from runtime.timing import phase
+from templates import WordPressFormatter
+
+logger = logging.getLogger('case_study.images')
+
+
+# (title, section_type, AIContentGenerator method) in publication order
+CASE_STUDY_SECTIONS = [
+    ("Summary", "summary", "generate_summary"),
+    ("The Client", "client", "generate_client_section"),
+    ("The Challenges", "challenges", "generate_challenges_section"),
+    ("The Solution", "solution", "generate_solution_section"),
+    ("The Results", "results", "generate_results_section"),
+]
+SECTION_METHODS = {section_type: method for _, section_type, method in CASE_STUDY_SECTIONS}
+
+
+def format_wordpress_content(formatter: WordPressFormatter, sections: List[CaseStudySection]) -> str:
+    """Format sections into WordPress block content."""
+    formatted_sections = []
+
+    for section in sections:
+        formatted_section = formatter.format_section(section.title, section.content)
+        formatted_sections.append(formatted_section)
+
+    return '\n\n'.join(formatted_sections)
+
+
+class RetryBudget:
+    """
+    Regenerations allowed for one case study.
+
+    ``total`` (VALIDATION_RETRY_BUDGET, default 3) bounds the extra calls
+    across all sections; ``per_section`` (VALIDATION_MAX_RETRIES, default 1)
+    bounds any single section. Thread-safe, so concurrently generated
+    sections can share it.
+    """
+
+    def __init__(self, total: int = None, per_section: int = None):
+        self.remaining = total if total is not None else int(os.getenv('VALIDATION_RETRY_BUDGET', '3'))
+        self.per_section = per_section if per_section is not None else int(os.getenv('VALIDATION_MAX_RETRIES', '1'))
+        self._lock = threading.Lock()
+
+    def take(self, retries_so_far: int) -> bool:
+        if retries_so_far >= self.per_section:
+            return False
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+@dataclass
+class SectionCheck:
+    """Generated content for a section after validation and any retries."""
+    content: Union[str, List[str]]
+    retries: int = 0
+    issues: Optional[List[str]] = None
+    stale: bool = False
+
+
+def _validation_problems(section_type: str, content: Union[str, List[str]],
+                         case_input: Optional[CaseStudyInput] = None) -> List[str]:
+    """Problems with a section, or [] if it (or, for candidates, any one of them) is valid."""
+    from .validation import validate_sections
+    texts = [content] if isinstance(content, str) else content
+    keywords = case_input.technologies_used if case_input is not None else None
+    results = validate_sections([(section_type, text, keywords) for text in texts])
+    if any(result.ok for result in results):
+        return []
+    return results[0].problems if results else []
+
+
+def _with_retry(content: Union[str, List[str]], regenerated: str) -> Union[str, List[str]]:
+    # A regenerated candidate joins the others and is ranked with them
+    return regenerated if isinstance(content, str) else [regenerated] + content
+
+
+class _SectionRetries:
+    """
+    The validate-and-regenerate loop shared by ``check_section`` and
+    ``check_section_async``, which differ only in how they call the generator.
+    """
+
+    def __init__(self, section_type: str, case_input: CaseStudyInput, content: Union[str, List[str]],
+                 budget: RetryBudget):
+        self.section_type = section_type
+        self.case_input = case_input
+        self.budget = budget
+        self.check = SectionCheck(content)
+        self.problems: List[str] = []
+        self.circuit_open = False
+
+    def needed(self) -> bool:
+        """Validate the content so far; True when it should be regenerated for ``problems``."""
+        if self.circuit_open:
+            # Keep the draft we have rather than failing the whole case study
+            self.check.issues = self.problems
+            return False
+        self.problems = _validation_problems(self.section_type, self.check.content, self.case_input)
+        if not self.problems:
+            return False
+        metrics.increment(f'validation.failed.{self.section_type}')
+        if not self.budget.take(self.check.retries):
+            metrics.increment('validation.exhausted')
+            self.check.issues = self.problems
+            return False
+        return True
+
+    @contextmanager
+    def attempt(self):
+        """Around one regenerate call."""
+        try:
+            with phase(f'llm.{self.section_type}.retry'), usage.scope(section=self.section_type):
+                yield
+        except CircuitOpen:
+            self.circuit_open = True
+
+    def add(self, regenerated: str) -> None:
+        self.check.content = _with_retry(self.check.content, regenerated)
+        self.check.retries += 1
+
+
+def check_section(generator, section_type: str, case_input: CaseStudyInput,
+                  content: Union[str, List[str]], budget: RetryBudget) -> SectionCheck:
+    """
+    Validate a freshly generated section and regenerate only it while it
+    fails and ``budget`` allows. Remaining problems are kept as ``issues``.
+    """
+    retries = _SectionRetries(section_type, case_input, content, budget)
+    while retries.needed():
+        with retries.attempt():
+            retries.add(generator.regenerate_section(section_type, case_input, retries.problems))
+    return retries.check
+
+
+async def check_section_async(generator, section_type: str, case_input: CaseStudyInput,
+                              content: Union[str, List[str]], budget: RetryBudget) -> SectionCheck:
+    """``check_section`` for the async generators."""
+    retries = _SectionRetries(section_type, case_input, content, budget)
+    while retries.needed():
+        with retries.attempt():
+            retries.add(await generator.regenerate_section(section_type, case_input, retries.problems))
+    return retries.check
+
+
+class _Draft:
+    """The first call for a section; ``circuit_open`` is the error when the LLM circuit refused it."""
+    content: Union[str, List[str], None] = None
+    circuit_open: Optional[CircuitOpen] = None
+
+
+@contextmanager
+def _drafting(section_type: str):
+    draft = _Draft()
+    try:
+        with phase(f'llm.{section_type}'), usage.scope(section=section_type):
+            yield draft
+    except CircuitOpen as e:
+        draft.circuit_open = e
+
+
+def _draft_call(generator, section_type: str, case_input: CaseStudyInput, candidates: int):
+    # An awaitable with the async generators
+    if candidates > 1:
+        return generator.generate_section_candidates(section_type, case_input, candidates)
+    return getattr(generator, SECTION_METHODS[section_type])(case_input)
+
+
+def generate_section(generator, section_type: str, case_input: CaseStudyInput, budget: RetryBudget,
+                     candidates: int = 1) -> SectionCheck:
+    """
+    Generate one section and ``check_section`` it. The call fails fast
+    while the LLM circuit is open; an earlier result for the same input
+    (``stale_section``) is better than none.
+    """
+    with _drafting(section_type) as draft:
+        draft.content = _draft_call(generator, section_type, case_input, candidates)
+    if draft.circuit_open is not None:
+        return stale_section(case_input, section_type, draft.circuit_open)
+    return check_section(generator, section_type, case_input, draft.content, budget)
+
+
+async def generate_section_async(generator, section_type: str, case_input: CaseStudyInput, budget: RetryBudget,
+                                 candidates: int = 1) -> SectionCheck:
+    """``generate_section`` for the async generators."""
+    with _drafting(section_type) as draft:
+        draft.content = await _draft_call(generator, section_type, case_input, candidates)
+    if draft.circuit_open is not None:
+        return await asyncio.to_thread(stale_section, case_input, section_type, draft.circuit_open)
+    return await check_section_async(generator, section_type, case_input, draft.content, budget)
+
+
+def build_section(title: str, section_type: str, content: Union[str, List[str], SectionCheck]) -> CaseStudySection:
+    """
+    A section from one text, or from several candidates ranked locally (best
+    selected). A SectionCheck also carries its retry count and open issues.
+    """
+    extra = {}
+    if isinstance(content, SectionCheck):
+        extra = {'retries': content.retries or None, 'issues': content.issues, 'stale': content.stale or None}
+        content = content.content
+    if isinstance(content, str):
+        return CaseStudySection(title=title, content=content, section_type=section_type, **extra)
+    if len(content) == 1:
+        return CaseStudySection(title=title, content=content[0], section_type=section_type, **extra)
+    from .ranking import rank_candidates
+    candidates = rank_candidates(section_type, content)
+    return CaseStudySection(title=title, content=candidates[0].content, section_type=section_type,
+                            candidates=candidates, selected=0, **extra)
+
+
+def assemble_case_study(case_input: CaseStudyInput, contents: Dict[str, Union[str, List[str], SectionCheck]],
+                        formatter: WordPressFormatter = None) -> CaseStudy:
+    """
+    Build a CaseStudy from generated section contents keyed by section type.
+
+    A value may be a list of candidate texts, in which case they are ranked
+    and stored on the section and the best one is used, or a SectionCheck
+    from ``check_section``.
+    """
+    sections = [
+        build_section(title, section_type, contents[section_type])
+        for title, section_type, _ in CASE_STUDY_SECTIONS
+    ]
+
+    # Format for WordPress
+    with phase('format'):
+        wordpress_content = format_wordpress_content(formatter or WordPressFormatter(), sections)
+
+    # Generate title
+    title = f"Case Study: {case_input.client_name} - {case_input.main_challenge}"
+
+    return CaseStudy(
+        title=title,
+        sections=sections,
+        wordpress_content=wordpress_content,
+        client_name=case_input.client_name,
+        case_input=case_input,
+        created_at=datetime.now(timezone.utc),
+        stale=any(section.stale for section in sections) or None
+    )
+
+
+_section_cache = None
+_section_cache_lock = threading.Lock()
+
+
+def get_section_cache():
+    """Process-wide SectionCache (LLM_STALE_*), or None when the stale fallback is off."""
+    global _section_cache
+    with _section_cache_lock:
+        if _section_cache is None:
+            from storage import SectionCache
+            _section_cache = SectionCache.from_env() or False
+        return _section_cache or None
+
+
+def stale_section(case_input: CaseStudyInput, section_type: str, error: CircuitOpen) -> SectionCheck:
+    """
+    The last good text of a section for an equivalent input, flagged
+    stale, for use while the LLM circuit is open. Re-raises ``error`` when
+    there is none.
+    """
+    cache = get_section_cache()
+    cached = cache.get(case_input.fingerprint(), section_type) if cache is not None else None
+    if cached is None:
+        raise error
+    metrics.increment('stale.served')
+    return SectionCheck(cached[0], stale=True)
+
+
+def remember_sections(case_input: CaseStudyInput, case_study: CaseStudy) -> None:
+    """Keep freshly generated sections as the stale fallback for equivalent inputs."""
+    cache = get_section_cache()
+    if cache is None:
+        return
+    fingerprint = case_input.fingerprint()
+    for section in case_study.sections:
+        if section.stale:
+            continue
+        try:
+            cache.put(fingerprint, section.section_type, section.content)
+        except OSError as e:
+            metrics.increment('stale.write_failed')
+            logging.getLogger('case_study.fallback').warning("Could not cache section %s: %s",
+                                                             section.section_type, e)
+
+
+def skip_sections(generator, case_input: CaseStudyInput, section_types: List[str], candidates: int = 1) -> None:
+    """Count section calls abandoned before they started (deadline or disconnect) and the tokens that saved."""
+    for section_type in section_types:
+        deadline.record_skipped(generator.prompt_messages(section_type, case_input), candidates)
+
+
+def requested_candidates(value=None) -> int:
+    """
+    Candidates per section for a request: ``value`` (payload/form) or
+    LLM_CANDIDATES, capped at LLM_MAX_CANDIDATES. Raises ValueError if invalid.
+    """
+    if value is None or value == '':
+        value = os.getenv('LLM_CANDIDATES', '1')
+    try:
+        candidates = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('candidates must be an integer')
+    if candidates < 1:
+        raise ValueError('candidates must be at least 1')
+    return min(candidates, int(os.getenv('LLM_MAX_CANDIDATES', '5')))
+
+
+def candidate_index(value) -> int:
+    """Parse a candidate index from a form or JSON value, raising ValueError."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError('index must be an integer')
+
+
+def select_candidate(case_study: CaseStudy, section_type: str, index: int,
+                     formatter: WordPressFormatter = None) -> CaseStudy:
+    """
+    Switch a section to another stored candidate and reformat the content.
+
+    Raises KeyError for an unknown section and IndexError for a candidate
+    that doesn't exist; no model call is made.
+    """
+    section = next((s for s in case_study.sections if s.section_type == section_type), None)
+    if section is None:
+        raise KeyError(section_type)
+    if not section.candidates or not 0 <= index < len(section.candidates):
+        raise IndexError(f"Section {section_type!r} has no candidate {index}")
+    section.content = section.candidates[index].content
+    section.selected = index
+    with phase('format'):
+        case_study.wordpress_content = format_wordpress_content(formatter or WordPressFormatter(),
+                                                                case_study.sections)
+    return case_study
+
+
+def generate_feature_image(backend, case_input: CaseStudyInput, processor=None) -> Optional[FeatureImage]:
+    """
+    Run the optional image stage for ``case_input``.
+
+    Meant to be started alongside the section calls. The image is
+    post-processed (``media.ImageProcessor``) before it is returned, so
+    previews and uploads only ever see the optimized variants. A failed
+    image is logged and counted but never fails the case study itself.
+    """
+    try:
+        with phase('image'):
+            image = backend.generate(case_input)
+    except Exception:
+        logger.exception('Feature image generation failed for %s', case_input.client_name)
+        metrics.increment('feature_image.failed')
+        return None
+    metrics.increment('feature_image.generated')
+
+    if processor is not None:
+        try:
+            with phase('image.process'):
+                processor.process(image)
+        except Exception:
+            logger.exception('Feature image processing failed; keeping the original')
+            metrics.increment('image.process_failed')
+    return image
@@ -0,0 +1,301 @@
+"""
+Content quality and readability metrics over whole batches of sections.
+
+For every section: Flesch reading ease and grade level, the distribution
+of sentence lengths (mean, 90th percentile, longest), bullet density, the
+rate of repeated three-word phrases and coverage of the case study's
+``technologies_used``. ``measure`` tokenizes each text once, maps tokens
+to ids in a shared vocabulary and computes everything with NumPy over
+flat per-token arrays, so the cost per section is a regex pass and a few
+array operations rather than a Python loop per metric.
+
+Sentences end at ``.``, ``!`` or ``?`` followed by a space, at a line
+break and before a bullet. Bullets and lines are counted the way
+``WordPressFormatter.parse_content_for_lists`` reads them.
+
+NumPy is optional (``pip install numpy``); without it ``available()`` is
+False and the validators skip these checks.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Words (with inner apostrophes), sentence-ending punctuation, line breaks and bullets at the start of a line
+_TOKEN = re.compile(r"(?m)^[ \t]*[•*-](?=\s)|[.!?]+(?=\s|$)|\n|[^\W_]+(?:['’][^\W_]+)*")
+_VOWEL_GROUPS = re.compile(r'[aeiouy]+')
+_LETTERS = re.compile(r'[^a-z]')
+
+WORD, END, BREAK, BULLET = 0, 1, 2, 3
+
+# Two million words cubed still fits in an int64 trigram key
+_MAX_VOCABULARY = 2_000_000
+
+FIELDS = ('words', 'sentences', 'reading_ease', 'grade_level', 'sentence_mean', 'sentence_p90', 'sentence_max',
+          'bullets', 'lines', 'bullet_density', 'repeated_phrase_rate', 'keyword_coverage')
+
+
+def available() -> bool:
+    return np is not None
+
+
+def token_kind(token: str) -> int:
+    if token == '\n':
+        return BREAK
+    if token[-1] in '.!?':
+        return END
+    if token[-1] in '•*-':
+        return BULLET
+    return WORD
+
+
+def syllables(word: str) -> int:
+    """Vowel groups, less a silent final e; numbers and abbreviations count as one."""
+    letters = _LETTERS.sub('', word)
+    if not letters:
+        return 1
+    count = len(_VOWEL_GROUPS.findall(letters))
+    if count > 1 and letters.endswith('e') and not letters.endswith(('le', 'ee')):
+        count -= 1
+    return max(count, 1)
+
+
+class Vocabulary:
+    """Token → id, with each distinct token's kind and syllable count worked out once."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self._kinds: List[int] = []
+        self._syllables: List[int] = []
+        self.kinds = np.zeros(0, np.int8)
+        self.syllables = np.zeros(0, np.int16)
+
+    def encode(self, tokens: List[str]):
+        ids = self.ids
+        # New tokens are found with set arithmetic and the lookups run through map, both without a Python loop per token
+        new = set(tokens).difference(ids)
+        if new:
+            for token in sorted(new):
+                ids[token] = len(ids)
+                kind = token_kind(token)
+                self._kinds.append(kind)
+                self._syllables.append(syllables(token) if kind == WORD else 0)
+            self.kinds = np.array(self._kinds, np.int8)
+            self.syllables = np.array(self._syllables, np.int16)
+        return np.fromiter(map(ids.__getitem__, tokens), np.int64, len(tokens))
+
+    def lookup(self, token: str) -> int:
+        return self.ids.get(token, -1)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+@dataclass
+class QualityBatch:
+    """Metrics for ``len(self)`` sections, one array element per section (NaN where undefined)."""
+    words: 'np.ndarray'
+    sentences: 'np.ndarray'
+    reading_ease: 'np.ndarray'
+    grade_level: 'np.ndarray'
+    sentence_mean: 'np.ndarray'
+    sentence_p90: 'np.ndarray'
+    sentence_max: 'np.ndarray'
+    bullets: 'np.ndarray'
+    lines: 'np.ndarray'
+    bullet_density: 'np.ndarray'
+    repeated_phrase_rate: 'np.ndarray'
+    keyword_coverage: 'np.ndarray'
+    missing_keywords: List[List[str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def row(self, index: int) -> dict:
+        """One section's metrics as plain (JSON-serializable) values."""
+        row = {}
+        for name in FIELDS:
+            value = getattr(self, name)[index].item()
+            if isinstance(value, float):
+                value = None if math.isnan(value) else round(value, 3)
+            row[name] = value
+        row['missing_keywords'] = self.missing_keywords[index]
+        return row
+
+    def rows(self) -> List[dict]:
+        return [self.row(index) for index in range(len(self))]
+
+
+def _run_starts(values):
+    """Index of the first element of each run of equal values in a sorted array."""
+    starts = np.ones(len(values), bool)
+    starts[1:] = values[1:] != values[:-1]
+    return np.flatnonzero(starts)
+
+
+def _keyword_coverage(vocabulary: Vocabulary, keywords: Sequence[Optional[Sequence[str]]],
+                      word_doc, word_ids, count: int):
+    """Share of each section's keywords whose words all occur in it, and the keywords that don't."""
+    coverage = np.full(count, np.nan)
+    missing: List[List[str]] = [[] for _ in range(count)]
+    # One (section, keyword, word id) row per keyword word; -1 for words the batch never uses
+    owners, phrases, terms = [], [], []
+    names = []
+    for doc, doc_keywords in enumerate(keywords):
+        for keyword in doc_keywords or ():
+            term_ids = [vocabulary.lookup(token) for token in _TOKEN.findall(keyword.lower())
+                        if token_kind(token) == WORD]
+            if not term_ids:
+                continue
+            owners.append(doc)
+            names.append(keyword)
+            terms.extend(term_ids)
+            phrases.extend([len(names) - 1] * len(term_ids))
+    if not names:
+        return coverage, missing
+
+    size = max(len(vocabulary), 1)
+    phrases = np.asarray(phrases)
+    terms = np.asarray(terms, np.int64)
+    # Only occurrences of keyword words matter, a small share of the batch
+    wanted = np.isin(word_ids, terms)
+    present = np.unique(word_doc[wanted].astype(np.int64) * size + word_ids[wanted])
+    query = np.asarray(owners)[phrases].astype(np.int64) * size + terms
+    position = np.minimum(np.searchsorted(present, query), max(len(present) - 1, 0))
+    found = (terms >= 0) & (present[position] == query) if len(present) else np.zeros(len(query), bool)
+    # A keyword is covered when none of its words is missing
+    covered = np.bincount(phrases, weights=~found, minlength=len(names)) == 0
+    owners = np.asarray(owners)
+    totals = np.bincount(owners, minlength=count)
+    hits = np.bincount(owners, weights=covered, minlength=count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        coverage = np.where(totals > 0, hits / totals, np.nan)
+    for index in np.flatnonzero(~covered):
+        missing[owners[index]].append(names[index])
+    return coverage, missing
+
+
+def _measure_chunk(vocabulary: Vocabulary, texts: Sequence[str],
+                   keywords: Sequence[Optional[Sequence[str]]]) -> QualityBatch:
+    count = len(texts)
+    tokenized = [_TOKEN.findall(text.lower()) for text in texts]
+    lengths = np.fromiter(map(len, tokenized), np.int64, count)
+    ids = vocabulary.encode(list(chain.from_iterable(tokenized)))
+    doc = np.repeat(np.arange(count), lengths)
+    kind = vocabulary.kinds[ids] if len(ids) else np.zeros(0, np.int8)
+    first = np.zeros(len(ids), bool)
+    first[np.cumsum(lengths)[:-1][lengths[1:] > 0]] = True
+    if len(ids):
+        first[0] = True
+
+    is_word = kind == WORD
+    word_doc, word_ids = doc[is_word], ids[is_word]
+    words = np.bincount(word_doc, minlength=count)
+    syllable_total = np.bincount(word_doc, weights=vocabulary.syllables[word_ids], minlength=count)
+
+    # Sentence lengths: a new sentence starts after an END or BREAK, at a bullet and at each section
+    ends = (kind == END) | (kind == BREAK)
+    starts = first | (kind == BULLET)
+    starts[1:] |= ends[:-1]
+    sentence_first = _run_starts(np.cumsum(starts)[is_word])
+    sentence_words = np.diff(np.append(sentence_first, len(word_doc)))
+    sentence_doc = word_doc[sentence_first]
+    sentences = np.bincount(sentence_doc, minlength=count)
+    order = np.lexsort((sentence_words, sentence_doc))
+    sorted_words = sentence_words[order]
+    offsets = np.concatenate(([0], np.cumsum(sentences)[:-1]))
+    has_sentences = sentences > 0
+    last = np.where(has_sentences, offsets + sentences - 1, 0)
+    p90 = np.where(has_sentences, offsets + np.floor(0.9 * (sentences - 1)).astype(np.int64), 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sentence_mean = np.bincount(sentence_doc, weights=sentence_words, minlength=count) / sentences
+        sentence_p90 = np.where(has_sentences, sorted_words[p90] if len(sorted_words) else 0, np.nan)
+        sentence_max = np.where(has_sentences, sorted_words[last] if len(sorted_words) else 0, np.nan)
+
+        words_per_sentence = words / np.maximum(sentences, 1)
+        syllables_per_word = syllable_total / words
+        reading_ease = np.where(words > 0, 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word, np.nan)
+        grade_level = np.where(words > 0, 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59, np.nan)
+
+        # Lines with any words in them, as the formatter sees paragraphs and list items
+        line_first = _run_starts(np.cumsum(first | np.concatenate(([False], kind[:-1] == BREAK)))[is_word])
+        lines = np.bincount(word_doc[line_first], minlength=count)
+        bullets = np.bincount(doc[kind == BULLET], minlength=count)
+        bullet_density = np.where(lines > 0, bullets / lines, np.nan)
+
+        # Three-word phrases within a section, and how many of them occur more than once in it
+        repeated_phrase_rate = np.full(count, np.nan)
+        if len(word_ids) >= 3:
+            same_doc = word_doc[:-2] == word_doc[2:]
+            size = len(vocabulary)
+            if size < _MAX_VOCABULARY:
+                keys = (word_ids[:-2] * size + word_ids[1:-1]) * size + word_ids[2:]
+            else:
+                keys = np.unique(np.stack([word_ids[:-2], word_ids[1:-1], word_ids[2:]], axis=1),
+                                 axis=0, return_inverse=True)[1].ravel()
+            keys, phrase_doc = keys[same_doc], word_doc[:-2][same_doc]
+            order = np.lexsort((keys, phrase_doc))
+            keys, phrase_doc = keys[order], phrase_doc[order]
+            new_run = np.ones(len(keys), bool)
+            new_run[1:] = (keys[1:] != keys[:-1]) | (phrase_doc[1:] != phrase_doc[:-1])
+            run = np.cumsum(new_run) - 1
+            repeated = np.bincount(run)[run] > 1
+            phrases = np.bincount(phrase_doc, minlength=count)
+            repeated_phrase_rate = np.where(
+                phrases > 0, np.bincount(phrase_doc, weights=repeated, minlength=count) / phrases, np.nan)
+
+    keyword_coverage, missing = _keyword_coverage(vocabulary, keywords, word_doc, word_ids, count)
+    return QualityBatch(words, sentences, reading_ease, grade_level, sentence_mean, sentence_p90, sentence_max,
+                        bullets, lines, bullet_density, repeated_phrase_rate, keyword_coverage, missing)
+
+
+def measure(texts: Sequence[str], keywords: Optional[Sequence[Optional[Sequence[str]]]] = None,
+            chunk_size: int = 10_000) -> QualityBatch:
+    """
+    Metrics for each of ``texts``; ``keywords[i]`` (e.g. the case study's
+    ``technologies_used``) is what text ``i`` is checked for. Texts are
+    processed ``chunk_size`` at a time to bound the per-token arrays.
+    """
+    if np is None:
+        raise RuntimeError('Quality metrics need NumPy (pip install numpy)')
+    keywords = keywords if keywords is not None else [None] * len(texts)
+    if len(keywords) != len(texts):
+        raise ValueError('keywords must have one entry per text')
+    vocabulary = Vocabulary()
+    chunks = [_measure_chunk(vocabulary, texts[start:start + chunk_size], keywords[start:start + chunk_size])
+              for start in range(0, len(texts), chunk_size)] or [_measure_chunk(vocabulary, [], [])]
+    if len(chunks) == 1:
+        return chunks[0]
+    merged = {name: np.concatenate([getattr(chunk, name) for chunk in chunks]) for name in FIELDS}
+    return QualityBatch(**merged, missing_keywords=list(chain.from_iterable(c.missing_keywords for c in chunks)))
+
+
+def measure_sections(case_studies) -> tuple:
+    """``(batch, [(case_study, section), ...])`` for every section of ``case_studies``, in order."""
+    pairs = [(case_study, section) for case_study in case_studies for section in case_study.sections]
+    batch = measure([section.content for _, section in pairs],
+                    [case_study.case_input.technologies_used if case_study.case_input else None
+                     for case_study, _ in pairs])
+    return batch, pairs
+
+
+def summarize(batch: QualityBatch, groups: Sequence[str]) -> List[dict]:
+    """Medians of each metric per distinct value of ``groups`` (e.g. section types), in first-seen order."""
+    groups = np.asarray(groups, dtype=object)
+    rows = []
+    for label in dict.fromkeys(groups.tolist()):
+        members = groups == label
+        row = {'group': label, 'sections': int(members.sum())}
+        for name in FIELDS:
+            values = getattr(batch, name)[members].astype(float)
+            values = values[~np.isnan(values)]
+            row[name] = round(float(np.median(values)), 3) if len(values) else None
+        rows.append(row)
+    return rows
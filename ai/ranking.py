@@ -0,0 +1,49 @@
+"""
+Cheap local ranking of alternative section texts.
+
+Candidates from one ``n=`` call are scored with heuristics only (no extra
+model calls): the structural rules in ``ai.validation`` (length, bullet and
+paragraph counts, closing call to action) plus banned marketing phrases.
+"""
+
+from typing import List
+
+from models.case_study import SectionCandidate
+from .validation import validate_section
+
+BANNED_PHRASES = [
+    "in today's fast-paced",
+    "in today's digital",
+    "game-changer",
+    "game changer",
+    "cutting-edge",
+    "seamless",
+    "delve",
+    "unlock the power",
+    "revolutionize",
+    "revolutionise",
+    "look no further",
+    "as an ai",
+    "[client",
+    "[insert",
+    "lorem ipsum",
+]
+
+
+def score_candidate(section_type: str, content: str) -> SectionCandidate:
+    """
+    Score one candidate; higher is better, with the reasons in ``notes``.
+
+    Structural problems (``ai.validation``: length, bullets, paragraphs,
+    closing CTA) and banned phrases each cost 15 points.
+    """
+    notes = list(validate_section(section_type, content).problems)
+    lowered = content.lower()
+    notes.extend(f"uses banned phrase {phrase!r}" for phrase in BANNED_PHRASES if phrase in lowered)
+    return SectionCandidate(content=content, score=100.0 - 15.0 * len(notes), notes=notes)
+
+
+def rank_candidates(section_type: str, contents: List[str]) -> List[SectionCandidate]:
+    """Scored candidates, best first (ties keep the model's order)."""
+    scored = [score_candidate(section_type, content) for content in contents]
+    return sorted(scored, key=lambda candidate: -candidate.score)
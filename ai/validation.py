@@ -0,0 +1,172 @@
+"""
+Structural checks for generated sections.
+
+The prompts ask for a particular shape (e.g. an intro paragraph, 3-4
+bullet points and a conclusion for the challenges). These rules check the
+output the way ``WordPressFormatter.parse_content_for_lists`` will read
+it, so a section that would render as paragraphs only is caught and
+regenerated instead of being published.
+
+With ``VALIDATION_QUALITY=on`` (and NumPy installed) sections are also
+held to readability, sentence length, repetition and keyword coverage
+bounds computed by ``ai.quality``.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import quality as quality_metrics
+
+# Lines the formatter turns into list items
+_BULLET = re.compile(r'^[•\-*]')
+CTA_PATTERN = re.compile(r'\b(contact|get in touch|call us|speak to|talk to|find out|book|enquire|reach out)\b', re.I)
+
+
+@dataclass(frozen=True)
+class SectionRules:
+    min_words: int = 0
+    max_words: Optional[int] = None
+    min_bullets: int = 0
+    max_bullets: Optional[int] = None
+    min_paragraphs: int = 1
+    max_paragraphs: Optional[int] = None
+    require_cta: bool = False
+    # Quality bounds (ai.quality), checked when enabled
+    min_reading_ease: Optional[float] = 20.0
+    max_sentence_words: Optional[int] = 35  # for the 90th percentile sentence
+    max_repeated_phrases: Optional[float] = 0.15
+    min_keyword_coverage: Optional[float] = None
+
+
+# Bounds follow the section prompts in ai.content_generator, with some slack either side
+SECTION_RULES: Dict[str, SectionRules] = {
+    'summary': SectionRules(min_words=80, max_words=450, min_paragraphs=2, max_paragraphs=6),
+    'client': SectionRules(min_words=60, max_words=350, min_paragraphs=2, max_paragraphs=5),
+    'challenges': SectionRules(min_words=80, max_words=450, min_bullets=3, max_bullets=6, min_paragraphs=2),
+    'solution': SectionRules(min_words=90, max_words=550, min_bullets=3, min_paragraphs=2, min_keyword_coverage=0.5),
+    'results': SectionRules(min_words=90, max_words=450, min_paragraphs=2, require_cta=True),
+}
+
+
+def quality_enabled() -> bool:
+    """Whether the validators apply the quality bounds (VALIDATION_QUALITY, default off)."""
+    return (os.getenv('VALIDATION_QUALITY', 'off').lower() in ('1', 'on', 'true', 'yes')
+            and quality_metrics.available())
+
+
+@dataclass
+class SectionStats:
+    words: int
+    bullets: int
+    paragraphs: int
+    last_paragraph: str = ''
+
+
+def section_stats(content: str) -> SectionStats:
+    """Counts as the WordPress formatter sees them: every other non-empty line is a paragraph."""
+    bullets = paragraphs = 0
+    last_paragraph = ''
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if _BULLET.match(line):
+            bullets += 1
+        else:
+            paragraphs += 1
+            last_paragraph = line
+    return SectionStats(len(content.split()), bullets, paragraphs, last_paragraph)
+
+
+@dataclass
+class ValidationResult:
+    section_type: str
+    problems: List[str] = field(default_factory=list)
+    quality: Optional[dict] = None  # ai.quality metrics, when they were checked
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+
+def quality_problems(metrics: dict, rules: SectionRules) -> List[str]:
+    """Problems with one section's ``ai.quality`` metrics, phrased like the structural ones."""
+    problems = []
+    ease = metrics['reading_ease']
+    if rules.min_reading_ease is not None and ease is not None and ease < rules.min_reading_ease:
+        problems.append(f"is hard to read (Flesch reading ease {ease:.0f}); use shorter sentences and "
+                        f"plainer words")
+    longest = metrics['sentence_p90']
+    if rules.max_sentence_words is not None and longest is not None and longest > rules.max_sentence_words:
+        problems.append(f"has sentences of up to {longest:.0f} words; keep sentences under "
+                        f"{rules.max_sentence_words} words")
+    repeated = metrics['repeated_phrase_rate']
+    if rules.max_repeated_phrases is not None and repeated is not None and repeated > rules.max_repeated_phrases:
+        problems.append(f"repeats itself ({repeated:.0%} of three-word phrases recur); vary the wording")
+    coverage = metrics['keyword_coverage']
+    if rules.min_keyword_coverage is not None and coverage is not None and coverage < rules.min_keyword_coverage:
+        problems.append(f"does not mention {', '.join(metrics['missing_keywords'])}; name the technologies used")
+    return problems
+
+
+def validate_sections(sections: Sequence[Tuple[str, str, Optional[Sequence[str]]]],
+                      check_quality: Optional[bool] = None) -> List[ValidationResult]:
+    """
+    ``validate_section`` for many ``(section_type, content, keywords)`` at
+    once, with the quality metrics for all of them computed in one batch.
+    ``check_quality`` defaults to ``quality_enabled()``.
+    """
+    if check_quality is None:
+        check_quality = quality_enabled()
+    rows = [None] * len(sections)
+    if check_quality and sections:
+        rows = quality_metrics.measure([content for _, content, _ in sections],
+                                       [keywords for _, _, keywords in sections]).rows()
+    return [validate_section(section_type, content, quality=row)
+            for (section_type, content, _), row in zip(sections, rows)]
+
+
+def validate_section(section_type: str, content: str, rules: SectionRules = None,
+                     keywords: Optional[Sequence[str]] = None, quality: Optional[dict] = None) -> ValidationResult:
+    """
+    Check one section's text against its rules; problems are phrased as
+    instructions for a retry. ``quality`` is the section's ``ai.quality``
+    row when already measured; otherwise it is measured here if enabled.
+    """
+    rules = rules or SECTION_RULES.get(section_type, SectionRules())
+    if quality is None and quality_enabled():
+        quality = quality_metrics.measure([content], [keywords]).row(0)
+    stats = section_stats(content)
+    result = ValidationResult(section_type)
+    problems = result.problems
+
+    if stats.words < rules.min_words:
+        problems.append(f"is too short ({stats.words} words); write at least {rules.min_words} words")
+    if rules.max_words is not None and stats.words > rules.max_words:
+        problems.append(f"is too long ({stats.words} words); keep it under {rules.max_words} words")
+    if stats.bullets < rules.min_bullets:
+        problems.append(f"has {stats.bullets} bullet points; include at least {rules.min_bullets}, "
+                        f"each on its own line starting with '• '")
+    if rules.max_bullets is not None and stats.bullets > rules.max_bullets:
+        problems.append(f"has {stats.bullets} bullet points; use at most {rules.max_bullets}")
+    if stats.paragraphs < rules.min_paragraphs:
+        problems.append(f"has {stats.paragraphs} paragraphs; write at least {rules.min_paragraphs}, "
+                        f"separated by blank lines")
+    if rules.max_paragraphs is not None and stats.paragraphs > rules.max_paragraphs:
+        problems.append(f"has {stats.paragraphs} paragraphs; use at most {rules.max_paragraphs}")
+    if rules.require_cta and not CTA_PATTERN.search(stats.last_paragraph):
+        problems.append("does not end with a call-to-action paragraph inviting readers to get in touch")
+    if quality is not None:
+        result.quality = quality
+        problems.extend(quality_problems(quality, rules))
+    return result
+
+
+def quality_report(case_study) -> List[dict]:
+    """Each section's ``ai.quality`` metrics with the structural and quality problems found in it."""
+    batch, pairs = quality_metrics.measure_sections([case_study])
+    return [dict(section_type=section.section_type, title=section.title, **row,
+                 problems=validate_section(section.section_type, section.content, quality=row).problems)
+            for row, (_, section) in zip(batch.rows(), pairs)]
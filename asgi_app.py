@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Case Study Generator ASGI Interface
+
+An async (Starlette) frontend serving the same routes as ``web_app.py``:
+``/``, ``/api/generate``, ``/preview`` and ``/health``. Section calls go
+through the async OpenAI client and are awaited concurrently, so a single
+process can hold hundreds of in-flight generations without a thread each.
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port 8000
+"""
+
+import asyncio
+import os
+import secrets
+from datetime import datetime
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, RedirectResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.templating import Jinja2Templates
+
+# Load environment variables (only if dotenv is available and .env file exists)
+if os.path.exists('.env'):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        # dotenv not available, which is fine for production
+        pass
+
+from models import CaseStudyInput, CaseStudy
+from ai import AsyncAIContentGenerator, AsyncOfflineContentGenerator
+from ai.cassette import replaying
+from ai import quality
+from ai.images import create_image_backend
+from media import ImageProcessor
+from ai.pipeline import (CASE_STUDY_SECTIONS, RetryBudget, assemble_case_study, candidate_index,
+                         generate_feature_image, generate_section_async, remember_sections, requested_candidates,
+                         select_candidate)
+from forms import AsyncCaseStudyForm, AsyncSelectCandidateForm
+from ai.validation import quality_report
+from runtime.breaker import CircuitOpen
+from runtime.deadline import DISCONNECTED, EXPIRED, Deadline, DeadlineExceeded
+from runtime.timing import TimingMiddleware, phase
+from runtime import usage
+from storage import CaseStudyStore
+from storage.search import page_bounds
+from export.wxr import POST_STATUSES, stream_wxr
+
+SECRET_KEY = os.getenv('SECRET_KEY', secrets.token_hex(16))
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+
+def flash(request, message: str, category: str = 'message') -> None:
+    """Queue a message for the next rendered page (Flask-compatible)."""
+    request.session.setdefault('_flashes', []).append([category, message])
+
+
+def _template_context(request) -> dict:
+    def get_flashed_messages(with_categories=False):
+        flashes = request.session.pop('_flashes', [])
+        return [tuple(item) for item in flashes] if with_categories else [item[1] for item in flashes]
+    return {'get_flashed_messages': get_flashed_messages}
+
+
+store = CaseStudyStore()
+templates = Jinja2Templates(directory=TEMPLATE_DIR, context_processors=[_template_context])
+
+_generator = None
+
+# How often a generating request checks whether its client has gone
+DISCONNECT_POLL_SECONDS = float(os.getenv('DISCONNECT_POLL_SECONDS', '0.25'))
+
+
+def get_content_generator():
+    """Process-wide async generator so every request shares one connection pool."""
+    global _generator
+    if _generator is None:
+        if os.getenv('LLM_BACKEND', 'openai').lower() == 'offline':
+            _generator = AsyncOfflineContentGenerator()
+        else:
+            _generator = AsyncAIContentGenerator()
+    return _generator
+
+
+image_backend = create_image_backend()
+image_processor = ImageProcessor.from_env() if image_backend is not None else None
+
+
+async def generate_case_study(generator, case_input: CaseStudyInput, candidates: int = 1) -> CaseStudy:
+    """Generate a complete case study, requesting all sections (and the feature image) concurrently."""
+
+    budget = RetryBudget()
+
+    async def generate_section(section_type: str):
+        # Validated as soon as it arrives; a retry overlaps the sections still in flight
+        return section_type, await generate_section_async(generator, section_type, case_input, budget, candidates)
+
+    image_task = None
+    if image_backend is not None:
+        # Image backends are blocking; a worker thread keeps the event loop free
+        image_task = asyncio.ensure_future(asyncio.to_thread(generate_feature_image, image_backend, case_input, image_processor))
+    # The id is assigned up front so the usage ledger can attribute every call to it
+    case_study_id = secrets.token_hex(8)
+    try:
+        with usage.scope(case_study=case_study_id):
+            contents = dict(await asyncio.gather(*(
+                generate_section(section_type) for _, section_type, _ in CASE_STUDY_SECTIONS
+            )))
+    except BaseException:
+        if image_task is not None:
+            image_task.cancel()
+        raise
+    case_study = assemble_case_study(case_input, contents)
+    case_study.id = case_study_id
+    with phase('cache.write'):
+        await asyncio.to_thread(remember_sections, case_input, case_study)
+    if image_task is not None:
+        case_study.feature_image = await image_task
+    return case_study
+
+
+async def _wait_for_disconnect(request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
+async def until_deadline(request, coro):
+    """
+    Await ``coro`` under the request deadline (REQUEST_DEADLINE, shortened
+    by ``X-Request-Timeout``), cancelling it with DeadlineExceeded when the
+    deadline passes or the client disconnects first.
+    """
+    deadline = Deadline.from_request(request.headers.get('x-request-timeout'))
+    with deadline.bind():
+        # The task copies the context here, so every section call sees the deadline
+        task = asyncio.ensure_future(coro)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait({task, watcher}, timeout=deadline.remaining(), return_when=asyncio.FIRST_COMPLETED)
+    except BaseException:
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
+    if not task.done():
+        deadline.cancel(DISCONNECTED if watcher.done() and not watcher.cancelled() else EXPIRED)
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+        raise DeadlineExceeded(deadline.reason)
+    return task.result()
+
+
+async def index(request):
+    """Main page with the case study form."""
+    formdata = await request.form() if request.method == 'POST' else None
+    form = AsyncCaseStudyForm(formdata, session=request.session, csrf_secret=SECRET_KEY)
+
+    if request.method == 'POST' and form.validate():
+        try:
+            api_key = os.getenv('OPENAI_API_KEY')
+            offline = os.getenv('LLM_BACKEND', 'openai').lower() == 'offline' or replaying()
+            if not offline and (not api_key or api_key == 'your_openai_api_key_here'):
+                flash(request, 'Please configure your OpenAI API key in the .env file', 'error')
+                return templates.TemplateResponse(request, 'index.html', {'form': form})
+
+            case_input = CaseStudyInput.from_payload(form.data)
+            case_study = await until_deadline(request, generate_case_study(
+                get_content_generator(), case_input, requested_candidates(form.candidates.data)))
+
+            with phase('store.write'):
+                case_study_id = await asyncio.to_thread(store.save, case_study)
+            request.session['current_case_study_id'] = case_study_id
+
+            with phase('render'):
+                return templates.TemplateResponse(request, 'result.html', {
+                    'case_study': case_study,
+                    'client_name': case_input.client_name,
+                    'case_study_id': case_study_id,
+                    'candidate_form': candidate_form(request),
+                })
+
+        except CircuitOpen as e:
+            flash(request, f'The AI service is unavailable right now. Please try again in {e.retry_after} seconds.',
+                  'warning')
+            return templates.TemplateResponse(request, 'index.html', {'form': form}, status_code=503,
+                                              headers={'Retry-After': str(e.retry_after)})
+        except DeadlineExceeded:
+            flash(request, 'Generating the case study took too long. Please try again.', 'warning')
+            return templates.TemplateResponse(request, 'index.html', {'form': form}, status_code=504)
+        except Exception as e:
+            flash(request, f'Error generating case study: {str(e)}', 'error')
+
+    return templates.TemplateResponse(request, 'index.html', {'form': form})
+
+
+async def api_generate(request):
+    """API endpoint for generating case studies."""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+
+    try:
+        case_input = CaseStudyInput.from_payload(data)
+        candidates = requested_candidates(data.get('candidates'))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    try:
+        case_study = await until_deadline(request, generate_case_study(get_content_generator(), case_input,
+                                                                       candidates))
+    except CircuitOpen as e:
+        return JSONResponse({'error': str(e), 'retry_after': e.retry_after}, status_code=503,
+                            headers={'Retry-After': str(e.retry_after)})
+    except DeadlineExceeded as e:
+        return JSONResponse({'error': str(e)}, status_code=504)
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+    # Stored so the returned id resolves (preview, search, quality, publish) and a paid image is kept
+    with phase('store.write'):
+        await asyncio.to_thread(store.save, case_study)
+
+    include_sections = request.query_params.get('include_sections', 'true').lower() not in ('0', 'false', 'no')
+    return Response(case_study.to_payload_json(include_sections), media_type='application/json')
+
+
+async def website_preview_direct(request):
+    """Direct website preview of the case study stored for this session."""
+    case_study_id = request.session.get('current_case_study_id')
+
+    if not case_study_id:
+        flash(request, 'Please generate a case study first to see the website preview.', 'info')
+        return RedirectResponse(request.url_for('index'), status_code=302)
+
+    try:
+        with phase('store.read'):
+            case_study = await asyncio.to_thread(store.load, case_study_id)
+    except FileNotFoundError:
+        flash(request, 'Case study data not found. Please generate a new case study.', 'warning')
+        return RedirectResponse(request.url_for('index'), status_code=302)
+
+    if not case_study.client_name:
+        case_study.client_name = 'Client Name'
+    with phase('render'):
+        return templates.TemplateResponse(request, 'uctel_website_preview.html', {
+            'case_study': case_study,
+            'current_date': datetime.now().strftime("%B %d, %Y"),
+        })
+
+
+async def case_study_result(request):
+    """Result page for a stored case study (where candidate switches return to)."""
+    try:
+        with phase('store.read'):
+            case_study = await asyncio.to_thread(store.load, request.path_params['case_study_id'])
+    except (FileNotFoundError, ValueError):
+        flash(request, 'Case study data not found. Please generate a new case study.', 'warning')
+        return RedirectResponse(request.url_for('index'), status_code=302)
+
+    request.session['current_case_study_id'] = case_study.id
+    with phase('render'):
+        return templates.TemplateResponse(request, 'result.html', {
+            'case_study': case_study,
+            'client_name': case_study.client_name or 'Client Name',
+            'case_study_id': case_study.id,
+            'candidate_form': candidate_form(request),
+        })
+
+
+def candidate_form(request, formdata=None) -> AsyncSelectCandidateForm:
+    """CSRF token for the result page's draft switches."""
+    return AsyncSelectCandidateForm(formdata, session=request.session, csrf_secret=SECRET_KEY)
+
+
+async def select_stored_candidate(case_study_id: str, section_type: str, index) -> CaseStudy:
+    """Switch one section's candidate in the store; raises LookupError/ValueError."""
+    index = candidate_index(index)
+    with phase('store.write'):
+        return await asyncio.to_thread(
+            store.update, case_study_id, lambda case_study: select_candidate(case_study, section_type, index))
+
+
+async def select_section_candidate(request):
+    """Switch a section to another stored candidate from the result page."""
+    case_study_id = request.path_params['case_study_id']
+    section_type = request.path_params['section_type']
+    formdata = await request.form()
+    if not candidate_form(request, formdata).validate():
+        return PlainTextResponse('The form has expired or did not come from this site. '
+                                 'Reload the page and try again.', status_code=400)
+    try:
+        await select_stored_candidate(case_study_id, section_type, formdata.get('index'))
+    except FileNotFoundError:
+        flash(request, 'Case study data not found. Please generate a new case study.', 'warning')
+        return RedirectResponse(request.url_for('index'), status_code=302)
+    except (LookupError, ValueError) as e:
+        flash(request, f'Could not switch candidate: {e}', 'error')
+    url = request.url_for('case_study_result', case_study_id=case_study_id)
+    return RedirectResponse(f'{url}#section-{section_type}', status_code=303)
+
+
+async def api_select_section_candidate(request):
+    """Switch a section to another stored candidate: ``{"index": 1}``."""
+    # Only JSON bodies, as Flask's get_json: a cross-site form can't send them without CORS approval
+    data = {}
+    if request.headers.get('content-type', '').split(';')[0].strip() == 'application/json':
+        try:
+            data = await request.json()
+        except ValueError:
+            pass
+    section_type = request.path_params['section_type']
+    try:
+        case_study = await select_stored_candidate(request.path_params['case_study_id'], section_type,
+                                                   data.get('index') if isinstance(data, dict) else None)
+    except FileNotFoundError:
+        return JSONResponse({'error': 'Case study not found'}, status_code=404)
+    except KeyError:
+        return JSONResponse({'error': f'Unknown section: {section_type}'}, status_code=404)
+    except (IndexError, ValueError) as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    include_sections = request.query_params.get('include_sections', 'true').lower() not in ('0', 'false', 'no')
+    return Response(case_study.to_payload_json(include_sections), media_type='application/json')
+
+
+async def case_study_image(request):
+    """A stored case study's feature image or one of its processed variants."""
+    filename = request.path_params['filename']
+    data = None
+    try:
+        with phase('store.read'):
+            image = (await asyncio.to_thread(store.load, request.path_params['case_study_id'])).feature_image
+            if image is not None and filename != image.filename:
+                image = image.variant(filename)
+            if image is not None:
+                data = await asyncio.to_thread(image.read)
+    except (FileNotFoundError, ValueError):
+        pass
+    if data is None:
+        return JSONResponse({'error': 'Image not found'}, status_code=404)
+    return Response(data, media_type=image.mime_type, headers={'Cache-Control': 'public, max-age=3600'})
+
+
+async def api_search(request):
+    """Full-text search over stored case studies: ``?q=CEL-FI QUATRA&limit=20&offset=0``."""
+    index = store.search_index
+    if index is None:
+        return JSONResponse({'error': 'Search is disabled'}, status_code=503)
+    query = request.query_params.get('q', '')
+    try:
+        limit, offset = page_bounds(request.query_params.get('limit'), request.query_params.get('offset'))
+        with phase('search'):
+            hits = await asyncio.to_thread(index.search, query, limit, offset)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    return JSONResponse({'query': query, 'offset': offset, 'results': [hit.as_dict() for hit in hits]})
+
+
+async def api_case_study_quality(request):
+    """Readability, sentence length, bullet density, repetition and keyword coverage of each section."""
+    if not quality.available():
+        return JSONResponse({'error': 'Quality metrics need NumPy'}, status_code=503)
+    try:
+        with phase('store.read'):
+            case_study = await asyncio.to_thread(store.load, request.path_params['case_study_id'])
+    except (FileNotFoundError, ValueError):
+        return JSONResponse({'error': 'Case study not found'}, status_code=404)
+    with phase('quality'):
+        sections = await asyncio.to_thread(quality_report, case_study)
+    return JSONResponse({'id': case_study.id, 'sections': sections})
+
+
+async def api_export_wxr(request):
+    """The whole archive as a WordPress import (WXR) file, streamed; ``?gzip=1`` compresses it."""
+    # Checked before streaming starts: an error mid-stream can't change the response status
+    status = request.query_params.get('status', 'draft')
+    if status not in POST_STATUSES:
+        return JSONResponse({'error': f"status must be one of {', '.join(POST_STATUSES)}"}, status_code=400)
+    compress = request.query_params.get('gzip', '').lower() in ('1', 'true', 'yes')
+    filename = 'case_studies.xml.gz' if compress else 'case_studies.xml'
+    # A plain iterator: Starlette pulls it in a worker thread, keeping store reads off the event loop
+    chunks = stream_wxr(store, compress, status=status,
+                        post_type=os.getenv('WORDPRESS_POST_TYPE', 'case'),
+                        category_taxonomy=os.getenv('WORDPRESS_CATEGORY_TAXONOMY', 'case_category'))
+    return StreamingResponse(chunks, media_type='application/gzip' if compress else 'application/rss+xml',
+                             headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
+async def health(request):
+    """Health check endpoint."""
+    return JSONResponse({'status': 'healthy', 'message': 'Case Study Generator is running'})
+
+
+app = Starlette(
+    routes=[
+        Route('/', index, methods=['GET', 'POST'], name='index'),
+        Route('/api/generate', api_generate, methods=['POST'], name='api_generate'),
+        Route('/preview', website_preview_direct, name='website_preview_direct'),
+        Route('/case-studies/{case_study_id}', case_study_result, name='case_study_result'),
+        Route('/case-studies/{case_study_id}/sections/{section_type}/candidate', select_section_candidate,
+              methods=['POST'], name='select_section_candidate'),
+        Route('/api/case-studies/{case_study_id}/sections/{section_type}/candidate', api_select_section_candidate,
+              methods=['POST'], name='api_select_section_candidate'),
+        Route('/case-studies/{case_study_id}/images/{filename}', case_study_image, name='case_study_image'),
+        Route('/api/case-studies/{case_study_id}/quality', api_case_study_quality, name='api_case_study_quality'),
+        Route('/api/search', api_search, name='api_search'),
+        Route('/api/export/wxr', api_export_wxr, name='api_export_wxr'),
+        Route('/health', health, name='health'),
+    ],
+    middleware=[
+        Middleware(TimingMiddleware),
+        Middleware(GZipMiddleware, minimum_size=int(os.getenv('COMPRESS_MIN_SIZE', '1024'))),
+        Middleware(SessionMiddleware, secret_key=SECRET_KEY),
+    ],
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=int(os.getenv('PORT', '8000')))
@@ -0,0 +1 @@
+"""Reproducible benchmarks and load tests for the case study generator."""
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Cold-start import benchmark for the serverless entry points.
+
+Runs each entry point in a fresh interpreter with ``-X importtime``, serves a
+``/health`` probe, and reports the slowest imports. Fails (exit status 1)
+when the median import time exceeds the budget or when a module that should
+be loaded lazily was pulled in just to answer ``/health``.
+
+    python -m benchmarks.cold_start --runs 5 --budget-ms 300
+"""
+
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = ['web_app', 'index', 'app']
+
+# Modules that must not be imported to answer a health probe.
+LAZY_MODULES = ['openai', 'pydantic', 'flask_wtf', 'wtforms', 'dotenv', 'models', 'ai', 'templates']
+
+PROBE = """
+import json, sys
+import {module} as entry
+app = getattr(entry, 'application', None) or entry.app
+app.test_client().get('/health')
+print(json.dumps([m for m in {lazy!r} if m in sys.modules]))
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_probe(module: str) -> Tuple[Dict[str, Tuple[int, int]], List[str]]:
+    """Import ``module`` in a fresh interpreter; return per-module (self, cumulative) µs and eager modules."""
+    env = dict(os.environ)
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(module=module, lazy=LAZY_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            timings[name] = (int(self_us), int(cumulative_us))
+    return timings, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@click.command()
+@click.option('--runs', default=5, help='Fresh interpreters per entry point')
+@click.option('--budget-ms', default=float(os.getenv('COLD_START_BUDGET_MS', '300')),
+              help='Maximum median import time per entry point (env COLD_START_BUDGET_MS)')
+@click.option('--top', default=15, help='How many of the slowest imports to list')
+@click.option('--output', '-o', help='Write the report as JSON to this path')
+def main(runs, budget_ms, top, output):
+    """Report import-time cost of the serverless entry points and enforce a budget."""
+    report = {'budget_ms': budget_ms, 'entry_points': {}}
+    failed = False
+
+    for module in ENTRY_POINTS:
+        totals = []
+        per_module: Dict[str, List[int]] = {}
+        eager = []
+        for _ in range(runs):
+            timings, eager = run_probe(module)
+            totals.append(timings[module][1] / 1000)
+            for name, (_, cumulative) in timings.items():
+                per_module.setdefault(name, []).append(cumulative)
+
+        median_ms = statistics.median(totals)
+        slowest = sorted(((statistics.median(v) / 1000, name) for name, v in per_module.items()
+                          if name != module), reverse=True)[:top]
+        over_budget = median_ms > budget_ms
+        failed = failed or over_budget or bool(eager)
+
+        status = '❌' if over_budget or eager else '✅'
+        click.echo(f"{status} {module}: median {median_ms:.1f} ms over {runs} runs (budget {budget_ms:.0f} ms)")
+        for ms, name in slowest:
+            click.echo(f"     {ms:8.1f} ms  {name}")
+        if eager:
+            click.echo(f"   eagerly imported for /health: {', '.join(eager)}")
+
+        report['entry_points'][module] = {
+            'median_ms': round(median_ms, 2),
+            'runs_ms': [round(t, 2) for t in totals],
+            'slowest': [{'module': name, 'cumulative_ms': round(ms, 2)} for ms, name in slowest],
+            'eager_lazy_modules': eager,
+            'within_budget': not over_budget,
+        }
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Archive analytics: JSON + pydantic versus a memory-mapped Arrow file.
+
+Computes the same report (sections, mean and p95 length per section type,
+and the longest case study) two ways over COUNT synthetic case studies:
+loading the stored JSON files into a list of ``CaseStudy`` objects, and scanning
+two columns of the ``storage.columnar`` Arrow file with pyarrow.compute.
+Each runs in a fresh process, reporting wall time and how much that
+process's peak RSS grew.
+
+    python -m benchmarks.columnar --count 20000
+"""
+
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_archive  # noqa: E402
+from storage import CaseStudyStore  # noqa: E402
+from storage.columnar import open_columnar, write_columnar  # noqa: E402
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux (bytes on macOS)
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6
+
+
+def json_report(store: CaseStudyStore) -> dict:
+    # Loaded up front, as analysis scripts do to look at the data more than once
+    case_studies = list(store)
+    lengths = defaultdict(list)
+    totals = {}
+    for case_study in case_studies:
+        for section in case_study.sections:
+            lengths[section.section_type].append(len(section.content))
+        totals[case_study.id] = sum(len(section.content) for section in case_study.sections)
+    report = {}
+    for section_type, values in lengths.items():
+        values.sort()
+        report[section_type] = (len(values), sum(values) / len(values), values[int(len(values) * 0.95)])
+    return {'sections': report, 'longest': max(totals, key=totals.get)}
+
+
+def arrow_report(path: str) -> dict:
+    import pyarrow.compute as pc
+    table = open_columnar(path, ['case_study_id', 'section_type', 'content_chars'])
+    grouped = table.group_by('section_type').aggregate([
+        ('content_chars', 'count'), ('content_chars', 'mean'),
+        ('content_chars', 'tdigest', pc.TDigestOptions(q=0.95)),
+    ])
+    report = {row['section_type']: (row['content_chars_count'], row['content_chars_mean'],
+                                    row['content_chars_tdigest'][0])
+              for row in grouped.to_pylist()}
+    totals = table.group_by('case_study_id').aggregate([('content_chars', 'sum')])
+    longest = totals['case_study_id'][pc.index(totals['content_chars_sum'],
+                                               pc.max(totals['content_chars_sum'])).as_py()].as_py()
+    return {'sections': report, 'longest': longest}
+
+
+def measure(name: str, workdir: str) -> tuple:
+    """Runs in a fresh process: (report, seconds, peak RSS growth in MB)."""
+    import pyarrow.compute  # noqa: F401  imported up front: the import isn't part of either report
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    if name == 'arrow':
+        report = arrow_report(os.path.join(workdir, 'archive.arrow'))
+    else:
+        report = json_report(CaseStudyStore(workdir))
+    return report, time.perf_counter() - started, peak_rss_mb() - rss_before
+
+
+@click.command()
+@click.option('--count', '-n', default=20000, help='Number of synthetic case studies')
+def main(count):
+    """Build an archive of COUNT case studies and time the same report both ways."""
+    with tempfile.TemporaryDirectory(prefix='columnar_bench_') as workdir:
+        os.environ['SEARCH_INDEX'] = 'off'
+        store = CaseStudyStore(workdir)
+        click.echo(f"Storing {count} synthetic case studies...")
+        for case_study in synthetic_archive(count):
+            store.save(case_study)
+        json_mb = sum(entry.stat().st_size for entry in os.scandir(workdir)) / 1e6
+
+        path = os.path.join(workdir, 'archive.arrow')
+        started = time.perf_counter()
+        export = write_columnar(store, path)
+        click.echo(f"Export: {time.perf_counter() - started:.1f}s, {export.rows} rows, "
+                   f"{export.bytes_written / 1e6:.0f} MB Arrow (JSON files: {json_mb:.0f} MB)")
+        parquet = write_columnar(store, os.path.join(workdir, 'archive.parquet'))
+        click.echo(f"Parquet (zstd): {parquet.bytes_written / 1e6:.0f} MB\n")
+
+        results = {}
+        for name, label in (('arrow', 'memory-mapped Arrow'), ('json', 'JSON → CaseStudy')):
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                results[name], elapsed, rss = executor.submit(measure, name, workdir).result()
+            click.echo(f"{label:<22} {elapsed:>7.2f}s  peak RSS +{rss:.1f} MB")
+
+        arrow, loaded = results['arrow'], results['json']
+        assert arrow['longest'] == loaded['longest']
+        for section_type, (rows, mean, _) in loaded['sections'].items():
+            assert arrow['sections'][section_type][0] == rows
+            assert abs(arrow['sections'][section_type][1] - mean) < 1e-6
+
+
+if __name__ == '__main__':
+    main()
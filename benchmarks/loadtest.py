@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Load test for the Flask web app.
+
+Starts ``web_app:app`` under gunicorn (or the Flask dev server when gunicorn
+is not installed) with the offline LLM stand-in, then drives ``/api/generate``,
+``/preview`` and ``/health`` at each requested concurrency level and records
+throughput, latency percentiles and error rates.
+
+    python -m benchmarks.loadtest --concurrency 1,8,32 --duration 30 \
+        --output loadtest-results.json --baseline previous-release.json
+"""
+
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from runtime.stats import summarize  # noqa: E402
+
+SAMPLE_INPUT = {
+    'client_name': 'Northeastern University London',
+    'industry': 'Higher Education',
+    'main_challenge': 'Poor mobile connectivity in dense urban campus environment',
+    'solution_provided': 'CEL-FI QUATRA 1000 mobile signal boosters for all major UK networks',
+    'location': 'St. Katharine Docks, London',
+    'project_scale': '2.5 floors, 1300 students',
+    'technologies_used': 'CEL-FI QUATRA 1000, CAT-6 cabling, MIMO antennae',
+}
+
+
+class Client:
+    """Keep-alive HTTP client holding one session cookie."""
+
+    def __init__(self, base_url: str, timeout: float):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.cookie: Optional[str] = None
+        self.conn = self._connect()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method: str, path: str, body: bytes = None, headers: Dict[str, str] = None):
+        headers = dict(headers or {})
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            self.conn.close()
+            self.conn = self._connect()
+            raise
+        set_cookie = response.getheader('Set-Cookie')
+        if set_cookie:
+            self.cookie = set_cookie.split(';', 1)[0]
+        return response.status, data
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def prime_preview(client: Client) -> None:
+    """Generate one case study through the form so the session has a preview."""
+    status, page = client.request('GET', '/')
+    match = re.search(rb'name="csrf_token" type="hidden" value="([^"]+)"', page)
+    if status != 200 or not match:
+        raise RuntimeError(f"could not load form (status {status})")
+    form = dict(SAMPLE_INPUT, csrf_token=match.group(1).decode())
+    status, _ = client.request(
+        'POST', '/', body=urlencode(form).encode(),
+        headers={'Content-Type': 'application/x-www-form-urlencoded'},
+    )
+    if status != 200:
+        raise RuntimeError(f"form submission failed (status {status})")
+
+
+ENDPOINTS = {
+    'generate': lambda c: c.request('POST', '/api/generate', body=json.dumps(SAMPLE_INPUT).encode(),
+                                    headers={'Content-Type': 'application/json'}),
+    'preview': lambda c: c.request('GET', '/preview'),
+    'health': lambda c: c.request('GET', '/health'),
+}
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise click.BadParameter(f"unknown endpoint '{name}'", param_hint='--mix')
+        weights[name] = int(weight or 1)
+    return weights
+
+
+def run_level(base_url: str, concurrency: int, duration: float, mix: Dict[str, int], timeout: float) -> dict:
+    """Drive the server with ``concurrency`` closed-loop clients for ``duration`` seconds."""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, Dict[str, int]] = {name: {} for name in names}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        client = Client(base_url, timeout)
+        # The session needs a generated case study before /preview works; priming
+        # can fail under load (e.g. a 503 from admission) and is retried on the next pick
+        primed = 'preview' not in mix
+        try:
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                try:
+                    if not primed and name == 'preview':
+                        prime_preview(client)
+                        primed = True
+                    start = time.perf_counter()
+                    status, _ = ENDPOINTS[name](client)
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    error = None if status < 400 else str(status)
+                except RuntimeError as e:
+                    error = f'prime: {e}'
+                except (http.client.HTTPException, OSError) as e:
+                    error = type(e).__name__
+                with lock:
+                    if error:
+                        errors[name][error] = errors[name].get(error, 0) + 1
+                    else:
+                        samples[name].append(elapsed_ms)
+        finally:
+            client.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    endpoints = {}
+    for name in names:
+        error_count = sum(errors[name].values())
+        total = len(samples[name]) + error_count
+        endpoints[name] = {
+            'requests': total,
+            'throughput_rps': round(len(samples[name]) / wall, 2),
+            'error_rate': round(error_count / total, 4) if total else 0.0,
+            'errors': errors[name],
+            'latency_ms': summarize(samples[name]),
+        }
+    completed = sum(len(v) for v in samples.values())
+    return {
+        'concurrency': concurrency,
+        'duration_s': round(wall, 2),
+        'throughput_rps': round(completed / wall, 2),
+        'endpoints': endpoints,
+    }
+
+
+def start_server(port: int, workers: int, threads: int, latency_ms: float, jitter: float,
+                 cassette: Optional[str] = None) -> subprocess.Popen:
+    env = dict(os.environ,
+               LLM_BACKEND='offline',
+               OFFLINE_LLM_LATENCY_MS=str(latency_ms),
+               OFFLINE_LLM_JITTER=str(jitter),
+               # Simulated and replayed calls are not spend; keep them out of the real ledger
+               USAGE_LEDGER='off',
+               # Every worker must sign sessions and CSRF tokens with the same key.
+               SECRET_KEY=os.getenv('SECRET_KEY', 'loadtest-secret'))
+    if cassette:
+        # Real recorded responses (see ai.cassette) with their recorded latency
+        env.update(LLM_BACKEND='openai', LLM_CASSETTE=os.path.abspath(cassette), LLM_CASSETTE_MODE='replay',
+                   LLM_CASSETTE_LATENCY='recorded')
+    if shutil.which('gunicorn'):
+        cmd = ['gunicorn', '--workers', str(workers), '--threads', str(threads),
+               '--bind', f'127.0.0.1:{port}', '--timeout', '300', '--log-level', 'warning', 'web_app:app']
+    else:
+        click.echo("⚠️  gunicorn not found, falling back to the threaded Flask dev server", err=True)
+        cmd = [sys.executable, '-m', 'flask', '--app', 'web_app', 'run', '--with-threads', '--port', str(port)]
+    # A file, not a pipe: nobody reads the pipe while the run is going, and the
+    # dev server logs every request, so it would block once the buffer filled
+    log = tempfile.NamedTemporaryFile(prefix='loadtest_server_', suffix='.log', delete=False)
+    with log:
+        process = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=log)
+    process.command = ' '.join(cmd)
+    click.echo(f"   server log: {log.name}", err=True)
+    return process
+
+
+def wait_until_healthy(base_url: str, timeout: float = 30) -> None:
+    give_up = time.perf_counter() + timeout
+    while time.perf_counter() < give_up:
+        try:
+            client = Client(base_url, timeout=2)
+            status, _ = client.request('GET', '/health')
+            client.close()
+            if status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise click.ClickException(f"server at {base_url} did not become healthy")
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict) -> None:
+    """Print throughput and p95 deltas against a previous results file."""
+    previous = {run['concurrency']: run for run in baseline.get('runs', [])}
+    click.echo(f"\nCompared with {baseline['meta'].get('label') or baseline['meta'].get('git_revision')}:")
+    for run in results['runs']:
+        old = previous.get(run['concurrency'])
+        if not old:
+            continue
+        for name, stats in run['endpoints'].items():
+            old_stats = old['endpoints'].get(name)
+            if not old_stats:
+                continue
+            rps_delta = stats['throughput_rps'] - old_stats['throughput_rps']
+            p95_delta = stats['latency_ms']['p95'] - old_stats['latency_ms']['p95']
+            click.echo(f"  c={run['concurrency']:<4} {name:<9} rps {rps_delta:+8.2f}   p95 {p95_delta:+9.1f} ms")
+
+
+@click.command()
+@click.option('--url', help='Target an already running server instead of starting one')
+@click.option('--concurrency', '-c', default='1,4,16', help='Comma-separated concurrency levels')
+@click.option('--duration', '-d', default=20.0, help='Seconds per concurrency level')
+@click.option('--mix', default='generate=1,preview=4,health=1', help='Weighted endpoint mix')
+@click.option('--latency-ms', default=1500.0, help='Median offline LLM latency per section call')
+@click.option('--jitter', default=0.3, help='Log-normal sigma of the offline LLM latency')
+@click.option('--cassette', type=click.Path(exists=True),
+              help='Replay this LLM cassette (recorded for SAMPLE_INPUT) instead of the offline stand-in')
+@click.option('--workers', default=2, help='gunicorn worker processes')
+@click.option('--threads', default=8, help='gunicorn threads per worker')
+@click.option('--port', default=5055, help='Port for the spawned server')
+@click.option('--timeout', default=120.0, help='Client request timeout in seconds')
+@click.option('--label', help='Label stored with the results (e.g. release tag)')
+@click.option('--output', '-o', help='Write results as JSON to this path')
+@click.option('--baseline', type=click.Path(exists=True), help='Previous results JSON to compare against')
+def main(url, concurrency, duration, mix, latency_ms, jitter, cassette, workers, threads, port, timeout,
+         label, output, baseline):
+    """Load test /api/generate, /preview and /health."""
+    weights = parse_mix(mix)
+    levels = [int(level) for level in concurrency.split(',')]
+
+    server = None
+    if not url:
+        url = f'http://127.0.0.1:{port}'
+        server = start_server(port, workers, threads, latency_ms, jitter, cassette)
+    try:
+        wait_until_healthy(url)
+        runs = []
+        for level in levels:
+            click.echo(f"🚀 concurrency={level} for {duration:.0f}s ...")
+            run = run_level(url, level, duration, weights, timeout)
+            runs.append(run)
+            for name, stats in run['endpoints'].items():
+                lat = stats['latency_ms']
+                click.echo(f"   {name:<9} {stats['throughput_rps']:8.2f} rps  "
+                           f"p50 {lat['p50']:8.1f}  p95 {lat['p95']:8.1f}  p99 {lat['p99']:8.1f} ms  "
+                           f"errors {stats['error_rate']:.2%}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    results = {
+        'meta': {
+            'label': label,
+            'git_revision': git_revision(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'server': getattr(server, 'command', url),
+            'workers': workers,
+            'threads': threads,
+            'llm_latency_ms': latency_ms,
+            'llm_jitter': jitter,
+            'llm_cassette': cassette,
+            'mix': weights,
+        },
+        'runs': runs,
+    }
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        click.echo(f"✅ Results saved to {output}")
+    if baseline:
+        with open(baseline, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Section quality metrics: a per-section Python loop versus ``ai.quality``.
+
+Scores every section of COUNT synthetic case studies (five sections each)
+for readability, sentence length, bullet density, repeated phrases and
+keyword coverage, first one section at a time in plain Python, then with
+the NumPy batch in ``ai.quality.measure``, and checks the two agree.
+
+    python -m benchmarks.quality --count 20000
+"""
+
+import math
+import os
+import sys
+import time
+from collections import Counter
+
+import click
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai import quality  # noqa: E402
+from ai.quality import BREAK, BULLET, END, WORD, syllables, token_kind  # noqa: E402
+from benchmarks.synthetic import synthetic_archive  # noqa: E402
+
+
+def score_section(text: str, keywords) -> dict:
+    """The same metrics as ``ai.quality``, for one section."""
+    tokens = quality._TOKEN.findall(text.lower())
+    words, sentence_lengths, line_words, phrases = [], [], [], []
+    bullets = lines = current = 0
+    for token in tokens:
+        kind = token_kind(token)
+        if kind == WORD:
+            words.append(token)
+            current += 1
+            line_words.append(token)
+            continue
+        if current and kind in (END, BREAK, BULLET):
+            sentence_lengths.append(current)
+            current = 0
+        if kind == BULLET:
+            bullets += 1
+        elif kind == BREAK:
+            lines += bool(line_words)
+            line_words = []
+    if current:
+        sentence_lengths.append(current)
+    lines += bool(line_words)
+
+    row = dict.fromkeys(quality.FIELDS, math.nan)
+    row.update(words=len(words), sentences=len(sentence_lengths), bullets=bullets, lines=lines)
+    if words:
+        per_sentence = len(words) / max(len(sentence_lengths), 1)
+        per_word = sum(syllables(word) for word in words) / len(words)
+        row['reading_ease'] = 206.835 - 1.015 * per_sentence - 84.6 * per_word
+        row['grade_level'] = 0.39 * per_sentence + 11.8 * per_word - 15.59
+    if sentence_lengths:
+        ordered = sorted(sentence_lengths)
+        row['sentence_mean'] = sum(ordered) / len(ordered)
+        row['sentence_p90'] = ordered[int(0.9 * (len(ordered) - 1))]
+        row['sentence_max'] = ordered[-1]
+    if lines:
+        row['bullet_density'] = bullets / lines
+    phrases = list(zip(words, words[1:], words[2:]))
+    if phrases:
+        counts = Counter(phrases)
+        row['repeated_phrase_rate'] = sum(1 for phrase in phrases if counts[phrase] > 1) / len(phrases)
+    vocabulary = set(words)
+    wanted = [terms for terms in ([t for t in quality._TOKEN.findall(k.lower()) if token_kind(t) == WORD]
+                                  for k in keywords or ()) if terms]
+    if wanted:
+        row['keyword_coverage'] = sum(all(term in vocabulary for term in terms) for terms in wanted) / len(wanted)
+    return row
+
+
+@click.command()
+@click.option('--count', '-n', default=20000, help='Number of synthetic case studies')
+def main(count):
+    """Score the sections of COUNT synthetic case studies both ways."""
+    if not quality.available():
+        raise click.ClickException('Quality metrics need NumPy (pip install numpy)')
+    pairs = [(case_study, section) for case_study in synthetic_archive(count) for section in case_study.sections]
+    texts = [section.content for _, section in pairs]
+    keywords = [case_study.case_input.technologies_used for case_study, _ in pairs]
+    click.echo(f"{len(texts)} sections, {sum(map(len, texts)) / 1e6:.0f} MB of text\n")
+
+    started = time.perf_counter()
+    looped = [score_section(text, terms) for text, terms in zip(texts, keywords)]
+    loop_seconds = time.perf_counter() - started
+    click.echo(f"{'per-section Python':<20} {loop_seconds:>7.2f}s  {len(texts) / loop_seconds:>10,.0f} sections/s")
+
+    started = time.perf_counter()
+    batch = quality.measure(texts, keywords)
+    numpy_seconds = time.perf_counter() - started
+    click.echo(f"{'NumPy batch':<20} {numpy_seconds:>7.2f}s  {len(texts) / numpy_seconds:>10,.0f} sections/s  "
+               f"({loop_seconds / numpy_seconds:.1f}x)")
+
+    for name in quality.FIELDS:
+        expected = [row[name] for row in looped]
+        actual = getattr(batch, name).tolist()
+        assert all((math.isnan(a) and math.isnan(e)) if isinstance(e, float) and math.isnan(e)
+                   else math.isclose(a, e, rel_tol=1e-9, abs_tol=1e-9)
+                   for a, e in zip(actual, expected)), name
+
+
+if __name__ == '__main__':
+    main()
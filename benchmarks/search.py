@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Archive search latency at scale.
+
+Indexes synthetic case studies into a fresh SQLite FTS5 index
+(``storage.search``) and times representative queries: a client name, a
+product, a field-restricted industry, a word that is in every document,
+and a miss. A linear scan over the same text (what grepping the archive
+amounts to) is timed on the first query for comparison. First it checks
+that the oldest case study is found when it matches best.
+
+    python -m benchmarks.search --count 100000
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import click
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_archive, synthetic_case_study  # noqa: E402
+from runtime.stats import summarize  # noqa: E402
+from storage.search import SearchIndex, _document  # noqa: E402
+
+
+def queries(count: int):
+    return [
+        ('client name', f'"Client {count // 2:06d}"'),
+        ('product', 'CEL-FI QUATRA 4000'),
+        ('field + term', 'industry:healthcare antenna'),
+        ('common word', 'signal'),
+        ('prefix', 'warehou*'),
+        ('no match', 'fibre broadband'),
+    ]
+
+
+def check_old_match(path: str) -> None:
+    """The oldest of six matching case studies matches best and must come first, however many are newer."""
+    index = SearchIndex(path)
+    archive = [synthetic_case_study(i) for i in range(6)]
+    oldest = archive[0]
+    oldest.title += ' CEL-FI QUATRA'
+    for case_study in archive[1:]:
+        case_study.sections[-1].content += ' Installed with CEL-FI QUATRA.'
+    index.add_many((case_study, None) for case_study in archive)
+    hits = index.search('CEL-FI QUATRA', 3)
+    assert hits[0].id == oldest.id, [hit.id for hit in hits]
+    assert len(index.search('CEL-FI QUATRA', 3, offset=3)) == 3
+
+
+@click.command()
+@click.option('--count', '-n', default=100000, help='Number of synthetic case studies')
+@click.option('--repeat', '-r', default=50, help='Timed runs per query')
+@click.option('--limit', default=20, help='Results per query')
+@click.option('--index', 'index_path', help='Index file to (re)use (default: a temporary one)')
+def main(count, repeat, limit, index_path):
+    """Build an index of COUNT case studies and report query latency percentiles."""
+    with tempfile.TemporaryDirectory(prefix='search_check_') as directory:
+        check_old_match(os.path.join(directory, 'search_index.sqlite3'))
+    workdir = None
+    if index_path is None:
+        workdir = tempfile.TemporaryDirectory(prefix='search_bench_')
+        index_path = os.path.join(workdir.name, 'search_index.sqlite3')
+    index = SearchIndex(index_path)
+
+    texts = []
+    if len(index) != count:
+        click.echo(f"Indexing {count} synthetic case studies...")
+        started = time.perf_counter()
+        batch = []
+        for case_study in synthetic_archive(count):
+            texts.append(' '.join(_document(case_study)).lower())
+            batch.append((case_study, None))
+            if len(batch) == 1000:
+                index.add_many(batch)
+                batch = []
+        index.add_many(batch)
+        index.optimize()
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(index_path) / 1e6
+        click.echo(f"Indexed in {elapsed:.1f}s ({count / elapsed:.0f} docs/s), index {size:.0f} MB")
+
+    click.echo(f"\n{'query':<14} {'expression':<32} {'hits':>5} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for name, query in queries(count):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            hits = index.search(query, limit)
+            timings.append((time.perf_counter() - started) * 1000)
+        summary = summarize(timings)
+        click.echo(f"{name:<14} {query:<32} {len(hits):>5} {summary['p50']:>8.2f} {summary['p95']:>8.2f} "
+                   f"{summary['max']:>8.2f}")
+
+    if texts:
+        needle = f'client {count // 2:06d}'
+        started = time.perf_counter()
+        matches = sum(1 for text in texts if needle in text)
+        click.echo(f"\nLinear scan for the client name over in-memory text: "
+                   f"{(time.perf_counter() - started) * 1000:.0f} ms ({matches} match)")
+    if workdir is not None:
+        workdir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
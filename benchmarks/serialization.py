@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Serialization throughput for CaseStudy storage and API payloads.
+
+Compares the legacy path (hand-built dicts + ``json``, SimpleNamespace on the
+way back) with the pydantic v2 ``model_dump_json`` / ``model_validate_json``
+layer on ``CaseStudy``, and with orjson over ``model_dump`` when installed.
+
+    python -m benchmarks.serialization --count 20000
+"""
+
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import click
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_archive  # noqa: E402
+from models import CaseStudy  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def legacy_dump(case_study: CaseStudy) -> str:
+    data = {
+        'title': case_study.title,
+        'sections': [
+            {'title': s.title, 'content': s.content, 'section_type': s.section_type}
+            for s in case_study.sections
+        ],
+        'wordpress_content': case_study.wordpress_content,
+        'client_name': case_study.client_name,
+    }
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def legacy_load(blob: str):
+    data = json.loads(blob)
+    sections = [SimpleNamespace(**section) for section in data['sections']]
+    return SimpleNamespace(title=data['title'], sections=sections,
+                           wordpress_content=data['wordpress_content'], client_name=data.get('client_name'))
+
+
+def orjson_dump(case_study: CaseStudy) -> bytes:
+    return orjson.dumps(case_study.model_dump(mode='json', exclude_none=True))
+
+
+def orjson_load(blob: bytes) -> CaseStudy:
+    return CaseStudy.model_validate(orjson.loads(blob))
+
+
+def measure(func, items) -> tuple:
+    start = time.perf_counter()
+    results = [func(item) for item in items]
+    return time.perf_counter() - start, results
+
+
+@click.command()
+@click.option('--count', '-n', default=10000, help='Number of synthetic case studies')
+def main(count):
+    """Benchmark serialize/deserialize throughput on a large batch."""
+    click.echo(f"Building {count} synthetic case studies...")
+    case_studies = list(synthetic_archive(count))
+
+    strategies = [
+        ('legacy dict + json', legacy_dump, legacy_load),
+        ('model_dump_json / model_validate_json', CaseStudy.to_json, CaseStudy.from_json),
+    ]
+    if orjson is not None:
+        strategies.append(('orjson + model_validate', orjson_dump, orjson_load))
+
+    click.echo(f"{'strategy':<40} {'dump/s':>10} {'load/s':>10} {'MB/s out':>9} {'avg KB':>7}")
+    for name, dump, load in strategies:
+        dump_time, blobs = measure(dump, case_studies)
+        load_time, _ = measure(load, blobs)
+        size = sum(len(blob) for blob in blobs)
+        click.echo(f"{name:<40} {count / dump_time:>10.0f} {count / load_time:>10.0f} "
+                   f"{size / dump_time / 1e6:>9.1f} {size / count / 1024:>7.1f}")
+
+    payload_time, _ = measure(lambda c: c.to_payload_json(include_sections=True), case_studies)
+    legacy_payload_time, _ = measure(lambda c: json.dumps(c.to_payload()), case_studies)
+    click.echo(f"\nAPI payload: to_payload_json {count / payload_time:.0f}/s vs "
+               f"to_payload + json.dumps {count / legacy_payload_time:.0f}/s")
+
+
+if __name__ == '__main__':
+    main()
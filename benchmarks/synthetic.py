@@ -0,0 +1,68 @@
+"""Deterministic synthetic case studies for benchmarks."""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+from ai.pipeline import CASE_STUDY_SECTIONS, format_wordpress_content
+from models import CaseStudy, CaseStudyInput, CaseStudySection
+from templates import WordPressFormatter
+
+INDUSTRIES = ['Higher Education', 'Healthcare', 'Logistics', 'Hospitality', 'Retail', 'Manufacturing',
+              'Commercial Property', 'Public Sector']
+TECHNOLOGIES = ['CEL-FI QUATRA 1000', 'CEL-FI QUATRA 4000', 'CEL-FI GO G41', 'CAT-6 cabling',
+                'MIMO antennae', 'Private 5G', 'DAS', 'Nextivity Nexus']
+WORDS = ('signal coverage network building mobile carriers installation floors staff visitors '
+         'connectivity reliable solution challenge results improvement survey antenna booster '
+         'concrete steel glass warehouse campus hospital office productivity calls data speeds').split()
+
+
+def _paragraph(rng: random.Random, sentences: int) -> str:
+    return ' '.join(
+        ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 22))).capitalize() + '.'
+        for _ in range(sentences)
+    )
+
+
+def _section_content(rng: random.Random, section_type: str) -> str:
+    parts = [_paragraph(rng, rng.randint(2, 4))]
+    if section_type in ('challenges', 'solution', 'results'):
+        parts.append('\n'.join(f"• {_paragraph(rng, 1)}" for _ in range(rng.randint(3, 5))))
+    parts.append(_paragraph(rng, rng.randint(2, 4)))
+    if section_type == 'results':
+        parts.append('Facing similar challenges? Contact us today to find out how we can help.')
+    return '\n\n'.join(parts)
+
+
+def synthetic_case_study(index: int, seed: int = 0, formatter: WordPressFormatter = None) -> CaseStudy:
+    """Build one realistic-looking case study; the same (index, seed) gives the same result."""
+    rng = random.Random(seed * 1_000_003 + index)
+    client = f"Client {index:06d} {rng.choice(['Ltd', 'plc', 'University', 'Group', 'Trust'])}"
+    case_input = CaseStudyInput(
+        client_name=client,
+        industry=rng.choice(INDUSTRIES),
+        main_challenge=f"Poor indoor {rng.choice(['4G', '5G', 'mobile'])} coverage across the site",
+        solution_provided=f"{rng.choice(TECHNOLOGIES)} deployment covering every floor",
+        location=rng.choice(['London', 'Manchester', 'Leeds', 'Bristol', 'Glasgow']),
+        project_scale=f"{rng.randint(1, 20)} floors",
+        technologies_used=rng.sample(TECHNOLOGIES, rng.randint(1, 3)),
+    )
+    sections = [
+        CaseStudySection(title=title, content=_section_content(rng, section_type), section_type=section_type)
+        for title, section_type, _ in CASE_STUDY_SECTIONS
+    ]
+    return CaseStudy(
+        id=f"{seed:04x}{index:012x}",
+        title=f"Case Study: {client} - {case_input.main_challenge}",
+        sections=sections,
+        wordpress_content=format_wordpress_content(formatter or WordPressFormatter(), sections),
+        client_name=client,
+        case_input=case_input,
+        created_at=datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(hours=index),
+    )
+
+
+def synthetic_archive(count: int, seed: int = 0):
+    """Yield ``count`` synthetic case studies."""
+    formatter = WordPressFormatter()
+    for index in range(count):
+        yield synthetic_case_study(index, seed, formatter)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+WXR export throughput and memory.
+
+Streams synthetic case studies through ``export.wxr`` to plain, gzipped
+and size-split files and reports posts/s, MB/s and how much the process's
+peak RSS grew. Posts are drawn from a pool of ``--pool`` pre-built case
+studies (with fresh ids), so the timings measure the exporter rather than
+the synthetic data generator. With ``--baseline`` it then builds the same
+export as an in-memory ElementTree for comparison.
+
+    python -m benchmarks.wxr --count 50000
+"""
+
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import click
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_archive  # noqa: E402
+from export.wxr import export_wxr, parse_size  # noqa: E402
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux (bytes on macOS)
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6
+
+
+def posts(pool: list, count: int):
+    """``count`` case studies cycled from ``pool``, each with its own id."""
+    for index in range(count):
+        case_study = pool[index % len(pool)]
+        case_study.id = f"{index:016x}"
+        yield case_study
+
+
+def in_memory_export(pool: list, count: int, path: str) -> None:
+    """What a naive exporter does: build the whole tree, then serialize it."""
+    import xml.etree.ElementTree as ET
+    rss = ET.Element('rss', version='2.0')
+    channel = ET.SubElement(rss, 'channel')
+    for case_study in posts(pool, count):
+        # Copies, as if every post had been read from the store
+        item = ET.SubElement(channel, 'item')
+        ET.SubElement(item, 'title').text = case_study.title.encode().decode()
+        ET.SubElement(item, 'content').text = case_study.wordpress_content.encode().decode()
+        for section in case_study.sections:
+            ET.SubElement(item, 'section').text = section.content.encode().decode()
+    ET.ElementTree(rss).write(path, encoding='utf-8', xml_declaration=True)
+
+
+@click.command()
+@click.option('--count', '-n', default=50000, help='Number of synthetic posts')
+@click.option('--max-size', default='25MB', show_default=True, help='Part size for the split run')
+@click.option('--pool', default=1000, help='Distinct synthetic case studies to cycle through')
+@click.option('--baseline', is_flag=True, help='Also time an in-memory ElementTree export (uses a lot of memory)')
+def main(count, max_size, pool, baseline):
+    """Export COUNT synthetic posts to WXR in each mode."""
+    pool = list(synthetic_archive(min(pool, count)))
+    with tempfile.TemporaryDirectory(prefix='wxr_bench_') as workdir:
+        runs = [
+            ('plain', dict()),
+            ('gzip', dict(compress=True)),
+            (f'split {max_size}', dict(max_bytes=parse_size(max_size))),
+            (f'gzip + split {max_size}', dict(compress=True, max_bytes=parse_size(max_size))),
+        ]
+        click.echo(f"{'mode':<24} {'posts/s':>8} {'MB/s out':>9} {'MB out':>8} {'files':>6} {'peak RSS +MB':>13}")
+        for name, options in runs:
+            rss_before = peak_rss_mb()
+            started = time.perf_counter()
+            report = export_wxr(posts(pool, count), os.path.join(workdir, name.replace(' ', '_'), 'export.xml'),
+                                **options)
+            elapsed = time.perf_counter() - started
+            click.echo(f"{name:<24} {report.posts / elapsed:>8.0f} {report.bytes_written / elapsed / 1e6:>9.1f} "
+                       f"{report.bytes_written / 1e6:>8.1f} {len(report.files):>6} "
+                       f"{peak_rss_mb() - rss_before:>13.1f}")
+
+        if baseline:
+            rss_before = peak_rss_mb()
+            started = time.perf_counter()
+            in_memory_export(pool, count, os.path.join(workdir, 'tree.xml'))
+            elapsed = time.perf_counter() - started
+            click.echo(f"{'in-memory ElementTree':<24} {count / elapsed:>8.0f} {'':>9} {'':>8} {1:>6} "
+                       f"{peak_rss_mb() - rss_before:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,9 @@ An AI-powered tool for generating case study content in WordPress format.
 """
 
 import os
+import secrets
 import sys
+from concurrent.futures import ThreadPoolExecutor
 import click
 from dotenv import load_dotenv
 from typing import Optional, List
@@ -15,37 +17,68 @@ from typing import Optional, List
 load_dotenv()
 
 from models import CaseStudyInput, CaseStudy, CaseStudySection
-from ai import AIContentGenerator
+from ai import AIContentGenerator, ImageBackend, create_image_backend
+from ai.cassette import replaying
+from ai.pipeline import RetryBudget, check_section, generate_feature_image
+from runtime import usage
 from templates import WordPressFormatter
 
 
 class CaseStudyGenerator:
     """Main case study generator class."""
     
-    def __init__(self):
+    def __init__(self, image_backend: Optional[ImageBackend] = None, image_processor=None):
         self.ai_generator = AIContentGenerator()
         self.formatter = WordPressFormatter()
+        self.image_backend = image_backend
+        self.image_processor = image_processor
     
     def generate_case_study(self, case_input: CaseStudyInput) -> CaseStudy:
         """Generate a complete case study."""
         
         click.echo(f"Generating case study for {case_input.client_name}...")
         
+        # The feature image runs in the background while the sections are written
+        image_executor = image_future = None
+        if self.image_backend is not None:
+            click.echo("🖼️  Generating feature image in the background...")
+            image_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='feature-image')
+            image_future = image_executor.submit(generate_feature_image, self.image_backend, case_input,
+                                                 self.image_processor)
+        
+        # Labels this run's calls in the usage ledger
+        case_study_id = secrets.token_hex(8)
+        try:
+            with usage.scope(case_study=case_study_id):
+                case_study = self._generate_text(case_input)
+            case_study.id = case_study_id
+        finally:
+            if image_executor is not None:
+                image_executor.shutdown(wait=False, cancel_futures=True)
+        
+        if image_future is not None:
+            case_study.feature_image = image_future.result()
+        return case_study
+    
+    def _generate_text(self, case_input: CaseStudyInput) -> CaseStudy:
+        """Generate and format the text sections."""
+        budget = RetryBudget()
+        
         # Generate content for each section
         click.echo("📝 Generating summary...")
-        summary_content = self.ai_generator.generate_summary(case_input)
+        summary_content = self._section('summary', self.ai_generator.generate_summary, case_input, budget)
         
         click.echo("🏢 Generating client section...")
-        client_content = self.ai_generator.generate_client_section(case_input)
+        client_content = self._section('client', self.ai_generator.generate_client_section, case_input, budget)
         
         click.echo("⚠️  Generating challenges section...")
-        challenges_content = self.ai_generator.generate_challenges_section(case_input)
+        challenges_content = self._section('challenges', self.ai_generator.generate_challenges_section, case_input, budget)
         
         click.echo("🔧 Generating solution section...")
-        solution_content = self.ai_generator.generate_solution_section(case_input)
+        solution_content = self._section('solution', self.ai_generator.generate_solution_section, case_input, budget)
         
         click.echo("📊 Generating results section...")
-        results_content = self.ai_generator.generate_results_section(case_input)
+        results_content = self._section('results', self.ai_generator.generate_results_section, case_input, budget)
         
         # Create sections
         sections = [
@@ -69,6 +102,17 @@ class CaseStudyGenerator:
             wordpress_content=wordpress_content
         )
     
+    def _section(self, section_type: str, generate, case_input: CaseStudyInput, budget: RetryBudget) -> str:
+        """Generate one section and validate its structure, regenerating it (within budget) if it doesn't conform."""
+        with usage.scope(section=section_type):
+            content = generate(case_input)
+        check = check_section(self.ai_generator, section_type, case_input, content, budget)
+        if check.retries:
+            click.echo(f"   ↻ Regenerated {section_type} {check.retries}x to fix its structure")
+        if check.issues:
+            click.echo(f"   ⚠️  {section_type} still {'; '.join(check.issues)}", err=True)
+        return check.content
+    
     def _format_wordpress_content(self, sections: List[CaseStudySection]) -> str:
         """Format sections into WordPress block content."""
         formatted_sections = []
@@ -90,14 +134,18 @@ class CaseStudyGenerator:
 @click.option('--technologies', '-t', help='Technologies used (comma-separated)')
 @click.option('--context', help='Additional context or details')
 @click.option('--output', '-o', help='Output file path (default: stdout)')
+@click.option('--image-backend', envvar='FEATURE_IMAGE_BACKEND', default='none',
+              type=click.Choice(['none', 'openai', 'offline'], case_sensitive=False),
+              help='Generate a feature image alongside the text')
+@click.option('--image-output', help='Feature image file path (default: next to --output)')
 def main(client: str, industry: str, challenge: str, solution: str, 
          location: Optional[str], scale: Optional[str], 
          technologies: Optional[str], context: Optional[str], 
-         output: Optional[str]):
+         output: Optional[str], image_backend: str, image_output: Optional[str]):
     """Generate AI-powered case study content in WordPress format."""
     
-    # Check for OpenAI API key
-    if not os.getenv('OPENAI_API_KEY'):
+    # Check for OpenAI API key (not needed when replaying an LLM_CASSETTE)
+    if not os.getenv('OPENAI_API_KEY') and not replaying():
         click.echo("❌ Error: OPENAI_API_KEY environment variable is required", err=True)
         click.echo("Please create a .env file with your OpenAI API key:", err=True)
         click.echo("OPENAI_API_KEY=your_api_key_here", err=True)
@@ -122,8 +170,15 @@ def main(client: str, industry: str, challenge: str, solution: str,
     
     try:
         # Generate case study
-        generator = CaseStudyGenerator()
+        backend = create_image_backend(image_backend)
+        processor = None
+        if backend is not None:
+            from media import ImageProcessor
+            processor = ImageProcessor.from_env()
+        generator = CaseStudyGenerator(image_backend=backend, image_processor=processor)
         case_study = generator.generate_case_study(case_input)
+        if processor is not None:
+            processor.shutdown()
         
         # Output result
         if output:
@@ -135,6 +190,24 @@ def main(client: str, industry: str, challenge: str, solution: str,
             click.echo(f"CASE STUDY: {case_study.title}")
             click.echo("="*60)
             click.echo(case_study.wordpress_content)
+        
+        image = case_study.feature_image
+        if image is not None:
+            if not image_output:
+                base = os.path.splitext(output)[0] if output else 'case_study'
+                image_output = f"{base}-{image.filename}"
+            with open(image_output, 'wb') as f:
+                f.write(image.read())
+            click.echo(f"🖼️  Feature image saved to {image_output}")
+            base = os.path.splitext(image_output)[0]
+            for variant in image.variants:
+                with open(f"{base}-{variant.width}w.{variant.mime_type.rpartition('/')[2]}", 'wb') as f:
+                    f.write(variant.read())
+            if image.variants:
+                click.echo(f"   {len(image.variants)} variants, {image.bytes_saved:,} bytes saved, "
+                           f"{image.encode_ms:.0f} ms encode")
+        elif image_backend != 'none':
+            click.echo("⚠️  Feature image generation failed; continuing without one", err=True)
             
     except Exception as e:
         click.echo(f"❌ Error generating case study: {str(e)}", err=True)
@@ -0,0 +1,5 @@
+from .static_site import StaticSiteExporter, ExportReport, render_page
+from .wxr import POST_STATUSES, ChunkedWXRWriter, WXRExportReport, WXRWriter, export_wxr, stream_wxr
+
+__all__ = ['StaticSiteExporter', 'ExportReport', 'render_page',
+           'POST_STATUSES', 'ChunkedWXRWriter', 'WXRExportReport', 'WXRWriter', 'export_wxr', 'stream_wxr']
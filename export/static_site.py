@@ -0,0 +1,276 @@
+"""
+Static pre-render of case study previews.
+
+Renders ``uctel_website_preview.html`` for every stored case study without
+Flask, so the output directory can be pushed to a CDN as-is:
+
+    <output>/index.html                  list of all previews
+    <output>/<id>.html                   one page per case study
+    <output>/assets/<name>.<hash>.<ext>  content-addressed CSS, JS and images
+
+Rendering is spread over a process pool. Every page records a hash of its
+inputs (stored JSON + template) in ``manifest.json``; unchanged case studies
+are skipped without being parsed, which keeps re-exports incremental.
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from models.case_study import CaseStudy
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+TEMPLATE_NAME = 'uctel_website_preview.html'
+MANIFEST_NAME = 'manifest.json'
+ASSET_DIR = 'assets'
+
+# Bump when the page layout produced by this module changes
+EXPORT_VERSION = '1'
+
+_INLINE_STYLE = re.compile(r'<style>(.*?)</style>', re.S)
+_INLINE_SCRIPT = re.compile(r'<script>(.*?)</script>', re.S)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.export_', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_asset(output_dir: str, name: str, ext: str, data: bytes) -> str:
+    """
+    Store ``data`` under a content-hashed name and return its relative URL.
+
+    Identical content always maps to the same file, so shared CSS or a
+    reused image is written once no matter how many pages reference it.
+    """
+    filename = f"{name}.{hashlib.sha256(data).hexdigest()[:16]}.{ext}"
+    path = os.path.join(output_dir, ASSET_DIR, filename)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    return f"{ASSET_DIR}/{filename}"
+
+
+def template_hash(template_dir: str = TEMPLATE_DIR) -> str:
+    with open(os.path.join(template_dir, TEMPLATE_NAME), 'rb') as f:
+        return hashlib.sha256(f.read() + EXPORT_VERSION.encode()).hexdigest()
+
+
+def source_hash(data: bytes, template_digest: str) -> str:
+    return hashlib.sha256(template_digest.encode() + b'\0' + data).hexdigest()
+
+
+# -- worker side ----------------------------------------------------------
+
+_environment = None
+
+
+def _get_environment(template_dir: str):
+    """One Jinja environment per worker process."""
+    global _environment
+    if _environment is None:
+        from jinja2 import Environment, FileSystemLoader, select_autoescape
+        _environment = Environment(loader=FileSystemLoader(template_dir),
+                                   autoescape=select_autoescape(['html']))
+    return _environment
+
+
+def render_page(case_study: CaseStudy, output_dir: str, template_dir: str = TEMPLATE_DIR) -> Tuple[str, List[str]]:
+    """Render one preview page; return its HTML and the assets it references."""
+    assets: List[str] = []
+    image = case_study.feature_image
+
+    def url_for(endpoint: str, **values) -> str:
+        # The template only links images; everything else stays a dead link in a static page
+        if endpoint == 'case_study_image' and image is not None:
+            filename = values['filename']
+            file = image if filename == image.filename else image.variant(filename)
+            if file is not None:
+                name, _, ext = file.filename.rpartition('.')
+                url = write_asset(output_dir, name, ext, file.read())
+                assets.append(url)
+                return url
+        return '#'
+
+    if not case_study.client_name:
+        case_study.client_name = 'Client Name'
+    created = case_study.created_at or datetime.now()
+    page = _get_environment(template_dir).get_template(TEMPLATE_NAME).render(
+        case_study=case_study,
+        # Derived from the case study rather than the clock so output is reproducible
+        current_date=created.strftime("%B %d, %Y"),
+        url_for=url_for,
+        get_flashed_messages=lambda with_categories=False: [],
+    )
+
+    # Pull the inline stylesheet and script out into shared, cacheable assets
+    def extract(pattern, build, name, ext):
+        nonlocal page
+        match = pattern.search(page)
+        if match:
+            url = write_asset(output_dir, name, ext, match.group(1).strip().encode('utf-8'))
+            assets.append(url)
+            page = page[:match.start()] + build(url) + page[match.end():]
+
+    extract(_INLINE_STYLE, lambda url: f'<link rel="stylesheet" href="{url}">', 'preview', 'css')
+    extract(_INLINE_SCRIPT, lambda url: f'<script src="{url}"></script>', 'preview', 'js')
+    return page, assets
+
+
+def _render_batch(jobs: List[Tuple[str, str, str]], output_dir: str, template_dir: str) -> List[dict]:
+    """Worker entry point: render ``(id, json path, source hash)`` jobs."""
+    results = []
+    for case_study_id, json_path, digest in jobs:
+        try:
+            with open(json_path, 'rb') as f:
+                case_study = CaseStudy.from_json(f.read())
+            case_study.id = case_study.id or case_study_id
+            page, assets = render_page(case_study, output_dir, template_dir)
+            _write_atomic(os.path.join(output_dir, f"{case_study_id}.html"), page.encode('utf-8'))
+            results.append({'id': case_study_id, 'source_hash': digest, 'assets': sorted(set(assets)),
+                            'title': case_study.title, 'client_name': case_study.client_name,
+                            'created_at': case_study.created_at.isoformat() if case_study.created_at else None})
+        except Exception as e:
+            results.append({'id': case_study_id, 'error': f"{type(e).__name__}: {e}"})
+    return results
+
+
+# -- coordinator ----------------------------------------------------------
+
+@dataclass
+class ExportReport:
+    rendered: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+    assets_removed: int = 0
+
+
+class StaticSiteExporter:
+    """Renders a CaseStudyStore into a static site directory."""
+
+    def __init__(self, store, output_dir: str, workers: int = None, batch_size: int = 50,
+                 template_dir: str = TEMPLATE_DIR):
+        self.store = store
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.template_dir = template_dir
+        self.manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+
+    def _load_manifest(self) -> Dict[str, dict]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {}
+        return manifest.get('pages', {})
+
+    def export(self, ids: Optional[List[str]] = None, force: bool = False, prune: bool = False,
+               on_progress=None) -> ExportReport:
+        """
+        Render changed case studies (all of ``ids``, default every stored one).
+
+        ``prune`` deletes pages for case studies no longer in the store and
+        assets no page references any more; ``ids`` only limits what is
+        rendered, not what is kept.
+        """
+        os.makedirs(os.path.join(self.output_dir, ASSET_DIR), exist_ok=True)
+        manifest = self._load_manifest()
+        template_digest = template_hash(self.template_dir)
+        report = ExportReport()
+
+        jobs = []
+        for case_study_id in (ids if ids is not None else list(self.store.ids())):
+            json_path = self.store.path(case_study_id)
+            with open(json_path, 'rb') as f:
+                digest = source_hash(f.read(), template_digest)
+            previous = manifest.get(case_study_id)
+            page_path = os.path.join(self.output_dir, f"{case_study_id}.html")
+            if (not force and previous and previous.get('source_hash') == digest
+                    and os.path.exists(page_path)):
+                report.skipped.append(case_study_id)
+            else:
+                jobs.append((case_study_id, json_path, digest))
+
+        batches = [jobs[i:i + self.batch_size] for i in range(0, len(jobs), self.batch_size)]
+        if batches:
+            if self.workers == 1 or len(batches) == 1:
+                outcomes = (_render_batch(batch, self.output_dir, self.template_dir) for batch in batches)
+                self._collect(outcomes, manifest, report, on_progress)
+            else:
+                with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                    outcomes = executor.map(_render_batch, batches, [self.output_dir] * len(batches),
+                                            [self.template_dir] * len(batches))
+                    self._collect(outcomes, manifest, report, on_progress)
+
+        if prune:
+            self._prune(manifest, report, set(self.store.ids()))
+
+        self._write_index(manifest)
+        _write_atomic(self.manifest_path, json.dumps(
+            {'version': EXPORT_VERSION, 'pages': manifest}, indent=1, sort_keys=True).encode('utf-8'))
+        return report
+
+    def _collect(self, outcomes, manifest: Dict[str, dict], report: ExportReport, on_progress) -> None:
+        for results in outcomes:
+            for result in results:
+                if 'error' in result:
+                    report.errors[result['id']] = result['error']
+                    continue
+                case_study_id = result.pop('id')
+                manifest[case_study_id] = result
+                report.rendered.append(case_study_id)
+            if on_progress is not None:
+                on_progress(report)
+
+    def _prune(self, manifest: Dict[str, dict], report: ExportReport, keep: set) -> None:
+        for case_study_id in [i for i in manifest if i not in keep]:
+            del manifest[case_study_id]
+            page_path = os.path.join(self.output_dir, f"{case_study_id}.html")
+            if os.path.exists(page_path):
+                os.unlink(page_path)
+            report.removed.append(case_study_id)
+
+        referenced = {os.path.basename(url) for entry in manifest.values() for url in entry.get('assets', [])}
+        asset_dir = os.path.join(self.output_dir, ASSET_DIR)
+        with os.scandir(asset_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name not in referenced:
+                    os.unlink(entry.path)
+                    report.assets_removed += 1
+
+    def _write_index(self, manifest: Dict[str, dict]) -> None:
+        rows = sorted(manifest.items(), key=lambda item: item[1].get('created_at') or '', reverse=True)
+        items = '\n'.join(
+            f'<li><a href="{html.escape(case_study_id)}.html">{html.escape(entry.get("title") or case_study_id)}</a>'
+            f' <small>{html.escape(entry.get("client_name") or "")}'
+            f'{" · " + entry["created_at"][:10] if entry.get("created_at") else ""}</small></li>'
+            for case_study_id, entry in rows
+        )
+        page = ('<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="UTF-8">\n'
+                '<meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+                '<title>Case Study Previews</title>\n</head>\n<body>\n'
+                f'<h1>Case Study Previews ({len(rows)})</h1>\n<ul>\n{items}\n</ul>\n</body>\n</html>\n')
+        data = page.encode('utf-8')
+        index_path = os.path.join(self.output_dir, 'index.html')
+        try:
+            with open(index_path, 'rb') as f:
+                if f.read() == data:
+                    return
+        except FileNotFoundError:
+            pass
+        _write_atomic(index_path, data)
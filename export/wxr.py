@@ -0,0 +1,358 @@
+"""
+Streaming WXR (WordPress eXtended RSS) export of the case study archive.
+
+WordPress imports posts from a WXR file (Tools → Import → WordPress). The
+archive can hold tens of thousands of case studies, so nothing here builds
+a document tree: ``WXRWriter`` writes the channel header, then one
+``<item>`` per case study as it is read from the store, then the footer.
+Memory stays flat no matter how many posts are exported.
+
+``ChunkedWXRWriter`` starts a new, self-contained file whenever the
+current one reaches ``max_bytes`` (WordPress upload limits are often a
+few tens of MB), and either writer can gzip its output.
+
+    <output>.xml                  one file, or
+    <output>-001.xml[.gz] ...     parts of at most max_bytes each
+"""
+
+import gzip
+import io
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+from models.case_study import CaseStudy
+from wordpress.publisher import idempotency_key, post_slug
+
+WXR_VERSION = '1.2'
+WRITE_BUFFER = 256 * 1024
+FOOTER = b'</channel>\n</rss>\n'
+# Statuses an imported post may have (``manage.py export-wxr --status``)
+POST_STATUSES = ('draft', 'pending', 'publish')
+
+NAMESPACES = {
+    'excerpt': 'http://wordpress.org/export/1.2/excerpt/',
+    'content': 'http://purl.org/rss/1.0/modules/content/',
+    'wfw': 'http://wellformedweb.org/CommentAPI/',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'wp': 'http://wordpress.org/export/1.2/',
+}
+
+# Characters XML 1.0 does not allow, which model output occasionally contains
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+_NICENAME = re.compile(r'[^a-z0-9]+')
+
+
+def nicename(term: str) -> str:
+    return _NICENAME.sub('-', term.lower()).strip('-')
+
+
+def excerpt(case_study: CaseStudy, limit: int = 300) -> str:
+    """First paragraph of the summary, cut at a word boundary."""
+    summary = next((s.content for s in case_study.sections if s.section_type == 'summary'), '')
+    first = summary.strip().split('\n\n', 1)[0].strip()
+    if len(first) <= limit:
+        return first
+    return first[:limit].rsplit(' ', 1)[0] + '…'
+
+
+def _text(text: str) -> str:
+    text = escape(text)
+    return _INVALID_XML.sub('', text) if _INVALID_XML.search(text) else text
+
+
+def _element(name: str, text: Optional[str]) -> str:
+    return f'<{name}>{_text(text)}</{name}>' if text else f'<{name}/>'
+
+
+def parse_size(value: str) -> int:
+    """Byte count from ``"25MB"``, ``"500k"``, ``"1G"`` or a plain number."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([kmg]?)i?b?\s*', str(value).lower())
+    if not match:
+        raise ValueError(f'Invalid size: {value!r} (examples: 25MB, 500k, 1048576)')
+    return int(float(match.group(1)) * 1024 ** ' kmg'.index(match.group(2) or ' '))
+
+
+class WXRWriter:
+    """
+    Incremental WXR writer over a binary stream.
+
+    ``open()`` writes the channel header, ``write(case_study)`` one post and
+    ``close()`` the footer; the stream itself is left to the caller. Each
+    post is escaped and encoded on its own and written in one call. Posts
+    are written as drafts unless ``status`` says otherwise, with the
+    industry as category (in ``category_taxonomy``), the technologies as
+    tags and the same slug ``manage.py publish`` uses, so an import and a
+    publish don't duplicate each other's posts by name.
+    """
+
+    def __init__(self, stream: BinaryIO, site_title: str = 'Case Studies', site_url: str = '',
+                 status: str = 'draft', author: str = 'admin', post_type: str = 'post',
+                 category_taxonomy: str = 'category', first_post_id: int = 1):
+        if status not in POST_STATUSES:
+            raise ValueError(f"status must be one of {', '.join(POST_STATUSES)}")
+        self.stream = stream
+        self.site_title = site_title
+        self.site_url = site_url.rstrip('/')
+        self.status = status
+        self.author = author
+        self.post_type = post_type
+        self.category_taxonomy = category_taxonomy
+        self.next_post_id = first_post_id
+        self.posts = 0
+
+    def _write(self, parts: List[str]) -> None:
+        self.stream.write(''.join(parts).encode('utf-8'))
+
+    def open(self) -> 'WXRWriter':
+        namespaces = ' '.join(f'xmlns:{prefix}={quoteattr(uri)}' for prefix, uri in NAMESPACES.items())
+        parts = ['<?xml version="1.0" encoding="UTF-8"?>\n', f'<rss version="2.0" {namespaces}>\n<channel>\n']
+        for name, text in (('title', self.site_title), ('link', self.site_url), ('description', ''),
+                           ('pubDate', format_datetime(datetime.now(timezone.utc))), ('language', 'en-GB'),
+                           ('wp:wxr_version', WXR_VERSION), ('wp:base_site_url', self.site_url),
+                           ('wp:base_blog_url', self.site_url)):
+            parts.append(f'\t{_element(name, text)}\n')
+        parts.append(f'\t<wp:author>{_element("wp:author_login", self.author)}'
+                     f'{_element("wp:author_display_name", self.author)}</wp:author>\n')
+        self._write(parts)
+        return self
+
+    def write(self, case_study: CaseStudy) -> None:
+        """Append one case study as a post."""
+        self.write_item(self.item(case_study))
+
+    def write_item(self, data: bytes) -> None:
+        """Append a post rendered by ``item``."""
+        self.stream.write(data)
+        self.next_post_id += 1
+        self.posts += 1
+
+    def item(self, case_study: CaseStudy) -> bytes:
+        """One case study as an encoded ``<item>``, numbered as the next post."""
+        key = idempotency_key(case_study)
+        created = case_study.created_at or datetime.now(timezone.utc)
+        if created.tzinfo is None:
+            created = created.replace(tzinfo=timezone.utc)
+        created_utc = created.astimezone(timezone.utc)
+        slug = post_slug(case_study, key)
+
+        parts = ['\t<item>\n']
+        for name, text in (
+            ('title', case_study.title),
+            ('link', f'{self.site_url}/{slug}/' if self.site_url else ''),
+            ('pubDate', format_datetime(created_utc)),
+            ('dc:creator', self.author),
+        ):
+            parts.append(f'\t\t{_element(name, text)}\n')
+        parts.append(f'\t\t<guid isPermaLink="false">{escape(f"urn:case-study:{case_study.id or key}")}</guid>\n')
+        for name, text in (
+            ('description', ''),
+            ('content:encoded', case_study.wordpress_content),
+            ('excerpt:encoded', excerpt(case_study)),
+            ('wp:post_id', str(self.next_post_id)),
+            ('wp:post_date', created.strftime('%Y-%m-%d %H:%M:%S')),
+            ('wp:post_date_gmt', created_utc.strftime('%Y-%m-%d %H:%M:%S')),
+            ('wp:comment_status', 'closed'),
+            ('wp:ping_status', 'closed'),
+            ('wp:post_name', slug),
+            ('wp:status', self.status),
+            ('wp:post_parent', '0'),
+            ('wp:menu_order', '0'),
+            ('wp:post_type', self.post_type),
+            ('wp:post_password', ''),
+            ('wp:is_sticky', '0'),
+        ):
+            parts.append(f'\t\t{_element(name, text)}\n')
+
+        case_input = case_study.case_input
+        terms = []
+        if case_input is not None:
+            terms = [(self.category_taxonomy, case_input.industry)]
+            terms += [('post_tag', technology) for technology in case_input.technologies_used or ()]
+        for domain, term in terms:
+            if term:
+                parts.append(f'\t\t<category domain={quoteattr(domain)} nicename={quoteattr(nicename(term))}>'
+                             f'{_text(term)}</category>\n')
+        for meta_key, value in (('case_study_id', case_study.id), ('case_study_key', key)):
+            if value:
+                parts.append(f'\t\t<wp:postmeta>{_element("wp:meta_key", meta_key)}'
+                             f'{_element("wp:meta_value", value)}</wp:postmeta>\n')
+        parts.append('\t</item>\n')
+        return ''.join(parts).encode('utf-8')
+
+    def close(self) -> None:
+        self.stream.write(FOOTER)
+
+
+@dataclass
+class WXRExportReport:
+    posts: int = 0
+    files: List[str] = field(default_factory=list)
+    bytes_written: int = 0
+
+
+class ChunkedWXRWriter:
+    """
+    Writes posts into ``<base>-001.xml``, ``<base>-002.xml``, ... starting a
+    new complete WXR file when the next post would take the current one
+    past ``max_bytes`` on disk (with ``compress``, estimated from the
+    compression ratio). Posts are never split, so a post bigger than
+    ``max_bytes`` gets a part of its own. ``max_bytes=None`` writes
+    ``<base>.xml`` only. Each part is written to a temporary name and renamed when done,
+    so a failed export never leaves a truncated part that looks finished.
+    """
+
+    def __init__(self, base_path: str, max_bytes: Optional[int] = None, compress: bool = False,
+                 compresslevel: int = 6, **writer_options):
+        base, ext = os.path.splitext(base_path)
+        if ext.lower() == '.gz':
+            base, ext = os.path.splitext(base)
+            compress = True
+        self.base = base
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.compresslevel = compresslevel
+        self.writer_options = writer_options
+        self.report = WXRExportReport()
+        self._writer: Optional[WXRWriter] = None
+        self._raw = self._gzip = self._stream = None
+        # Compressed / uncompressed size, refined as parts are finished
+        self._ratio = 0.25
+        self._tmp_path = self._path = None
+        directory = os.path.dirname(os.path.abspath(base_path))
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+
+    def _part_path(self) -> str:
+        suffix = f'-{len(self.report.files) + 1:03d}' if self.max_bytes else ''
+        return f"{self.base}{suffix}.xml" + ('.gz' if self.compress else '')
+
+    def _start_part(self) -> None:
+        self._path = self._part_path()
+        fd, self._tmp_path = tempfile.mkstemp(dir=self._directory, prefix='.wxr_', suffix='.tmp')
+        self._raw = os.fdopen(fd, 'wb')
+        self._gzip = None
+        if self.compress:
+            # mtime=0: no export timestamp in the gzip header
+            self._gzip = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=self.compresslevel, mtime=0)
+        # Batch posts into large writes before they reach gzip or the file
+        self._stream = io.BufferedWriter(self._gzip or self._raw, buffer_size=WRITE_BUFFER)
+        options = dict(self.writer_options, first_post_id=self.report.posts + 1)
+        self._writer = WXRWriter(self._stream, **options).open()
+
+    def _finish_part(self) -> None:
+        self._writer.close()
+        self._stream.flush()
+        plain = self._stream.tell()
+        if self._gzip is not None:
+            self._gzip.close()
+        size = self._raw.tell()
+        if self._gzip is not None:
+            self._ratio = size / max(plain, 1)
+        self._raw.close()
+        os.replace(self._tmp_path, self._path)
+        self.report.files.append(self._path)
+        self.report.bytes_written += size
+        self._writer = None
+
+    def _size_with(self, extra: int) -> int:
+        """Size of the current part on disk once ``extra`` more bytes (uncompressed) are written."""
+        plain = self._stream.tell() + extra
+        if self._gzip is None:
+            return plain
+        # gzip and zlib hold back a few hundred KB of input before anything
+        # reaches the file, so estimate from the ratio of the previous part
+        # (a conservative guess for the first)
+        return max(self._raw.tell(), int(plain * self._ratio))
+
+    def write(self, case_study: CaseStudy) -> None:
+        if self._writer is None:
+            self._start_part()
+        data = self._writer.item(case_study)
+        if (self.max_bytes and self._writer.posts
+                and self._size_with(len(data) + len(FOOTER)) > self.max_bytes):
+            self._finish_part()
+            self._start_part()
+        self._writer.write_item(data)
+        self.report.posts += 1
+
+    def close(self) -> WXRExportReport:
+        if self._writer is None and not self.report.files:
+            # An empty archive still exports as a valid (empty) WXR file
+            self._start_part()
+        if self._writer is not None:
+            self._finish_part()
+        return self.report
+
+    def abort(self) -> None:
+        """Drop the part being written (after an error)."""
+        for stream in (self._stream, self._gzip, self._raw):
+            if stream is not None and not stream.closed:
+                try:
+                    stream.close()
+                except (OSError, ValueError):
+                    pass
+        if self._tmp_path and os.path.exists(self._tmp_path):
+            os.unlink(self._tmp_path)
+        self._writer = None
+
+
+def export_wxr(case_studies: Iterable[CaseStudy], base_path: str, max_bytes: Optional[int] = None,
+               compress: bool = False, on_post: Optional[Callable[[CaseStudy], None]] = None,
+               **writer_options) -> WXRExportReport:
+    """Stream ``case_studies`` (any iterable, e.g. a ``CaseStudyStore``) into WXR file(s)."""
+    writer = ChunkedWXRWriter(base_path, max_bytes, compress, **writer_options)
+    try:
+        for case_study in case_studies:
+            writer.write(case_study)
+            if on_post is not None:
+                on_post(case_study)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+class _Drain(io.RawIOBase):
+    """Collects written bytes until the streaming response takes them."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def stream_wxr(case_studies: Iterable[CaseStudy], compress: bool = False, chunk_size: int = 64 * 1024,
+               **writer_options) -> Iterator[bytes]:
+    """
+    WXR as an iterator of byte chunks of roughly ``chunk_size``, for a
+    streaming HTTP response; only the chunk being filled is held in memory.
+    """
+    drain = _Drain()
+    compressor = gzip.GzipFile(fileobj=drain, mode='wb', mtime=0) if compress else None
+    stream = io.BufferedWriter(compressor or drain, buffer_size=chunk_size)
+    writer = WXRWriter(stream, **writer_options).open()
+    for case_study in case_studies:
+        writer.write(case_study)
+        if drain.chunks:
+            yield drain.take()
+    writer.close()
+    stream.flush()
+    if compressor is not None:
+        compressor.close()
+    yield drain.take()
@@ -0,0 +1,91 @@
+"""
+Web form definitions.
+
+Kept out of ``web_app`` so that flask_wtf and wtforms are only imported when
+a page with the form is actually rendered, not on every cold start.
+"""
+
+from datetime import timedelta
+
+from flask_wtf import FlaskForm
+from markupsafe import Markup
+from wtforms import Form, StringField, TextAreaField, SelectField, SubmitField
+from wtforms.csrf.session import SessionCSRF
+from wtforms.validators import DataRequired, Length
+
+
+class CaseStudyFields:
+    """Case study input fields shared by the Flask and ASGI forms."""
+    client_name = StringField('Client/Company Name', 
+                             validators=[DataRequired(), Length(min=2, max=100)],
+                             render_kw={"placeholder": "e.g., Northeastern University London"})
+    
+    industry = StringField('Industry/Sector', 
+                          validators=[DataRequired(), Length(min=2, max=50)],
+                          render_kw={"placeholder": "e.g., Higher Education"})
+    
+    main_challenge = TextAreaField('Main Challenge', 
+                                  validators=[DataRequired(), Length(min=10, max=500)],
+                                  render_kw={"placeholder": "Describe the primary challenge faced by the client...", "rows": 3})
+    
+    solution_provided = TextAreaField('Solution Provided', 
+                                     validators=[DataRequired(), Length(min=10, max=500)],
+                                     render_kw={"placeholder": "Describe the solution that was implemented...", "rows": 3})
+    
+    location = StringField('Location (Optional)', 
+                          render_kw={"placeholder": "e.g., London, UK"})
+    
+    project_scale = StringField('Project Scale/Size (Optional)', 
+                               render_kw={"placeholder": "e.g., 2.5 floors, 1300 students"})
+    
+    technologies_used = StringField('Technologies Used (Optional)', 
+                                   render_kw={"placeholder": "e.g., CEL-FI QUATRA 1000, CAT-6 cabling (comma-separated)"})
+    
+    additional_context = TextAreaField('Additional Context (Optional)', 
+                                      render_kw={"placeholder": "Any additional details or context...", "rows": 2})
+    
+    candidates = SelectField('Drafts per Section',
+                             choices=[(1, '1 (fastest)'), (2, '2 to choose from'), (3, '3 to choose from')],
+                             coerce=int, default=1)
+    
+    submit = SubmitField('Generate Case Study', render_kw={"class": "btn btn-primary btn-lg"})
+
+
+class CaseStudyForm(FlaskForm, CaseStudyFields):
+    """Form for case study input."""
+
+
+class SessionCSRFForm(Form):
+    """
+    Framework-neutral form for the ASGI app.
+
+    CSRF uses WTForms' session-based tokens; pass the request session as
+    ``meta={'csrf_context': session}`` and the secret via ``csrf_secret``.
+    """
+
+    class Meta:
+        csrf = True
+        csrf_class = SessionCSRF
+        csrf_time_limit = timedelta(hours=1)
+
+    def __init__(self, formdata=None, *, session, csrf_secret: str):
+        super().__init__(formdata, meta={'csrf_context': session, 'csrf_secret': csrf_secret.encode()})
+
+    def hidden_tag(self):
+        """Render hidden fields (the CSRF token), mirroring FlaskForm.hidden_tag."""
+        return Markup(''.join(str(field) for field in self if field.type in ('CSRFTokenField', 'HiddenField')))
+
+
+class AsyncCaseStudyForm(SessionCSRFForm, CaseStudyFields):
+    """Form for case study input in the ASGI app."""
+
+
+class SelectCandidateForm(FlaskForm):
+    """
+    Draft switch on the result page. Only carries the CSRF token; the
+    candidate index is posted by each draft's button.
+    """
+
+
+class AsyncSelectCandidateForm(SessionCSRFForm):
+    """Draft switch on the result page in the ASGI app (CSRF token only)."""
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Case Study Archive Tools
+
+Commands that operate on the stored case study archive (CASE_STUDY_DIR):
+publishing to WordPress and other batch jobs.
+"""
+
+import os
+import sys
+
+import click
+
+# Load environment variables (only if dotenv is available and .env file exists)
+if os.path.exists('.env'):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+from storage import CaseStudyStore
+
+
+@click.group()
+@click.option('--store-dir', envvar='CASE_STUDY_DIR', help='Case study archive directory')
+@click.pass_context
+def cli(ctx, store_dir):
+    """Manage the generated case study archive."""
+    ctx.obj = CaseStudyStore(store_dir)
+
+
+def _select_case_studies(store: CaseStudyStore, ids, select_all: bool):
+    if select_all:
+        return list(store)
+    if not ids:
+        raise click.UsageError('Pass case study ids or --all')
+    try:
+        return [store.load(case_study_id) for case_study_id in ids]
+    except FileNotFoundError as e:
+        raise click.ClickException(f'Case study not found: {e.filename}')
+
+
+@cli.command()
+@click.argument('ids', nargs=-1)
+@click.option('--all', 'select_all', is_flag=True, help='Publish every stored case study')
+@click.option('--status', default='draft', type=click.Choice(['draft', 'pending', 'publish']),
+              help='WordPress post status')
+@click.option('--workers', '-w', default=4, help='Posts published in parallel')
+@click.option('--ledger', help='Publish ledger path (default: <store>/wordpress_ledger.json)')
+@click.option('--category', 'categories', multiple=True,
+              help='Category name (repeatable; default: the case study industry)')
+@click.option('--tag', 'tags', multiple=True, help='Tag name (repeatable)')
+@click.option('--author', help='Author user name or slug')
+@click.option('--taxonomy-ttl', default=300.0, help='Seconds taxonomy lookups are cached before revalidation')
+@click.pass_obj
+def publish(store, ids, select_all, status, workers, ledger, categories, tags, author, taxonomy_ttl):
+    """Publish case studies to WordPress as posts (idempotent, safe to re-run)."""
+    from wordpress import WordPressClient, Publisher, PublishJob, PublishLedger, TaxonomyCache
+
+    case_studies = _select_case_studies(store, ids, select_all)
+    try:
+        client = WordPressClient.from_env(pool_size=workers)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    publisher = Publisher(client, PublishLedger(ledger or os.path.join(store.directory, 'wordpress_ledger.json')),
+                          max_workers=workers, taxonomy=TaxonomyCache(client, ttl=taxonomy_ttl))
+
+    def report(result):
+        if result.error:
+            click.echo(f"❌ {result.case_study_id}: {result.error}", err=True)
+        else:
+            verb = 'created' if result.created else 'already published'
+            click.echo(f"✅ {result.case_study_id}: post {result.post_id} {verb}")
+
+    click.echo(f"Publishing {len(case_studies)} case studies with {workers} workers...")
+    jobs = (PublishJob(cs, status=status, categories=list(categories) or None, tags=list(tags), author=author)
+            for cs in case_studies)
+    results = publisher.bulk_publish(jobs, on_result=report)
+    client.close()
+
+    failed = sum(1 for r in results if r.error)
+    click.echo(f"Done: {len(results) - failed} ok, {failed} failed")
+    if failed:
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('ids', nargs=-1)
+@click.option('--all', 'select_all', is_flag=True, help='Sync every stored case study')
+@click.option('--dry-run', is_flag=True, help='Report what would be sent without contacting WordPress')
+@click.option('--status', default='draft', type=click.Choice(['draft', 'pending', 'publish']),
+              help='Status of posts created for case studies not yet published')
+@click.option('--workers', '-w', default=4, help='Posts sent in parallel')
+@click.option('--ledger', help='Publish ledger path (default: <store>/wordpress_ledger.json)')
+@click.pass_obj
+def sync(store, ids, select_all, dry_run, status, workers, ledger):
+    """Push only the case studies whose content changed since they were last sent to WordPress."""
+    from wordpress import WordPressClient, Publisher, PublishLedger, TaxonomyCache, plan_sync
+
+    ledger = PublishLedger(ledger or os.path.join(store.directory, 'wordpress_ledger.json'))
+    plan = plan_sync(ledger, _select_case_studies(store, ids, select_all))
+    for item in plan.pending:
+        if item.action == 'create':
+            click.echo(f"+ {item.case_study.id}: new post, {item.payload_bytes:,} bytes")
+        else:
+            changed = ', '.join(item.fields)
+            blocks = f", {item.blocks_changed} of {item.blocks_total} blocks" if 'content' in item.fields else ''
+            click.echo(f"~ {item.case_study.id}: post {item.post_id} {changed}{blocks}, "
+                       f"{item.payload_bytes:,} bytes")
+    click.echo(plan.summary())
+    if dry_run or not plan.pending:
+        return
+
+    try:
+        client = WordPressClient.from_env(pool_size=workers)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    publisher = Publisher(client, ledger, max_workers=workers, taxonomy=TaxonomyCache(client))
+
+    def report(result):
+        if result.error:
+            click.echo(f"❌ {result.case_study_id}: {result.error}", err=True)
+        else:
+            verb = 'updated' if result.updated else 'created' if result.created else 'already published'
+            click.echo(f"✅ {result.case_study_id}: post {result.post_id} {verb}")
+
+    results = publisher.sync(plan, status=status, on_result=report)
+    client.close()
+
+    failed = sum(1 for r in results if r.error)
+    click.echo(f"Done: {len(results) - failed} sent, {failed} failed, "
+               f"{len(plan.items) - len(plan.pending)} unchanged")
+    if failed:
+        sys.exit(1)
+
+
+@cli.command('process-images')
+@click.argument('ids', nargs=-1)
+@click.option('--all', 'select_all', is_flag=True, help='Process every stored case study')
+@click.option('--workers', '-w', type=int, help='Encoder processes (default: IMAGE_PROCESS_WORKERS or CPUs, max 4)')
+@click.option('--force', is_flag=True, help='Re-encode images that already have variants')
+@click.pass_obj
+def process_images(store, ids, select_all, workers, force):
+    """Create resized WebP/AVIF variants of stored feature images, stripping metadata."""
+    from media import ImageProcessor, apply_result
+
+    processor = ImageProcessor.from_env()
+    if processor is None:
+        raise click.ClickException('Image processing is unavailable (install Pillow, IMAGE_PROCESS_WORKERS > 0)')
+    if workers:
+        processor.max_workers = workers
+
+    pending = [cs for cs in _select_case_studies(store, ids, select_all)
+               if cs.feature_image is not None and (force or not cs.feature_image.variants)]
+    click.echo(f"Processing {len(pending)} feature images with {processor.max_workers} processes...")
+    # Submit everything first so the pool stays busy; results are saved as they arrive
+    total_saved = total_ms = failed = 0
+    try:
+        futures = [(cs, processor.submit(cs.feature_image)) for cs in pending]
+        for case_study, future in futures:
+            try:
+                image = apply_result(case_study.feature_image, future.result())
+            except Exception as e:
+                failed += 1
+                click.echo(f"❌ {case_study.id}: {e}", err=True)
+                continue
+            store.save(case_study)
+            total_saved += image.bytes_saved
+            total_ms += image.encode_ms
+            click.echo(f"✅ {case_study.id}: {image.size:,} → {image.size - image.bytes_saved:,} bytes "
+                       f"({image.bytes_saved:,} saved), {len(image.variants)} variants, {image.encode_ms:.0f} ms")
+    finally:
+        processor.shutdown()
+
+    click.echo(f"Done: {len(pending) - failed} processed, {total_saved:,} bytes saved, "
+               f"{total_ms:.0f} ms total encode time")
+    if failed:
+        sys.exit(1)
+
+
+@cli.command('export-static')
+@click.argument('output_dir')
+@click.option('--workers', '-w', type=int, help='Render processes (default: CPU count)')
+@click.option('--force', is_flag=True, help='Re-render pages even if their inputs are unchanged')
+@click.option('--prune', is_flag=True, help='Delete pages and assets for case studies no longer stored')
+@click.pass_obj
+def export_static(store, output_dir, workers, force, prune):
+    """Pre-render every stored case study preview to static HTML for a CDN."""
+    import time
+    from export import StaticSiteExporter
+
+    exporter = StaticSiteExporter(store, output_dir, workers=workers)
+    started = time.perf_counter()
+    report = exporter.export(force=force, prune=prune)
+    elapsed = time.perf_counter() - started
+
+    for case_study_id, error in report.errors.items():
+        click.echo(f"❌ {case_study_id}: {error}", err=True)
+    click.echo(f"Exported to {output_dir} in {elapsed:.1f}s: {len(report.rendered)} rendered, "
+               f"{len(report.skipped)} unchanged, {len(report.removed)} removed"
+               + (f", {report.assets_removed} unused assets deleted" if prune else ''))
+    if report.errors:
+        sys.exit(1)
+
+
+@cli.command('export-wxr')
+@click.argument('output')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output (implied by an OUTPUT ending in .gz)')
+@click.option('--max-size', help='Split into self-contained parts of at most this size, e.g. 25MB')
+@click.option('--status', default='draft', type=click.Choice(['draft', 'pending', 'publish']),
+              help='Status of the imported posts')
+@click.option('--author', default='admin', show_default=True, help='WordPress user name the posts are assigned to')
+@click.option('--site-url', default='', help='Site the export is for (used for post links)')
+@click.option('--post-type', envvar='WORDPRESS_POST_TYPE', default='case', show_default=True,
+              help='Post type, as for publish (WORDPRESS_POST_TYPE)')
+@click.option('--category-taxonomy', envvar='WORDPRESS_CATEGORY_TAXONOMY', default='case_category', show_default=True,
+              help='Taxonomy of the industry term, as for publish (WORDPRESS_CATEGORY_TAXONOMY)')
+@click.pass_obj
+def export_wxr(store, output, compress, max_size, status, author, site_url, post_type, category_taxonomy):
+    """Stream the archive into WordPress import (WXR) file(s); '-' writes to stdout."""
+    import time
+    from export.wxr import export_wxr as write_wxr, parse_size, stream_wxr
+
+    options = dict(status=status, author=author, site_url=site_url, post_type=post_type,
+                   category_taxonomy=category_taxonomy)
+    if output == '-':
+        if max_size:
+            raise click.UsageError('--max-size needs a file OUTPUT')
+        out = sys.stdout.buffer
+        for chunk in stream_wxr(store, compress, **options):
+            out.write(chunk)
+        out.flush()
+        return
+    try:
+        max_bytes = parse_size(max_size) if max_size else None
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--max-size')
+
+    started = time.perf_counter()
+    report = write_wxr(store, output, max_bytes, compress, **options)
+    elapsed = time.perf_counter() - started
+    for path in report.files:
+        click.echo(path)
+    click.echo(f"Exported {report.posts} posts to {len(report.files)} file(s), "
+               f"{report.bytes_written / 1e6:.1f} MB in {elapsed:.1f}s")
+
+
+@cli.command('export-columnar')
+@click.argument('output')
+@click.option('--images', is_flag=True, help='Include feature images (needed for a lossless round trip)')
+@click.option('--ledger', envvar='USAGE_LEDGER', help='Usage ledger path (default: <store>/usage_ledger.jsonl)')
+@click.option('--no-usage', is_flag=True, help="Don't join token usage from the ledger")
+@click.pass_obj
+def export_columnar(store, output, images, ledger, no_usage):
+    """Write the archive to a columnar file, one row per section (.arrow to memory-map, .parquet to ship)."""
+    import time
+    from runtime.usage import UsageLedger, default_ledger_path
+    from storage.columnar import usage_by_section, write_columnar
+
+    started = time.perf_counter()
+    usage = None
+    if not no_usage:
+        usage = usage_by_section(UsageLedger(ledger or default_ledger_path(store.directory)).read())
+    try:
+        report = write_columnar(store, output, include_images=images, usage=usage)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Wrote {report.case_studies} case studies ({report.rows} rows) to {output}, "
+               f"{report.bytes_written / 1e6:.1f} MB in {time.perf_counter() - started:.1f}s")
+
+
+@cli.command('import-columnar')
+@click.argument('input_path', metavar='INPUT')
+@click.option('--overwrite', is_flag=True, help='Replace case studies that are already stored')
+@click.pass_obj
+def import_columnar(store, input_path, overwrite):
+    """Load case studies from a columnar file back into the archive."""
+    from storage.columnar import read_case_studies
+
+    saved = skipped = 0
+    try:
+        for case_study in read_case_studies(input_path):
+            if not overwrite and case_study.id and store.exists(case_study.id):
+                skipped += 1
+                continue
+            store.save(case_study)
+            saved += 1
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Imported {saved} case studies, {skipped} already stored")
+
+
+@cli.command()
+@click.argument('ids', nargs=-1)
+@click.option('--all', 'select_all', is_flag=True, help='Check every stored case study')
+@click.option('--failing', is_flag=True, help='List each section that breaks a structural or quality rule')
+@click.option('--json', 'as_json', is_flag=True, help='Print every section\'s metrics as JSON')
+@click.pass_obj
+def quality(store, ids, select_all, failing, as_json):
+    """Readability, sentence length, bullet density, repetition and keyword coverage per section."""
+    import json
+    import time
+    from ai import quality as quality_metrics
+    from ai.validation import validate_section
+
+    if not quality_metrics.available():
+        raise click.ClickException('Quality metrics need NumPy (pip install numpy)')
+    case_studies = _select_case_studies(store, ids, select_all)
+    started = time.perf_counter()
+    batch, pairs = quality_metrics.measure_sections(case_studies)
+    rows = batch.rows()
+    results = [validate_section(section.section_type, section.content, quality=row)
+               for row, (_, section) in zip(rows, pairs)]
+    elapsed = time.perf_counter() - started
+
+    if as_json:
+        click.echo(json.dumps([dict(case_study=case_study.id, section=section.section_type, **row,
+                                    problems=result.problems)
+                               for row, result, (case_study, section) in zip(rows, results, pairs)], indent=2))
+        return
+
+    click.echo(f"{'section':<12} {'n':>6} {'ease':>6} {'grade':>6} {'sent p90':>8} {'bullets':>8} "
+               f"{'repeats':>8} {'keywords':>8}   (medians)")
+    for summary in quality_metrics.summarize(batch, [section.section_type for _, section in pairs]):
+        def cell(name, width, spec='.1f'):
+            value = summary[name]
+            return f"{'-':>{width}}" if value is None else f"{value:>{width}{spec}}"
+        click.echo(f"{summary['group']:<12} {summary['sections']:>6} {cell('reading_ease', 6)} "
+                   f"{cell('grade_level', 6)} {cell('sentence_p90', 8, '.0f')} {cell('bullet_density', 8, '.0%')} "
+                   f"{cell('repeated_phrase_rate', 8, '.0%')} {cell('keyword_coverage', 8, '.0%')}")
+    flagged = [(case_study, section, result) for result, (case_study, section) in zip(results, pairs)
+               if result.problems]
+    if failing:
+        for case_study, section, result in flagged:
+            click.echo(f"❌ {case_study.id} {section.section_type}: {'; '.join(result.problems)}")
+    click.echo(f"{len(pairs)} sections from {len(case_studies)} case studies measured in {elapsed:.2f}s; "
+               f"{len(flagged)} break a rule")
+
+
+@cli.command('usage-report')
+@click.option('--ledger', envvar='USAGE_LEDGER', help='Usage ledger path (default: <store>/usage_ledger.jsonl)')
+@click.option('--since', default='7d', show_default=True, help='Start of the window: 24h, 7d, 2w or an ISO date')
+@click.option('--until', help='End of the window (same formats; default now)')
+@click.option('--by', 'group_by', multiple=True,
+              type=click.Choice(['section', 'model', 'case_study', 'batch', 'day', 'cache']),
+              help='Group by (repeatable; default section and model; cache = prompt cache hit/miss)')
+@click.option('--case-study', help='Only calls made for this case study id')
+@click.option('--batch', help='Only calls made by this batch id')
+@click.option('--model', help='Only calls to this model')
+@click.option('--json', 'as_json', is_flag=True, help='Print the rows as JSON')
+@click.pass_obj
+def usage_report(store, ledger, since, until, group_by, case_study, batch, model, as_json):
+    """Token spend and latency percentiles from the LLM usage ledger."""
+    import json
+    from runtime.usage import UsageLedger, aggregate, default_ledger_path, parse_time
+
+    try:
+        start = parse_time(since)
+        end = parse_time(until) if until else None
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    records = UsageLedger(ledger or default_ledger_path(store.directory)).read(start, end)
+    filters = {'case_study': case_study, 'batch': batch, 'model': model}
+    records = (r for r in records if all(value is None or getattr(r, name) == value for name, value in filters.items()))
+    rows = aggregate(records, group_by or ('section', 'model'))
+
+    if as_json:
+        click.echo(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        click.echo("No LLM calls recorded in this window.")
+        return
+    keys = list(rows[0])[:len(group_by or ('section', 'model'))]
+    click.echo(f"{' / '.join(keys):<40} {'calls':>6} {'prompt':>10} {'cached':>9} {'cache%':>6} {'output':>9} "
+               f"{'cost $':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for row in rows:
+        label = ' / '.join(str(row[key] or '-') for key in keys)
+        latency = row['latency_ms']
+        cost = f"{row['cost_usd']:.4f}" + ('*' if row.get('unpriced_calls') else '')
+        click.echo(f"{label:<40} {row['calls']:>6} {row['prompt_tokens']:>10,} {row['cached_tokens']:>9,} "
+                   f"{row['cached_ratio']:>6.0%} {row['completion_tokens']:>9,} {cost:>10} {latency['p50']:>8.0f} "
+                   f"{latency['p95']:>8.0f} {latency['p99']:>8.0f}")
+    total_cost = sum(row['cost_usd'] for row in rows)
+    total_calls = sum(row['calls'] for row in rows)
+    total_prompt = sum(row['prompt_tokens'] for row in rows)
+    total_cached = sum(row['cached_tokens'] for row in rows)
+    savings = sum(row['cache_savings_usd'] for row in rows)
+    click.echo(f"Total: {total_calls} calls, ${total_cost:.4f}; "
+               f"{total_cached / total_prompt if total_prompt else 0:.0%} of prompt tokens served from the "
+               f"provider cache, saving ${savings:.4f}")
+    if any(row.get('unpriced_calls') for row in rows):
+        click.echo("* includes calls to models without a known price (set LLM_PRICES)")
+
+
+def _search_index(store: CaseStudyStore):
+    index = store.search_index
+    if index is None:
+        raise click.ClickException('Search is disabled (SEARCH_INDEX=off) or SQLite lacks FTS5')
+    return index
+
+
+@cli.command()
+@click.argument('query', nargs=-1, required=True)
+@click.option('--limit', '-n', default=20, show_default=True, help='Results to show')
+@click.option('--offset', default=0, help='Results to skip (for paging)')
+@click.option('--json', 'as_json', is_flag=True, help='Print the results as JSON')
+@click.pass_obj
+def search(store, query, limit, offset, as_json):
+    """Full-text search over stored case studies, e.g. 'CEL-FI QUATRA' industry:healthcare."""
+    import json
+    import time
+
+    index = _search_index(store)
+    started = time.perf_counter()
+    try:
+        hits = index.search(' '.join(query), limit, offset)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if as_json:
+        click.echo(json.dumps([hit.as_dict() for hit in hits], indent=2, ensure_ascii=False))
+        return
+    if not hits:
+        click.echo("No matching case studies.")
+        return
+    for hit in hits:
+        click.echo(f"{hit.id}  {hit.title}")
+        click.echo(f"    {hit.industry or '-'} · {(hit.created_at or '')[:10] or '-'} · score {hit.score:.3g}")
+        click.echo(f"    {' '.join(hit.snippet.split())}")
+    click.echo(f"{len(hits)} result(s) in {elapsed_ms:.1f} ms")
+
+
+@cli.command()
+@click.option('--rebuild', is_flag=True, help='Drop the index and index every case study again')
+@click.pass_obj
+def reindex(store, rebuild):
+    """Bring the search index up to date with the archive (new, changed and deleted files)."""
+    import time
+
+    index = _search_index(store)
+    started = time.perf_counter()
+    if rebuild:
+        indexed, removed = index.rebuild(store), 0
+    else:
+        indexed, removed = index.sync(store)
+    click.echo(f"Indexed {indexed}, removed {removed} in {time.perf_counter() - started:.1f}s; "
+               f"{len(index)} case studies searchable")
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,3 @@
+from .processing import ImageProcessor, ProcessedImage, process_image, apply_result
+
+__all__ = ['ImageProcessor', 'ProcessedImage', 'process_image', 'apply_result']
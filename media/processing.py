@@ -0,0 +1,192 @@
+"""
+Feature image post-processing: responsive variants, modern encodings and
+metadata stripping.
+
+Encoding is CPU-bound, so ``ImageProcessor`` runs it in a process pool and
+web workers or the batch CLI only wait on a future. Pillow is optional
+(``pip install Pillow``; AVIF needs Pillow 11.2+ built with libavif or the
+``pillow-avif-plugin`` package); without it images are left as generated.
+"""
+
+import importlib.util
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from models.case_study import FeatureImage, ImageVariant
+from runtime import metrics
+
+logger = logging.getLogger('case_study.images')
+
+DEFAULT_WIDTHS = (1600, 1024, 640, 320)
+DEFAULT_FORMATS = ('avif', 'webp')
+
+MIME_TYPES = {'webp': 'image/webp', 'avif': 'image/avif', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+
+
+@dataclass
+class ProcessedImage:
+    """Worker result: the encoded variants and what they cost."""
+    original_bytes: int
+    variants: List[Tuple[str, int, int, bytes]] = field(default_factory=list)  # (format, width, height, data)
+    skipped_formats: List[str] = field(default_factory=list)
+    encode_ms: float = 0.0
+
+
+def _open_plugins(formats: Sequence[str]) -> List[str]:
+    """Register optional encoders and return the formats that can't be written."""
+    from PIL import features
+    missing = []
+    for fmt in formats:
+        if fmt == 'avif' and not features.check('avif'):
+            try:
+                import pillow_avif  # noqa: F401  registers the AVIF plugin
+            except ImportError:
+                missing.append(fmt)
+        elif fmt == 'webp' and not features.check('webp'):
+            missing.append(fmt)
+    return missing
+
+
+def process_image(data: bytes, widths: Sequence[int] = DEFAULT_WIDTHS,
+                  formats: Sequence[str] = DEFAULT_FORMATS, quality: int = 75) -> ProcessedImage:
+    """
+    Encode ``data`` at each width (never upscaling) in each format.
+
+    Runs in a worker process. The pixels are copied into a fresh image, so
+    EXIF, XMP, ICC and text chunks from the source are never written out.
+    """
+    from PIL import Image, ImageOps
+
+    started = time.perf_counter()
+    result = ProcessedImage(original_bytes=len(data))
+    result.skipped_formats = _open_plugins(formats)
+
+    with Image.open(io.BytesIO(data)) as source:
+        # Bake in the EXIF orientation before the EXIF block is dropped
+        source = ImageOps.exif_transpose(source)
+        has_alpha = source.mode in ('RGBA', 'LA') or (source.mode == 'P' and 'transparency' in source.info)
+        mode = 'RGBA' if has_alpha else 'RGB'
+        pixels = source.convert(mode)
+    clean = Image.new(mode, pixels.size)
+    clean.paste(pixels)
+
+    for width in sorted({min(w, clean.width) for w in widths}, reverse=True):
+        height = max(1, round(clean.height * width / clean.width))
+        resized = clean if width == clean.width else clean.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            if fmt in result.skipped_formats:
+                continue
+            out = io.BytesIO()
+            if fmt == 'webp':
+                resized.save(out, 'WEBP', quality=quality, method=4)
+            elif fmt == 'avif':
+                resized.save(out, 'AVIF', quality=quality, speed=6)
+            elif fmt == 'jpeg':
+                resized.convert('RGB').save(out, 'JPEG', quality=quality, optimize=True, progressive=True)
+            else:
+                resized.save(out, 'PNG', optimize=True)
+            result.variants.append((fmt, width, height, out.getvalue()))
+
+    result.encode_ms = (time.perf_counter() - started) * 1000
+    return result
+
+
+def pillow_available() -> bool:
+    return importlib.util.find_spec('PIL') is not None
+
+
+def _env_list(name: str, default: Sequence) -> List[str]:
+    value = os.getenv(name)
+    return [item.strip() for item in value.split(',') if item.strip()] if value else list(default)
+
+
+class ImageProcessor:
+    """
+    Process pool for image post-processing.
+
+    Workers are started with ``spawn`` by default: forking a threaded web
+    server process can copy held locks into the child.
+    """
+
+    def __init__(self, max_workers: int = None, widths: Sequence[int] = DEFAULT_WIDTHS,
+                 formats: Sequence[str] = DEFAULT_FORMATS, quality: int = 75, start_method: str = 'spawn'):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.widths = tuple(widths)
+        self.formats = tuple(formats)
+        self.quality = quality
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional['ImageProcessor']:
+        """
+        Processor configured from IMAGE_PROCESS_* variables, or None when
+        disabled (IMAGE_PROCESS_WORKERS=0) or Pillow isn't installed.
+        """
+        workers = os.getenv('IMAGE_PROCESS_WORKERS')
+        if workers is not None and int(workers) <= 0:
+            return None
+        if not pillow_available():
+            logger.warning('Pillow is not installed; feature images are stored unprocessed')
+            return None
+        return cls(
+            max_workers=int(workers) if workers else None,
+            widths=[int(w) for w in _env_list('IMAGE_VARIANT_WIDTHS', DEFAULT_WIDTHS)],
+            formats=[f.lower() for f in _env_list('IMAGE_FORMATS', DEFAULT_FORMATS)],
+            quality=int(os.getenv('IMAGE_QUALITY', '75')),
+            start_method=os.getenv('IMAGE_PROCESS_START_METHOD', 'spawn'),
+        )
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                )
+            return self._executor
+
+    def submit(self, image: FeatureImage) -> Future:
+        """Start processing ``image``; the future resolves to a ProcessedImage."""
+        return self._pool().submit(process_image, image.read(), self.widths, self.formats, self.quality)
+
+    def process(self, image: FeatureImage) -> FeatureImage:
+        """Process ``image`` in the pool and attach the variants to it."""
+        try:
+            result = self.submit(image).result()
+        except BrokenProcessPool:
+            # A worker died (OOM, segfault in a codec): start a fresh pool next time
+            self.shutdown()
+            raise
+        return apply_result(image, result)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+
+def apply_result(image: FeatureImage, result: ProcessedImage) -> FeatureImage:
+    """Attach a worker result to ``image`` and log what it saved."""
+    image.variants = [
+        ImageVariant(data=data, mime_type=MIME_TYPES[fmt], width=width, height=height)
+        for fmt, width, height, data in result.variants
+    ]
+    image.encode_ms = round(result.encode_ms, 1)
+    metrics.increment('image.processed')
+    metrics.increment('image.bytes_saved', image.bytes_saved)
+    if result.skipped_formats:
+        logger.warning('No encoder for %s; skipped', ', '.join(result.skipped_formats))
+    logger.info('Processed feature image: %d variants, %d bytes saved, %.1f ms encode',
+                len(image.variants), image.bytes_saved, result.encode_ms)
+    return image
@@ -1,3 +1,5 @@
-from .case_study import CaseStudyInput, CaseStudySection, CaseStudy
+from .case_study import (CaseStudyInput, CaseStudySection, SectionCandidate, CaseStudy,
+                         FeatureImage, ImageFile, ImageVariant)
 
-__all__ = ['CaseStudyInput', 'CaseStudySection', 'CaseStudy']
+__all__ = ['CaseStudyInput', 'CaseStudySection', 'SectionCandidate', 'CaseStudy', 'FeatureImage', 'ImageFile',
+           'ImageVariant']
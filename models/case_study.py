@@ -1,4 +1,8 @@
-from pydantic import BaseModel, Field
+import base64
+import hashlib
+import os
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
 from typing import List, Optional
 
 
@@ -13,12 +17,180 @@ class CaseStudyInput(BaseModel):
     technologies_used: Optional[List[str]] = Field(None, description="Technologies or products used")
     additional_context: Optional[str] = Field(None, description="Any additional context or details")
 
+    @classmethod
+    def from_payload(cls, data) -> "CaseStudyInput":
+        """Build an input from an API/form payload, raising ValueError if invalid."""
+        if not isinstance(data, dict):
+            raise ValueError('Expected a JSON object')
+
+        # Validate required fields
+        required_fields = ['client_name', 'industry', 'main_challenge', 'solution_provided']
+        for field in required_fields:
+            if not data.get(field):
+                raise ValueError(f'Missing required field: {field}')
+
+        # Parse technologies
+        tech_list = None
+        if data.get('technologies_used'):
+            if isinstance(data['technologies_used'], str):
+                tech_list = [tech.strip() for tech in data['technologies_used'].split(',') if tech.strip()]
+            else:
+                tech_list = data['technologies_used']
+
+        return cls(
+            client_name=data['client_name'],
+            industry=data['industry'],
+            main_challenge=data['main_challenge'],
+            solution_provided=data['solution_provided'],
+            location=data.get('location') or None,
+            project_scale=data.get('project_scale') or None,
+            technologies_used=tech_list,
+            additional_context=data.get('additional_context') or None
+        )
+
+    def fingerprint(self) -> str:
+        """
+        Hash identifying equivalent inputs: case, whitespace and technology
+        order don't matter.
+        """
+        def norm(value):
+            return ' '.join(value.lower().split()) if value else ''
+
+        parts = [norm(self.client_name), norm(self.industry), norm(self.main_challenge),
+                 norm(self.solution_provided), norm(self.location), norm(self.project_scale),
+                 ','.join(sorted(norm(tech) for tech in self.technologies_used or [])),
+                 norm(self.additional_context)]
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+
+class SectionCandidate(BaseModel):
+    """One alternative text for a section, with its local ranking score."""
+    content: str
+    score: float = 0.0
+    notes: List[str] = Field(default_factory=list)
+
 
 class CaseStudySection(BaseModel):
     """Represents a section of the case study."""
     title: str
     content: str
     section_type: str  # summary, client, challenges, solution, results
+    candidates: Optional[List[SectionCandidate]] = None  # best first; set when several were generated
+    selected: Optional[int] = None  # index into candidates of the current content
+    retries: Optional[int] = None  # regenerations after failed structural validation
+    issues: Optional[List[str]] = None  # validation problems left when the retry budget ran out
+    stale: Optional[bool] = None  # served from an earlier generation while the LLM circuit was open
+
+
+class ImageFile(BaseModel):
+    """
+    Image bytes: held in ``data`` until the case study is stored, then in a
+    file beside it (``path``, relative to the store directory) read on demand.
+    """
+    # Case studies stored before images moved out of the JSON still load
+    model_config = ConfigDict(ser_json_bytes='base64', val_json_bytes='base64')
+
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+    size: Optional[int] = None
+    _root: Optional[str] = PrivateAttr(default=None)
+
+    @model_validator(mode='after')
+    def _measure(self):
+        if self.data is not None:
+            self.size = len(self.data)
+        return self
+
+    def attach(self, root: str) -> None:
+        """Resolve ``path`` against the store directory ``root``."""
+        self._root = root
+
+    def read(self) -> bytes:
+        """The image bytes, from memory or from the stored file."""
+        if self.data is not None:
+            return self.data
+        if self.path is None or self._root is None:
+            raise FileNotFoundError('Image has neither data nor a stored file')
+        with open(os.path.join(self._root, self.path), 'rb') as f:
+            return f.read()
+
+    def inline(self):
+        """A copy carrying its bytes in ``data``, for use outside the store."""
+        return self.model_copy(update={'data': self.read(), 'path': None})
+
+
+class ImageVariant(ImageFile):
+    """A resized, re-encoded copy of a feature image."""
+    mime_type: str
+    width: int
+    height: int
+
+    @property
+    def filename(self) -> str:
+        return f"feature-image-{self.width}w." + self.mime_type.rpartition('/')[2]
+
+
+class FeatureImage(ImageFile):
+    """Generated feature image attached to a case study."""
+    mime_type: str = 'image/png'
+    width: Optional[int] = None
+    height: Optional[int] = None
+    alt_text: str = ''
+    prompt: Optional[str] = None
+    backend: Optional[str] = None
+    variants: List[ImageVariant] = Field(default_factory=list)
+    encode_ms: Optional[float] = None
+
+    @property
+    def filename(self) -> str:
+        return 'feature-image.' + self.mime_type.rpartition('/')[2]
+
+    @property
+    def files(self) -> List[ImageFile]:
+        """The original and its variants."""
+        return [self, *self.variants]
+
+    def attach(self, root: str) -> None:
+        super().attach(root)
+        for variant in self.variants:
+            variant.attach(root)
+
+    def inline(self) -> "FeatureImage":
+        image = super().inline()
+        image.variants = [variant.inline() for variant in self.variants]
+        return image
+
+    def variant(self, filename: str) -> Optional[ImageVariant]:
+        return next((v for v in self.variants if v.filename == filename), None)
+
+    def variants_of(self, mime_type: str) -> List[ImageVariant]:
+        """Variants in one encoding, widest first."""
+        return sorted((v for v in self.variants if v.mime_type == mime_type), key=lambda v: -v.width)
+
+    def best_variant(self, mime_types=('image/webp', 'image/avif')) -> Optional[ImageVariant]:
+        """The widest variant in the first available encoding (for uploads)."""
+        for mime_type in mime_types:
+            variants = self.variants_of(mime_type)
+            if variants:
+                return variants[0]
+        return None
+
+    @property
+    def bytes_saved(self) -> int:
+        """Original size minus the smallest full-width encoding."""
+        full_width = [v.size for v in self.variants if v.width == max(x.width for x in self.variants)]
+        return max(0, self.size - min(full_width)) if full_width else 0
+
+    def data_uri(self) -> str:
+        """Inline ``data:`` URI for previews."""
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.read()).decode('ascii')}"
+
+
+# Fields returned by the API; everything else on CaseStudy is storage metadata.
+# None values are dropped, so ``id`` and the candidate fields only appear when set.
+PAYLOAD_FIELDS = {'id': True, 'title': True, 'wordpress_content': True, 'stale': True}
+PAYLOAD_SECTION_FIELDS = {'sections': {'__all__': {'title', 'content', 'section_type', 'candidates', 'selected',
+                                                 'retries', 'issues', 'stale'}}}
 
 
 class CaseStudy(BaseModel):
@@ -26,3 +198,38 @@ class CaseStudy(BaseModel):
     title: str
     sections: List[CaseStudySection]
     wordpress_content: str
+    id: Optional[str] = None
+    client_name: Optional[str] = None
+    case_input: Optional[CaseStudyInput] = None
+    created_at: Optional[datetime] = None
+    feature_image: Optional[FeatureImage] = None
+    stale: Optional[bool] = None  # True when any section is stale
+
+    def to_payload(self, include_sections: bool = True) -> dict:
+        """
+        API representation of the case study.
+
+        The raw sections repeat most of ``wordpress_content``; clients that only
+        need the formatted markup can leave them out.
+        """
+        return self.model_dump(include=self._payload_include(include_sections), exclude_none=True)
+
+    def to_payload_json(self, include_sections: bool = True) -> str:
+        """``to_payload`` serialized straight to JSON without an intermediate dict."""
+        return self.model_dump_json(include=self._payload_include(include_sections), exclude_none=True)
+
+    @staticmethod
+    def _payload_include(include_sections: bool) -> dict:
+        include = dict(PAYLOAD_FIELDS)
+        if include_sections:
+            include.update(PAYLOAD_SECTION_FIELDS)
+        return include
+
+    def to_json(self) -> str:
+        """Full storage representation."""
+        return self.model_dump_json(exclude_none=True)
+
+    @classmethod
+    def from_json(cls, data) -> "CaseStudy":
+        """Load a stored case study (str or bytes) straight into the model."""
+        return cls.model_validate_json(data)
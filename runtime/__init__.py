@@ -0,0 +1,3 @@
+from .timing import RequestTimeline, phase, timed, current_timeline
+
+__all__ = ['RequestTimeline', 'phase', 'timed', 'current_timeline']
@@ -0,0 +1,128 @@
+"""
+Admission control for generation requests.
+
+A generation pins a worker thread and makes several upstream LLM calls, so
+letting every request in during a burst just makes all of them time out.
+``AdmissionController`` caps the number of in-flight generations, parks a
+few extra requests in a short bounded queue and rejects the rest straight
+away with a ``Retry-After`` hint. An optional per-client limit keeps one
+caller from taking every slot.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+from . import metrics
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; maps to HTTP 503."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server busy ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """A held generation slot. ``release`` is idempotent."""
+
+    def __init__(self, controller: 'AdmissionController', client_key: Optional[str]):
+        self._controller = controller
+        self._client_key = client_key
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(self._client_key, time.monotonic() - self._started)
+
+
+class AdmissionController:
+    """Bounded in-flight limit with a short wait queue and per-client fair share."""
+
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 8, queue_timeout: float = 5.0,
+                 per_client_limit: int = 0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.per_client_limit = per_client_limit
+        self.in_flight = 0
+        self.waiting = 0
+        self._per_client: Counter = Counter()
+        self._avg_duration = 30.0  # seconds; refined from completed requests
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_env(cls) -> 'AdmissionController':
+        return cls(
+            max_in_flight=int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '8')),
+            max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', '8')),
+            queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '5')),
+            per_client_limit=int(os.getenv('ADMISSION_PER_CLIENT_LIMIT', '0')),
+        )
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up, from the average generation time."""
+        backlog = (self.waiting + self.in_flight) / max(self.max_in_flight, 1)
+        return max(1, math.ceil(self._avg_duration * max(backlog, 1) / 2))
+
+    def acquire(self, client_key: Optional[str] = None) -> AdmissionTicket:
+        """Take a slot, waiting at most ``queue_timeout``; raise AdmissionRejected otherwise."""
+        with self._cond:
+            if self.per_client_limit and client_key is not None \
+                    and self._per_client[client_key] >= self.per_client_limit:
+                self._reject('client_limit')
+
+            if self.in_flight >= self.max_in_flight or self.waiting:
+                if self.waiting >= self.max_queue:
+                    self._reject('queue_full')
+                self.waiting += 1
+                self._per_client[client_key] += 1
+                metrics.increment('admission.queued')
+                try:
+                    admitted = self._cond.wait_for(lambda: self.in_flight < self.max_in_flight,
+                                                   timeout=self.queue_timeout)
+                finally:
+                    self.waiting -= 1
+                    self._per_client[client_key] -= 1
+                if not admitted:
+                    self._reject('queue_timeout')
+
+            self.in_flight += 1
+            self._per_client[client_key] += 1
+            self._publish()
+        metrics.increment('admission.admitted')
+        return AdmissionTicket(self, client_key)
+
+    @contextmanager
+    def admit(self, client_key: Optional[str] = None):
+        ticket = self.acquire(client_key)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def _release(self, client_key: Optional[str], duration: float) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._per_client[client_key] -= 1
+            if self._per_client[client_key] <= 0:
+                del self._per_client[client_key]
+            self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+            self._publish()
+            self._cond.notify()
+
+    def _reject(self, reason: str):
+        metrics.increment(f'admission.rejected.{reason}')
+        raise AdmissionRejected(reason, self.retry_after())
+
+    def _publish(self) -> None:
+        metrics.set_gauge('admission.in_flight', self.in_flight)
+        metrics.set_gauge('admission.waiting', self.waiting)
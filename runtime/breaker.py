@@ -0,0 +1,189 @@
+"""
+Circuit breaker for the upstream LLM API.
+
+When the API degrades, every section call would otherwise wait out its own
+timeout and the workers pile up behind it. ``CircuitBreaker`` watches the
+outcome and latency of recent calls; once too many of them fail or are
+slow it opens and rejects calls immediately with ``CircuitOpen``. After a
+cool-down it lets a few probe calls through (half-open): a successful probe
+closes the circuit, a failed one opens it again.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Deque, Optional, Tuple
+
+from . import metrics
+from .deadline import DeadlineExceeded
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a backend whose circuit is open; maps to HTTP 503."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} is unavailable (circuit open), retry after {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Rolling-window breaker.
+
+    Opens when, over the last ``window`` seconds and at least ``min_calls``
+    calls, the share of failed calls reaches ``failure_rate`` or the share
+    of calls slower than ``slow_call_ms`` reaches ``slow_call_rate``. Stays
+    open for ``open_seconds``, then admits up to ``half_open_probes``
+    concurrent probes.
+    """
+
+    def __init__(self, name: str, failure_rate: float = 0.5, slow_call_ms: float = 30000,
+                 slow_call_rate: float = 0.8, min_calls: int = 5, window: float = 60.0,
+                 open_seconds: float = 30.0, half_open_probes: int = 1, clock=time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_ms = slow_call_ms
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self._clock = clock
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()  # (time, failed, slow)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name: str = 'llm') -> Optional['CircuitBreaker']:
+        """Breaker configured from ``LLM_BREAKER_*``; None when ``LLM_BREAKER=off``."""
+        if os.getenv('LLM_BREAKER', 'on').lower() in ('off', '0', 'false'):
+            return None
+        return cls(
+            name,
+            failure_rate=float(os.getenv('LLM_BREAKER_FAILURE_RATE', '0.5')),
+            slow_call_ms=float(os.getenv('LLM_BREAKER_SLOW_MS', '30000')),
+            slow_call_rate=float(os.getenv('LLM_BREAKER_SLOW_RATE', '0.8')),
+            min_calls=int(os.getenv('LLM_BREAKER_MIN_CALLS', '5')),
+            window=float(os.getenv('LLM_BREAKER_WINDOW', '60')),
+            open_seconds=float(os.getenv('LLM_BREAKER_OPEN_SECONDS', '30')),
+            half_open_probes=int(os.getenv('LLM_BREAKER_PROBES', '1')),
+        )
+
+    def before_call(self) -> None:
+        """Admit a call or raise CircuitOpen. Every admitted call must be followed by ``record``."""
+        with self._lock:
+            if self.state == OPEN:
+                if self._clock() - self._opened_at < self.open_seconds:
+                    self._reject()
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self._reject()
+                self._probes += 1
+                metrics.increment(f'breaker.{self.name}.probes')
+
+    @contextmanager
+    def call(self):
+        """
+        Guard one call: ``before_call`` on entry, ``record`` on exit. Only
+        exceptions count as failures; cancellation (``BaseException``) and
+        running out of request time (``DeadlineExceeded``, which says
+        nothing about the API) just give a half-open probe slot back.
+        """
+        self.before_call()
+        started = time.perf_counter()
+        try:
+            yield
+        except DeadlineExceeded:
+            self.abandon()
+            raise
+        except Exception:
+            self.record(False, (time.perf_counter() - started) * 1000)
+            raise
+        except BaseException:
+            self.abandon()
+            raise
+        self.record(True, (time.perf_counter() - started) * 1000)
+
+    def abandon(self) -> None:
+        """An admitted call ended without an outcome."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def record(self, ok: bool, latency_ms: float) -> None:
+        """Report the outcome of an admitted call."""
+        now = self._clock()
+        slow = latency_ms >= self.slow_call_ms
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if ok and not slow:
+                    self._calls.clear()
+                    self._transition(CLOSED)
+                else:
+                    self._open(now)
+                return
+            if self.state == OPEN:
+                # A call admitted before the circuit opened; its outcome no longer matters
+                return
+            self._calls.append((now, not ok, slow))
+            while self._calls and self._calls[0][0] < now - self.window:
+                self._calls.popleft()
+            total = len(self._calls)
+            if total < self.min_calls:
+                return
+            failed = sum(1 for _, f, _ in self._calls if f)
+            slow_calls = sum(1 for _, _, s in self._calls if s)
+            if failed / total >= self.failure_rate or slow_calls / total >= self.slow_call_rate:
+                self._open(now)
+
+    def retry_after(self) -> int:
+        if self.state != OPEN:
+            return 1
+        return max(1, math.ceil(self.open_seconds - (self._clock() - self._opened_at)))
+
+    def _open(self, now: float) -> None:
+        self._opened_at = now
+        self._calls.clear()
+        self._transition(OPEN)
+        metrics.increment(f'breaker.{self.name}.opened')
+
+    def _transition(self, state: str) -> None:
+        self.state = state
+        if state != HALF_OPEN:
+            self._probes = 0
+        metrics.set_gauge(f'breaker.{self.name}.state', _STATE_GAUGE[state])
+
+    def _reject(self):
+        metrics.increment(f'breaker.{self.name}.rejected')
+        raise CircuitOpen(self.name, self.retry_after())
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str = 'llm') -> Optional[CircuitBreaker]:
+    """Process-wide breaker for ``name``, shared by every generator instance."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker.from_env(name)
+        return _breakers[name]
+
+
+def guard(breaker: Optional[CircuitBreaker]):
+    """``breaker.call()``, or a no-op when there is no breaker."""
+    return breaker.call() if breaker is not None else nullcontext()
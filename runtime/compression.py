@@ -0,0 +1,131 @@
+"""
+Negotiated gzip/brotli response compression for the Flask app.
+
+Buffered JSON and HTML responses are compressed when they exceed a size
+threshold. Streamed NDJSON and SSE responses are compressed chunk by chunk
+with a sync flush after each chunk, so clients still receive every line as
+soon as it is produced. Brotli is used when the optional ``brotli`` package
+is installed and the client accepts it.
+"""
+
+import os
+import zlib
+from typing import Iterable, Iterator, Optional
+
+COMPRESSIBLE_TYPES = {'application/json', 'text/html', 'application/x-ndjson', 'text/event-stream'}
+STREAMING_TYPES = {'application/x-ndjson', 'text/event-stream'}
+
+try:
+    import brotli
+except ImportError:
+    # brotli is optional; gzip is always available
+    brotli = None
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an Accept-Encoding header, honouring q-values."""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best = None
+    for coding in candidates:
+        q = accepted.get(coding, accepted.get('*', 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (coding, q)
+    return best[0] if best else None
+
+
+class _StreamCompressor:
+    """Incremental compressor that flushes after every chunk."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == 'br':
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def compress_bytes(data: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    compressor = _StreamCompressor(encoding, gzip_level, brotli_quality)
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(chunks: Iterable, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> Iterator[bytes]:
+    """Compress an iterable of chunks, closing the source when the stream is closed."""
+    compressor = _StreamCompressor(encoding, gzip_level, brotli_quality)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield compressor.compress(chunk)
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def init_app(app) -> None:
+    """
+    Compress Flask responses according to Accept-Encoding.
+
+    ``COMPRESS_MIN_SIZE`` (bytes, default 1024) sets the threshold for buffered
+    responses; ``COMPRESS_GZIP_LEVEL`` and ``COMPRESS_BROTLI_QUALITY`` tune the
+    speed/ratio trade-off.
+    """
+    from flask import request
+
+    min_size = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+    gzip_level = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+    brotli_quality = int(os.getenv('COMPRESS_BROTLI_QUALITY', '5'))
+
+    @app.after_request
+    def _compress_response(response):
+        if response.mimetype not in COMPRESSIBLE_TYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+        if response.status_code < 200 or response.status_code in (204, 304) \
+                or 'Content-Encoding' in response.headers:
+            return response
+
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            if response.mimetype not in STREAMING_TYPES:
+                return response
+            response.response = compress_stream(response.response, encoding, gzip_level, brotli_quality)
+            response.direct_passthrough = False
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compress_bytes(data, encoding, gzip_level, brotli_quality))
+        response.headers['Content-Encoding'] = encoding
+        return response
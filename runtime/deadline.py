@@ -0,0 +1,150 @@
+"""
+End-to-end request deadlines.
+
+A request gets one ``Deadline`` (``REQUEST_DEADLINE`` seconds, or less if
+the client sends ``X-Request-Timeout``). It is bound with ``bind()`` and
+follows the work into worker threads and asyncio tasks via
+``contextvars``, like timeline phases and usage labels. Every LLM call
+asks ``call_timeout()`` for its per-call timeout: the time the request has
+left. Once the deadline passes, or the request is cancelled because the
+client disconnected, calls that have not started yet raise
+``DeadlineExceeded`` instead of spending tokens on an answer nobody will
+read.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from . import metrics
+
+EXPIRED = 'expired'
+DISCONNECTED = 'disconnected'
+
+# Rough prompt size per token, and the completion size assumed before any call has been seen
+CHARS_PER_TOKEN = 4
+DEFAULT_COMPLETION_TOKENS = 400
+
+_current: contextvars.ContextVar = contextvars.ContextVar('request_deadline', default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised instead of starting work for a request that ran out of time or whose client left."""
+
+    def __init__(self, reason: str = EXPIRED):
+        if reason == DISCONNECTED:
+            message = 'Request cancelled: the client disconnected'
+        else:
+            message = 'Request deadline exceeded'
+        super().__init__(message)
+        self.reason = reason
+
+
+class Deadline:
+    """A point in time after which a request's remaining work is abandoned; ``seconds=None`` never expires."""
+
+    def __init__(self, seconds: Optional[float] = None, clock=time.monotonic):
+        self._clock = clock
+        self.expires_at = clock() + seconds if seconds is not None else None
+        self.reason: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_request(cls, timeout_header: Optional[str] = None, setting: str = 'REQUEST_DEADLINE',
+                     default: str = '120') -> 'Deadline':
+        """
+        Deadline of ``setting`` seconds (``off`` for none), shortened by an
+        ``X-Request-Timeout`` header value in seconds. Clients can ask for
+        less time than the server allows, never more.
+        """
+        configured = os.getenv(setting, default)
+        seconds = None if configured.lower() in ('off', 'none', '0') else float(configured)
+        try:
+            requested = float(timeout_header) if timeout_header else None
+        except ValueError:
+            requested = None
+        if requested is not None and requested > 0:
+            seconds = requested if seconds is None else min(seconds, requested)
+        return cls(seconds)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (at least 0), or None without a time limit."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self._clock())
+
+    def cancel(self, reason: str = DISCONNECTED) -> bool:
+        """Abandon the request's remaining work; the first reason sticks. False if already cancelled."""
+        with self._lock:
+            if self.reason is not None:
+                return False
+            self.reason = reason
+        metrics.increment(f'deadline.{reason}')
+        return True
+
+    def check(self) -> None:
+        """Raise DeadlineExceeded if the deadline has passed or the request was cancelled."""
+        if self.reason is None and self.expires_at is not None and self._clock() >= self.expires_at:
+            self.cancel(EXPIRED)
+        if self.reason is not None:
+            raise DeadlineExceeded(self.reason)
+
+    @contextmanager
+    def bind(self):
+        """Make this the deadline of calls made inside the block (and tasks or threads started from it)."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+
+def current() -> Optional[Deadline]:
+    return _current.get()
+
+
+def estimate_tokens(messages: List[Dict[str, str]], n: int = 1) -> int:
+    """Tokens a call would have used: its prompt, plus ``n`` completions of the size seen so far."""
+    prompt_tokens = sum(len(message.get('content') or '') for message in messages) // CHARS_PER_TOKEN
+    counters = metrics.snapshot()['counters']
+    calls = counters.get('llm.calls', 0)
+    completion_tokens = (counters.get('llm.tokens.completion', 0) / calls) if calls else DEFAULT_COMPLETION_TOKENS
+    return int(prompt_tokens + n * completion_tokens)
+
+
+def record_skipped(messages: List[Dict[str, str]], n: int = 1) -> None:
+    """Count an LLM call that was never made because its request was out of time."""
+    metrics.increment('deadline.calls_skipped')
+    metrics.increment('deadline.tokens_saved', estimate_tokens(messages, n))
+
+
+def call_timeout(messages: List[Dict[str, str]], n: int = 1) -> Optional[float]:
+    """
+    Timeout for an LLM call about to be made under the current deadline:
+    the seconds left, or None without a deadline. Raises DeadlineExceeded
+    (and counts the call as skipped) when there is no time left.
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return None
+    try:
+        deadline.check()
+    except DeadlineExceeded:
+        record_skipped(messages, n)
+        raise
+    return deadline.remaining()
+
+
+def expired() -> bool:
+    """True when the current request's deadline has passed or it was cancelled."""
+    deadline = _current.get()
+    if deadline is None:
+        return False
+    try:
+        deadline.check()
+    except DeadlineExceeded:
+        return True
+    return False
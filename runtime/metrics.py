@@ -0,0 +1,40 @@
+"""
+In-process counters and gauges.
+
+Deliberately minimal: values live in the worker process and are exposed as
+JSON by the ``/metrics`` route, which is enough for dashboards that scrape
+each instance.
+"""
+
+import threading
+from typing import Dict, Union
+
+Number = Union[int, float]
+
+_lock = threading.Lock()
+_counters: Dict[str, Number] = {}
+_gauges: Dict[str, Number] = {}
+
+
+def increment(name: str, value: Number = 1) -> None:
+    """Add ``value`` to a monotonically increasing counter."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: Number) -> None:
+    """Record the current value of a gauge."""
+    with _lock:
+        _gauges[name] = value
+
+
+def snapshot() -> Dict[str, Dict[str, Number]]:
+    """Copy of all counters and gauges."""
+    with _lock:
+        return {'counters': dict(_counters), 'gauges': dict(_gauges)}
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
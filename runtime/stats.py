@@ -0,0 +1,25 @@
+"""Small summary-statistics helpers shared by reports and benchmarks."""
+
+import math
+from typing import Dict, Iterable, Sequence
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(values: Iterable[float], percentiles=(50, 90, 95, 99)) -> Dict[str, float]:
+    """Return count, mean, max and the requested percentiles of ``values``."""
+    ordered = sorted(values)
+    summary = {
+        'count': len(ordered),
+        'mean': round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+        'max': round(ordered[-1], 2) if ordered else 0.0,
+    }
+    for pct in percentiles:
+        summary[f'p{pct}'] = round(percentile(ordered, pct), 2)
+    return summary
@@ -0,0 +1,308 @@
+"""
+Per-request phase timing.
+
+A ``RequestTimeline`` collects how long each phase of a request took
+(LLM calls, formatting, storage, rendering). Phases are recorded with the
+``phase`` context manager, which is a no-op when no timeline is active, so
+the instrumented code can also run from the CLI without any overhead.
+"""
+
+import contextvars
+import cProfile
+import functools
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger('case_study.timing')
+
+_current_timeline: contextvars.ContextVar = contextvars.ContextVar('request_timeline', default=None)
+
+
+class RequestTimeline:
+    """Accumulates phase durations for a single request."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.phases: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, phase_name: str, duration_ms: float) -> None:
+        """Add a duration to a phase; repeated phases are summed."""
+        with self._lock:
+            entry = self.phases.setdefault(phase_name, [0.0, 0])
+            entry[0] += duration_ms
+            entry[1] += 1
+
+    def finish(self) -> None:
+        if self.finished is None:
+            self.finished = time.perf_counter()
+
+    @property
+    def elapsed_ms(self) -> float:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return (end - self.started) * 1000
+
+    def server_timing_header(self) -> str:
+        """Render the phases as a ``Server-Timing`` header value."""
+        parts = []
+        with self._lock:
+            for phase_name, (total, count) in self.phases.items():
+                metric = f"{_metric_name(phase_name)};dur={total:.1f}"
+                if count > 1:
+                    metric += f';desc="{count} calls"'
+                parts.append(metric)
+        parts.append(f"total;dur={self.elapsed_ms:.1f}")
+        return ', '.join(parts)
+
+    def as_record(self, **extra) -> dict:
+        """Structured representation used for the timing log."""
+        with self._lock:
+            phases = {
+                phase_name: {'ms': round(total, 2), 'count': count}
+                for phase_name, (total, count) in self.phases.items()
+            }
+        record = {'request': self.name, 'total_ms': round(self.elapsed_ms, 2), 'phases': phases}
+        record.update(extra)
+        return record
+
+
+def _metric_name(phase_name: str) -> str:
+    # Server-Timing metric names must be HTTP tokens.
+    return re.sub(r"[^A-Za-z0-9._-]", '_', phase_name)
+
+
+def current_timeline() -> Optional[RequestTimeline]:
+    """Return the timeline of the request being served, if any."""
+    return _current_timeline.get()
+
+
+def start_timeline(name: str) -> contextvars.Token:
+    return _current_timeline.set(RequestTimeline(name))
+
+
+def end_timeline(token: contextvars.Token) -> None:
+    _current_timeline.reset(token)
+
+
+@contextmanager
+def phase(name: str):
+    """Time the enclosed block as ``name`` on the active timeline."""
+    timeline = _current_timeline.get()
+    if timeline is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timeline.record(name, (time.perf_counter() - start) * 1000)
+
+
+def timed(name: str):
+    """Decorator form of ``phase``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class SlowRequestProfiler:
+    """
+    Opt-in profiler that keeps a dump only for requests slower than a threshold.
+
+    ``sample`` mode walks the request thread's stack every ``interval`` seconds
+    and writes collapsed stacks (flamegraph.pl / speedscope input);
+    ``cprofile`` mode runs cProfile and writes a ``.prof`` file.
+    """
+
+    def __init__(self, threshold_ms: float, output_dir: str, mode: str = 'sample', interval: float = 0.005):
+        self.threshold_ms = threshold_ms
+        self.output_dir = output_dir
+        self.mode = mode
+        self.interval = interval
+
+    @classmethod
+    def from_env(cls) -> Optional['SlowRequestProfiler']:
+        """Build a profiler from ``PROFILE_SLOW_REQUEST_MS`` or return None if unset."""
+        threshold = os.getenv('PROFILE_SLOW_REQUEST_MS')
+        if not threshold:
+            return None
+        return cls(
+            threshold_ms=float(threshold),
+            output_dir=os.getenv('PROFILE_DIR', 'profiles'),
+            mode=os.getenv('PROFILE_MODE', 'sample'),
+            interval=float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000,
+        )
+
+    def start(self) -> '_ActiveProfile':
+        if self.mode == 'cprofile':
+            return _CProfileSession(self)
+        return _StackSampler(self, threading.get_ident())
+
+
+class _ActiveProfile(ABC):
+    suffix = ''
+
+    def __init__(self, profiler: SlowRequestProfiler):
+        self.profiler = profiler
+
+    def stop(self, timeline: RequestTimeline) -> Optional[str]:
+        """Stop profiling; write a dump if the request was slow and return its path."""
+        self._stop()
+        if timeline.elapsed_ms < self.profiler.threshold_ms:
+            return None
+        os.makedirs(self.profiler.output_dir, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}_{_metric_name(timeline.name)}_{int(timeline.elapsed_ms)}ms{self.suffix}"
+        path = os.path.join(self.profiler.output_dir, name)
+        self._dump(path)
+        return path
+
+    @abstractmethod
+    def _stop(self) -> None:
+        """Stop collecting samples."""
+
+    @abstractmethod
+    def _dump(self, path: str) -> None:
+        """Write what was collected to ``path``."""
+
+
+class _CProfileSession(_ActiveProfile):
+    suffix = '.prof'
+
+    def __init__(self, profiler: SlowRequestProfiler):
+        super().__init__(profiler)
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def _stop(self) -> None:
+        self._profile.disable()
+
+    def _dump(self, path: str) -> None:
+        self._profile.dump_stats(path)
+
+
+class _StackSampler(_ActiveProfile):
+    suffix = '.collapsed'
+
+    def __init__(self, profiler: SlowRequestProfiler, thread_id: int):
+        super().__init__(profiler)
+        self._thread_id = thread_id
+        self._stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.profiler.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self._stacks[';'.join(reversed(stack))] += 1
+
+    def _stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _dump(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def init_app(app) -> None:
+    """
+    Attach request timing to a Flask app.
+
+    Every response gets a ``Server-Timing`` header and one JSON line is logged
+    to the ``case_study.timing`` logger per request.
+    """
+    from flask import g, request
+
+    profiler = SlowRequestProfiler.from_env()
+
+    @app.before_request
+    def _start_request_timing():
+        g.timeline_token = start_timeline(f"{request.method} {request.path}")
+        g.timeline = current_timeline()
+        g.profile = profiler.start() if profiler else None
+
+    @app.after_request
+    def _add_server_timing(response):
+        timeline = g.get('timeline')
+        if timeline is not None:
+            response.headers['Server-Timing'] = timeline.server_timing_header()
+        return response
+
+    @app.teardown_request
+    def _finish_request_timing(exc):
+        timeline = g.pop('timeline', None)
+        if timeline is None:
+            return
+        timeline.finish()
+        extra = {}
+        profile = g.pop('profile', None)
+        if profile is not None:
+            dump = profile.stop(timeline)
+            if dump:
+                extra['profile'] = dump
+        if exc is not None:
+            extra['error'] = type(exc).__name__
+        logger.info(json.dumps(timeline.as_record(**extra)))
+        end_timeline(g.pop('timeline_token'))
+
+
+class TimingMiddleware:
+    """
+    ASGI counterpart of ``init_app``: adds ``Server-Timing`` and logs one
+    JSON line per HTTP request. Phases recorded by concurrently awaited
+    section calls land on the same timeline because asyncio tasks inherit
+    the request's context.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        token = start_timeline(f"{scope['method']} {scope['path']}")
+        timeline = current_timeline()
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', timeline.server_timing_header().encode('latin-1')))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            timeline.finish()
+            extra = {'error': error} if error else {}
+            logger.info(json.dumps(timeline.as_record(**extra)))
+            end_timeline(token)
@@ -0,0 +1,311 @@
+"""
+Token and cost accounting for LLM calls.
+
+Every chat completion appends one JSON line to an append-only ledger
+(``USAGE_LEDGER``, default ``<CASE_STUDY_DIR>/usage_ledger.jsonl``) with
+the token counts from ``response.usage``, the model, the latency and an
+estimated cost. Records are labelled with whatever ``scope`` is active
+when the call is made (case study id, section type, batch id), so the
+labels follow the call into worker threads via ``contextvars`` the same
+way timeline phases do.
+
+``manage.py usage-report`` aggregates the ledger.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from . import metrics
+from .stats import summarize
+
+logger = logging.getLogger('case_study.usage')
+
+_labels: contextvars.ContextVar = contextvars.ContextVar('usage_labels', default={})
+
+# USD per million tokens: (input, output, cached input). Matched on the
+# longest prefix so dated snapshots ("gpt-4o-2024-08-06") find their family.
+# Override or extend with LLM_PRICES='{"model": [input, output, cached]}'.
+MODEL_PRICES: Dict[str, tuple] = {
+    'gpt-3.5-turbo': (0.50, 1.50, 0.50),
+    'gpt-4': (30.00, 60.00, 30.00),
+    'gpt-4-turbo': (10.00, 30.00, 10.00),
+    'gpt-4o': (2.50, 10.00, 1.25),
+    'gpt-4o-mini': (0.15, 0.60, 0.075),
+    'gpt-4.1': (2.00, 8.00, 0.50),
+    'gpt-4.1-mini': (0.40, 1.60, 0.10),
+    'gpt-4.1-nano': (0.10, 0.40, 0.025),
+    'offline': (0.0, 0.0, 0.0),
+}
+
+LABELS = ('case_study', 'section', 'batch')
+
+
+@contextmanager
+def scope(**labels):
+    """Label LLM calls made inside the block, e.g. ``scope(section='summary')``; nests."""
+    token = _labels.set({**_labels.get(), **{k: v for k, v in labels.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def current_labels() -> Dict[str, str]:
+    return dict(_labels.get())
+
+
+def _prices() -> Dict[str, tuple]:
+    prices = dict(MODEL_PRICES)
+    override = os.getenv('LLM_PRICES')
+    if override:
+        prices.update({model: tuple(rates) for model, rates in json.loads(override).items()})
+    return prices
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+    """Estimated USD cost of one call, or None for a model without a known price."""
+    prices = _prices()
+    family = max((name for name in prices if model == name or model.startswith(name + '-')), key=len, default=None)
+    if family is None:
+        return None
+    input_rate, output_rate, cached_rate = prices[family]
+    uncached = prompt_tokens - cached_tokens
+    return round((uncached * input_rate + cached_tokens * cached_rate + completion_tokens * output_rate) / 1e6, 8)
+
+
+@dataclass
+class UsageRecord:
+    ts: float
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int = 0
+    latency_ms: float = 0.0
+    cost_usd: Optional[float] = None
+    n: int = 1
+    case_study: Optional[str] = None
+    section: Optional[str] = None
+    batch: Optional[str] = None
+    # What the call would have cost without the provider's prompt cache; set when some tokens were cached
+    uncached_cost_usd: Optional[float] = None
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+class UsageLedger:
+    """
+    Append-only JSONL file of UsageRecords.
+
+    Each record is written with a single ``write`` on an ``O_APPEND``
+    descriptor, so several worker processes can share one ledger without
+    interleaving lines.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, record: UsageRecord) -> None:
+        line = json.dumps({k: v for k, v in asdict(record).items() if v is not None}, separators=(',', ':'))
+        data = (line + '\n').encode('utf-8')
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+
+    def read(self, since: Optional[float] = None, until: Optional[float] = None) -> Iterator[UsageRecord]:
+        """Records with ``since <= ts < until``; a torn last line from a crashed writer is skipped."""
+        try:
+            f = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    record = UsageRecord(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue
+                if since is not None and record.ts < since:
+                    continue
+                if until is not None and record.ts >= until:
+                    continue
+                yield record
+
+
+def default_ledger_path(store_dir: Optional[str] = None) -> str:
+    return os.path.join(store_dir or os.getenv('CASE_STUDY_DIR') or tempfile.gettempdir(), 'usage_ledger.jsonl')
+
+
+_ledger: Optional[UsageLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> Optional[UsageLedger]:
+    """Process-wide ledger from ``USAGE_LEDGER``; None when set to ``off``."""
+    global _ledger
+    path = os.getenv('USAGE_LEDGER', '')
+    if path.lower() in ('off', 'none', '0'):
+        return None
+    path = path or default_ledger_path()
+    with _ledger_lock:
+        if _ledger is None or _ledger.path != path:
+            _ledger = UsageLedger(path)
+        return _ledger
+
+
+def _usage_counts(usage) -> tuple:
+    """(prompt, completion, cached) tokens from an OpenAI ``usage`` object or dict."""
+    if usage is None:
+        return 0, 0, 0
+    get = usage.get if isinstance(usage, dict) else lambda name, default=None: getattr(usage, name, default)
+    details = get('prompt_tokens_details')
+    if isinstance(details, dict):
+        cached = details.get('cached_tokens')
+    else:
+        cached = getattr(details, 'cached_tokens', None)
+    return get('prompt_tokens', 0) or 0, get('completion_tokens', 0) or 0, cached or 0
+
+
+def record_call(model: str, usage, latency_ms: float, n: int = 1, replayed: bool = False) -> Optional[UsageRecord]:
+    """
+    Account for one completed chat call under the active ``scope``.
+
+    A ``replayed`` call (served from a cassette, see ``ai.cassette``) cost
+    nothing: it counts towards the token metrics but not the spend, and
+    stays out of the ledger.
+
+    Never raises: a ledger that can't be written is logged and counted but
+    doesn't fail the generation that incurred the cost.
+    """
+    prompt_tokens, completion_tokens, cached_tokens = _usage_counts(usage)
+    labels = _labels.get()
+    record = UsageRecord(
+        ts=round(time.time(), 3),
+        model=model,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        cached_tokens=cached_tokens,
+        latency_ms=round(latency_ms, 1),
+        cost_usd=estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens),
+        n=n,
+        uncached_cost_usd=estimate_cost(model, prompt_tokens, completion_tokens) if cached_tokens else None,
+        **{label: labels.get(label) for label in LABELS},
+    )
+    metrics.increment('llm.calls')
+    metrics.increment('llm.tokens.prompt', prompt_tokens)
+    metrics.increment('llm.tokens.completion', completion_tokens)
+    metrics.increment('llm.tokens.cached', cached_tokens)
+    if replayed:
+        metrics.increment('llm.replayed')
+        return record
+    if record.cost_usd:
+        metrics.increment('llm.cost_usd', record.cost_usd)
+
+    ledger = get_ledger()
+    if ledger is not None:
+        try:
+            ledger.append(record)
+        except OSError as e:
+            metrics.increment('usage.write_failed')
+            logger.warning("Could not append to usage ledger %s: %s", ledger.path, e)
+    return record
+
+
+# -- reporting ------------------------------------------------------------
+
+_DURATION = re.compile(r'^(\d+(?:\.\d+)?)([smhdw])$')
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def parse_time(value: str, now: float = None) -> float:
+    """A relative duration back from now (``90m``, ``24h``, ``7d``) or an ISO date/time."""
+    from datetime import datetime, timezone
+    match = _DURATION.match(value.strip())
+    if match:
+        return (now if now is not None else time.time()) - float(match.group(1)) * _UNITS[match.group(2)]
+    parsed = datetime.fromisoformat(value.strip())
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+@dataclass
+class UsageGroup:
+    key: Dict[str, Optional[str]]
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: float = 0.0
+    cache_savings_usd: float = 0.0
+    unpriced_calls: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def add(self, record: UsageRecord) -> None:
+        self.calls += 1
+        self.prompt_tokens += record.prompt_tokens
+        self.completion_tokens += record.completion_tokens
+        self.cached_tokens += record.cached_tokens
+        if record.cost_usd is None:
+            self.unpriced_calls += 1
+        else:
+            self.cost_usd += record.cost_usd
+            uncached = record.uncached_cost_usd
+            if uncached is None and record.cached_tokens:
+                # Written before the uncached cost was recorded: price it now, if the model still has a price
+                uncached = estimate_cost(record.model, record.prompt_tokens, record.completion_tokens)
+            if uncached is not None:
+                self.cache_savings_usd += uncached - record.cost_usd
+        self.latencies.append(record.latency_ms)
+
+    def as_row(self) -> dict:
+        row = dict(self.key)
+        row.update(calls=self.calls, prompt_tokens=self.prompt_tokens, completion_tokens=self.completion_tokens,
+                   cached_tokens=self.cached_tokens,
+                   cached_ratio=round(self.cached_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0,
+                   cost_usd=round(self.cost_usd, 6), cache_savings_usd=round(self.cache_savings_usd, 6),
+                   latency_ms=summarize(self.latencies))
+        if self.unpriced_calls:
+            row['unpriced_calls'] = self.unpriced_calls
+        return row
+
+
+GROUP_FIELDS = ('section', 'model', 'case_study', 'batch', 'day', 'cache')
+
+
+def _group_value(record: UsageRecord, name: str) -> Optional[str]:
+    if name == 'day':
+        from datetime import datetime, timezone
+        return datetime.fromtimestamp(record.ts, timezone.utc).strftime('%Y-%m-%d')
+    if name == 'cache':
+        # Compare latency of calls that hit the provider's prompt cache with those that didn't
+        return 'hit' if record.cached_tokens else 'miss'
+    return getattr(record, name)
+
+
+def aggregate(records: Iterable[UsageRecord], by: Sequence[str] = ('section', 'model')) -> List[dict]:
+    """Spend, tokens and latency percentiles per distinct combination of ``by``, costliest first."""
+    groups: Dict[tuple, UsageGroup] = {}
+    for record in records:
+        values = tuple(_group_value(record, name) for name in by)
+        group = groups.get(values)
+        if group is None:
+            group = groups[values] = UsageGroup(dict(zip(by, values)))
+        group.add(record)
+    return sorted((group.as_row() for group in groups.values()), key=lambda row: -row['cost_usd'])
@@ -0,0 +1,7 @@
+from .store import CaseStudyStore
+from .section_cache import SectionCache
+from .search import SearchHit, SearchIndex
+from .columnar import ColumnarWriter, open_columnar, read_case_studies, write_columnar
+
+__all__ = ['CaseStudyStore', 'SectionCache', 'SearchHit', 'SearchIndex',
+           'ColumnarWriter', 'open_columnar', 'read_case_studies', 'write_columnar']
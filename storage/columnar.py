@@ -0,0 +1,302 @@
+"""
+Columnar (Apache Arrow / Parquet) copy of the case study archive.
+
+Analytics over thousands of case studies (length, section balance, token
+spend) don't need the pydantic models, and loading every JSON file into a
+``CaseStudy`` to read a few fields is slow and memory hungry. This module
+writes the archive as a table with one row per section:
+
+    case study     case_study_id, title, client_name, created_at, stale
+    client brief   input_client_name, industry, main_challenge, solution_provided,
+                   location, project_scale, technologies, additional_context
+    section        section_index, section_type, section_title, content,
+                   content_chars, content_words, candidates, selected, retries,
+                   issues, section_stale
+    LLM usage      llm_calls, prompt_tokens, completion_tokens, cost_usd
+                   (from the usage ledger, when given)
+    per case study wordpress_content, feature_image (first row only)
+
+An ``.arrow`` (Arrow IPC) file is written uncompressed so ``open_columnar``
+can memory-map it: a scan reads only the columns it touches, straight from
+the page cache, without copying or parsing. A ``.parquet`` file is smaller
+(zstd) for shipping elsewhere and is decoded on read. Either round-trips
+to ``CaseStudy`` objects with ``read_case_studies``; feature images are
+only kept with ``include_images``.
+
+pyarrow is optional (``pip install pyarrow``); nothing imports it until a
+columnar file is written or read.
+"""
+
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from models.case_study import CaseStudy, CaseStudyInput, CaseStudySection, FeatureImage, SectionCandidate
+
+FORMAT_VERSION = '1'
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise RuntimeError('The columnar archive needs pyarrow (pip install pyarrow)')
+    return pyarrow
+
+
+def schema():
+    pa = _pyarrow()
+    string_list = pa.list_(pa.string())
+    candidate = pa.struct([('content', pa.string()), ('score', pa.float64()), ('notes', string_list)])
+    fields = [
+        ('case_study_id', pa.string()),
+        ('title', pa.string()),
+        ('client_name', pa.string()),
+        ('created_at', pa.timestamp('us', tz='UTC')),
+        ('stale', pa.bool_()),
+        ('input_client_name', pa.string()),
+        ('industry', pa.string()),
+        ('main_challenge', pa.string()),
+        ('solution_provided', pa.string()),
+        ('location', pa.string()),
+        ('project_scale', pa.string()),
+        ('technologies', string_list),
+        ('additional_context', pa.string()),
+        ('section_index', pa.int16()),
+        ('section_type', pa.string()),
+        ('section_title', pa.string()),
+        ('content', pa.string()),
+        ('content_chars', pa.int32()),
+        ('content_words', pa.int32()),
+        ('candidates', pa.list_(candidate)),
+        ('selected', pa.int16()),
+        ('retries', pa.int16()),
+        ('issues', string_list),
+        ('section_stale', pa.bool_()),
+        ('llm_calls', pa.int32()),
+        ('prompt_tokens', pa.int64()),
+        ('completion_tokens', pa.int64()),
+        ('cost_usd', pa.float64()),
+        ('wordpress_content', pa.string()),
+        ('feature_image', pa.binary()),
+    ]
+    return pa.schema(fields, metadata={'case_study_archive_version': FORMAT_VERSION})
+
+
+def is_parquet(path: str) -> bool:
+    return path.lower().endswith(PARQUET_SUFFIXES)
+
+
+def usage_by_section(records) -> Dict[Tuple[str, str], dict]:
+    """Ledger records (``runtime.usage``) summed per ``(case_study, section)``."""
+    from runtime.usage import aggregate
+    return {(row['case_study'], row['section']): row
+            for row in aggregate(records, by=('case_study', 'section')) if row['case_study']}
+
+
+def _rows(case_study: CaseStudy, include_images: bool, usage: Dict) -> Iterator[dict]:
+    case_input = case_study.case_input
+    shared = {
+        'case_study_id': case_study.id,
+        'title': case_study.title,
+        'client_name': case_study.client_name,
+        'created_at': case_study.created_at,
+        'stale': case_study.stale,
+    }
+    if case_input is not None:
+        shared.update(input_client_name=case_input.client_name, industry=case_input.industry,
+                      main_challenge=case_input.main_challenge, solution_provided=case_input.solution_provided,
+                      location=case_input.location, project_scale=case_input.project_scale,
+                      technologies=case_input.technologies_used, additional_context=case_input.additional_context)
+    first = {'wordpress_content': case_study.wordpress_content}
+    if include_images and case_study.feature_image is not None:
+        first['feature_image'] = case_study.feature_image.inline().model_dump_json(exclude_none=True).encode('utf-8')
+
+    if not case_study.sections:
+        # Keep the case study even though it has no sections
+        yield {**shared, **first}
+        return
+    for index, section in enumerate(case_study.sections):
+        row = {
+            **shared,
+            'section_index': index,
+            'section_type': section.section_type,
+            'section_title': section.title,
+            'content': section.content,
+            'content_chars': len(section.content),
+            'content_words': len(section.content.split()),
+            'candidates': [candidate.model_dump() for candidate in section.candidates]
+            if section.candidates is not None else None,
+            'selected': section.selected,
+            'retries': section.retries,
+            'issues': section.issues,
+            'section_stale': section.stale,
+        }
+        spent = usage.get((case_study.id, section.section_type))
+        if spent is not None:
+            row.update(llm_calls=spent['calls'], prompt_tokens=spent['prompt_tokens'],
+                       completion_tokens=spent['completion_tokens'], cost_usd=spent['cost_usd'])
+        if index == 0:
+            row.update(first)
+        yield row
+
+
+@dataclass
+class ColumnarReport:
+    path: str
+    case_studies: int = 0
+    rows: int = 0
+    bytes_written: int = 0
+
+
+class ColumnarWriter:
+    """
+    Streams case studies into an Arrow IPC (``.arrow``) or Parquet file.
+
+    Rows are buffered for ``batch_size`` case studies at a time and written
+    as one record batch (a row group in Parquet), so memory stays bounded
+    by the batch, not the archive. A case study's rows never straddle two
+    batches. The file is written under a temporary name and renamed by
+    ``close``.
+    """
+
+    def __init__(self, path: str, include_images: bool = False, usage: Optional[Dict] = None,
+                 batch_size: int = 500):
+        pa = _pyarrow()
+        self.path = path
+        self.include_images = include_images
+        self.usage = usage or {}
+        self.batch_size = batch_size
+        self.schema = schema()
+        self.report = ColumnarReport(path)
+        self._columns: Dict[str, list] = {name: [] for name in self.schema.names}
+        self._pending = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=directory, prefix='.columnar_', suffix='.tmp')
+        os.close(fd)
+        if is_parquet(path):
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self._tmp_path, self.schema, compression='zstd')
+        else:
+            self._sink = pa.OSFile(self._tmp_path, 'wb')
+            self._writer = pa.ipc.new_file(self._sink, self.schema)
+
+    def write(self, case_study: CaseStudy) -> None:
+        for row in _rows(case_study, self.include_images, self.usage):
+            for name, values in self._columns.items():
+                values.append(row.get(name))
+            self.report.rows += 1
+        self.report.case_studies += 1
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        pa = _pyarrow()
+        batch = pa.RecordBatch.from_pydict(self._columns, schema=self.schema)
+        self._writer.write_batch(batch)
+        for values in self._columns.values():
+            values.clear()
+        self._pending = 0
+
+    def close(self) -> ColumnarReport:
+        self._flush()
+        self._writer.close()
+        if not is_parquet(self.path):
+            self._sink.close()
+        os.replace(self._tmp_path, self.path)
+        self.report.bytes_written = os.path.getsize(self.path)
+        return self.report
+
+    def abort(self) -> None:
+        try:
+            self._writer.close()
+        except Exception:
+            pass
+        if os.path.exists(self._tmp_path):
+            os.unlink(self._tmp_path)
+
+
+def write_columnar(case_studies: Iterable[CaseStudy], path: str, include_images: bool = False,
+                   usage: Optional[Dict] = None, batch_size: int = 500) -> ColumnarReport:
+    """Write ``case_studies`` (any iterable, e.g. a ``CaseStudyStore``) to ``path``."""
+    writer = ColumnarWriter(path, include_images, usage, batch_size)
+    try:
+        for case_study in case_studies:
+            writer.write(case_study)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+def open_columnar(path: str, columns: Optional[Sequence[str]] = None):
+    """
+    The archive as a ``pyarrow.Table``. An Arrow file is memory-mapped, so
+    the columns are views of the file and only the pages a scan touches
+    are read; Parquet is decoded (only ``columns``, when given).
+    """
+    pa = _pyarrow()
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+        return pq.read_table(path, columns=list(columns) if columns else None, memory_map=True)
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return table.select(list(columns)) if columns else table
+
+
+def _batches(path: str):
+    pa = _pyarrow()
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+        yield from pq.ParquetFile(path, memory_map=True).iter_batches()
+        return
+    reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+    for index in range(reader.num_record_batches):
+        yield reader.get_batch(index)
+
+
+def _case_study(rows: List[dict]) -> CaseStudy:
+    first = rows[0]
+    case_input = None
+    if first['industry'] is not None:
+        case_input = CaseStudyInput(
+            client_name=first['input_client_name'], industry=first['industry'],
+            main_challenge=first['main_challenge'], solution_provided=first['solution_provided'],
+            location=first['location'], project_scale=first['project_scale'],
+            technologies_used=first['technologies'], additional_context=first['additional_context'])
+    sections = [
+        CaseStudySection(
+            title=row['section_title'], content=row['content'], section_type=row['section_type'],
+            candidates=[SectionCandidate(**candidate) for candidate in row['candidates']]
+            if row['candidates'] is not None else None,
+            selected=row['selected'], retries=row['retries'], issues=row['issues'], stale=row['section_stale'])
+        for row in rows if row['section_index'] is not None
+    ]
+    feature_image = None
+    if first['feature_image'] is not None:
+        feature_image = FeatureImage.model_validate_json(first['feature_image'])
+    return CaseStudy(
+        id=first['case_study_id'], title=first['title'], sections=sections,
+        wordpress_content=first['wordpress_content'], client_name=first['client_name'],
+        case_input=case_input, created_at=first['created_at'], feature_image=feature_image,
+        stale=first['stale'])
+
+
+def read_case_studies(path: str) -> Iterator[CaseStudy]:
+    """Rebuild the ``CaseStudy`` objects from a columnar file, in the order they were written."""
+    pending: List[dict] = []
+    for batch in _batches(path):
+        for row in batch.to_pylist():
+            if pending and row['case_study_id'] != pending[0]['case_study_id']:
+                yield _case_study(pending)
+                pending = []
+            pending.append(row)
+    if pending:
+        yield _case_study(pending)
+
@@ -0,0 +1,277 @@
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from models.case_study import CaseStudy
+
+# FTS5 columns, in bm25 weight order: a hit in the title or client name
+# outranks the same word buried in a section.
+COLUMNS = ('title', 'client', 'industry', 'technologies', 'brief', 'sections')
+WEIGHTS = (10.0, 8.0, 3.0, 5.0, 2.0, 1.0)
+
+# Field prefixes accepted in queries, e.g. ``industry:healthcare``
+FIELDS = {
+    'title': 'title',
+    'client': 'client',
+    'industry': 'industry',
+    'tech': 'technologies',
+    'technology': 'technologies',
+    'technologies': 'technologies',
+}
+
+_TERM = re.compile(r'(?:(\w+):)?("[^"]*"?|\S+)')
+_WORD = re.compile(r'\w+')
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS documents (
+    doc INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    client_name TEXT,
+    industry TEXT,
+    created_at TEXT,
+    mtime REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS case_study_fts USING fts5(
+    {', '.join(COLUMNS)},
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+@dataclass
+class SearchHit:
+    id: str
+    title: str
+    client_name: Optional[str]
+    industry: Optional[str]
+    created_at: Optional[str]
+    score: float
+    snippet: str
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def match_query(text: str) -> str:
+    """
+    Turn a user query into an FTS5 MATCH expression.
+
+    Every whitespace-separated term must match (AND); punctuation inside a
+    term makes it a phrase, so ``CEL-FI`` matches "CEL-FI" and "Cel Fi" but
+    not a document that merely mentions "cel" and "fi" apart. ``"..."``
+    quotes a phrase, a trailing ``*`` matches a prefix and ``industry:``,
+    ``client:``, ``title:`` or ``tech:`` restrict a term to one field. FTS5
+    operators in the input are treated as words, so no query is a syntax
+    error.
+    """
+    clauses = []
+    for field, term in _TERM.findall(text):
+        words = _WORD.findall(term)
+        if not words:
+            continue
+        phrase = '"' + ' '.join(words) + '"'
+        if term.endswith('*') and not term.startswith('"'):
+            phrase += '*'
+        column = FIELDS.get(field.lower()) if field else None
+        if field and column is None:
+            # Not a field we know ("ratio:1"): search for the whole thing
+            phrase = '"' + ' '.join(_WORD.findall(field) + words) + '"'
+        clauses.append(f'{column} : {phrase}' if column else phrase)
+    if not clauses:
+        raise ValueError('Empty search query')
+    return ' AND '.join(clauses)
+
+
+def page_bounds(limit=None, offset=None) -> Tuple[int, int]:
+    """Parse ``limit``/``offset`` request values (capped at SEARCH_MAX_RESULTS), raising ValueError."""
+    try:
+        limit = int(limit) if limit not in (None, '') else 20
+        offset = int(offset) if offset not in (None, '') else 0
+    except (TypeError, ValueError):
+        raise ValueError('limit and offset must be integers')
+    if limit < 1 or offset < 0:
+        raise ValueError('limit must be at least 1 and offset at least 0')
+    return min(limit, int(os.getenv('SEARCH_MAX_RESULTS', '100'))), offset
+
+
+def _document(case_study: CaseStudy) -> Tuple[str, ...]:
+    case_input = case_study.case_input
+    if case_input is None:
+        return (case_study.title, case_study.client_name or '', '', '', '',
+                '\n\n'.join(section.content for section in case_study.sections))
+    brief = [case_input.main_challenge, case_input.solution_provided, case_input.location,
+             case_input.project_scale, case_input.additional_context]
+    return (
+        case_study.title,
+        case_input.client_name,
+        case_input.industry,
+        ', '.join(case_input.technologies_used or ()),
+        '\n'.join(value for value in brief if value),
+        '\n\n'.join(section.content for section in case_study.sections),
+    )
+
+
+class SearchIndex:
+    """
+    Full-text index of the case study archive in SQLite FTS5.
+
+    Covers the title, the client brief (``CaseStudyInput``) and every
+    section. ``CaseStudyStore.save`` keeps it current as case studies are
+    stored; ``sync`` catches up with files written while indexing was off.
+    The database lives next to the archive
+    (``<CASE_STUDY_DIR>/search_index.sqlite3``) in WAL mode, so web
+    workers can search while another process writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connect()
+
+    @classmethod
+    def from_env(cls, directory: str) -> Optional['SearchIndex']:
+        """Index from ``SEARCH_INDEX`` (a path, or ``off``); defaults to one inside ``directory``."""
+        path = os.getenv('SEARCH_INDEX', '')
+        if path.lower() in ('off', 'none', '0', 'false'):
+            return None
+        return cls(path or os.path.join(directory, 'search_index.sqlite3'))
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread: sqlite3 connections can't be shared across threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            try:
+                connection.executescript(_SCHEMA)
+            except sqlite3.OperationalError as e:
+                connection.close()
+                raise RuntimeError(f'SQLite {sqlite3.sqlite_version} has no FTS5 support: {e}') from e
+            self._local.connection = connection
+        return connection
+
+    def add(self, case_study: CaseStudy, mtime: Optional[float] = None) -> None:
+        """Index (or re-index) one case study."""
+        self.add_many([(case_study, mtime)])
+
+    def add_many(self, items: Iterable[Tuple[CaseStudy, Optional[float]]]) -> int:
+        """Index many ``(case_study, mtime)`` pairs in one transaction; returns how many."""
+        connection = self._connect()
+        count = 0
+        with connection:
+            for case_study, mtime in items:
+                self._upsert(connection, case_study, mtime)
+                count += 1
+        return count
+
+    def _upsert(self, connection: sqlite3.Connection, case_study: CaseStudy, mtime: Optional[float]) -> None:
+        if not case_study.id:
+            raise ValueError('Only stored case studies (with an id) can be indexed')
+        row = (case_study.title, case_study.client_name, case_study.case_input and case_study.case_input.industry,
+               case_study.created_at.isoformat() if case_study.created_at else None, mtime)
+        existing = connection.execute('SELECT doc FROM documents WHERE id = ?', (case_study.id,)).fetchone()
+        if existing is None:
+            doc = connection.execute(
+                'INSERT INTO documents (id, title, client_name, industry, created_at, mtime) VALUES (?, ?, ?, ?, ?, ?)',
+                (case_study.id, *row)).lastrowid
+        else:
+            doc = existing[0]
+            connection.execute(
+                'UPDATE documents SET title = ?, client_name = ?, industry = ?, created_at = ?, mtime = ? WHERE doc = ?',
+                (*row, doc))
+            connection.execute('DELETE FROM case_study_fts WHERE rowid = ?', (doc,))
+        connection.execute(f'INSERT INTO case_study_fts (rowid, {", ".join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                           (doc, *_document(case_study)))
+
+    def remove(self, case_study_id: str) -> bool:
+        connection = self._connect()
+        with connection:
+            existing = connection.execute('SELECT doc FROM documents WHERE id = ?', (case_study_id,)).fetchone()
+            if existing is None:
+                return False
+            connection.execute('DELETE FROM case_study_fts WHERE rowid = ?', existing)
+            connection.execute('DELETE FROM documents WHERE doc = ?', existing)
+        return True
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[SearchHit]:
+        """Best matches first; raises ValueError for a query with no searchable words."""
+        expression = match_query(query)
+        connection = self._connect()
+        # Every match is ranked, so the best one is found however many newer
+        # case studies also match. Snippets are built only for the page
+        # returned: snippet() in the ranking query would run for every match
+        # before the LIMIT applies
+        ranked = connection.execute(
+            f'SELECT rowid, bm25(case_study_fts, {", ".join(map(str, WEIGHTS))}) AS score FROM case_study_fts '
+            'WHERE case_study_fts MATCH ? ORDER BY score LIMIT ? OFFSET ?',
+            (expression, limit, offset)).fetchall()
+        if not ranked:
+            return []
+        docs = [doc for doc, _ in ranked]
+        placeholders = ', '.join('?' * len(docs))
+        snippets = dict(connection.execute(
+            "SELECT rowid, snippet(case_study_fts, -1, '[', ']', '…', 16) FROM case_study_fts "
+            f'WHERE case_study_fts MATCH ? AND rowid IN ({placeholders})', (expression, *docs)))
+        documents = {row[0]: row[1:] for row in connection.execute(
+            f'SELECT doc, id, title, client_name, industry, created_at FROM documents WHERE doc IN ({placeholders})',
+            docs)}
+        return [SearchHit(*documents[doc], score=round(-score, 4), snippet=snippets.get(doc, ''))
+                for doc, score in ranked]
+
+    def __len__(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def sync(self, store, batch_size: int = 500) -> Tuple[int, int]:
+        """
+        Bring the index up to date with ``store``: index case studies whose
+        file changed since they were indexed and drop ones whose file is
+        gone. Returns ``(indexed, removed)``.
+        """
+        connection = self._connect()
+        known = dict(connection.execute('SELECT id, mtime FROM documents'))
+        on_disk = {}
+        with os.scandir(store.directory) as entries:
+            for entry in entries:
+                match = store.FILENAME.match(entry.name)
+                if match:
+                    on_disk[match.group(1)] = entry.stat().st_mtime
+
+        def changed():
+            for case_study_id, mtime in on_disk.items():
+                if known.get(case_study_id) == mtime:
+                    continue
+                try:
+                    yield store.load(case_study_id), mtime
+                except (FileNotFoundError, ValueError):
+                    continue
+
+        indexed = 0
+        pending = changed()
+        while True:
+            batch = [item for _, item in zip(range(batch_size), pending)]
+            if not batch:
+                break
+            indexed += self.add_many(batch)
+        removed = sum(self.remove(case_study_id) for case_study_id in known.keys() - on_disk.keys())
+        return indexed, removed
+
+    def rebuild(self, store) -> int:
+        """Drop everything and index the whole store again."""
+        connection = self._connect()
+        with connection:
+            connection.execute('DELETE FROM documents')
+            connection.execute('DELETE FROM case_study_fts')
+        indexed, _ = self.sync(store)
+        self.optimize()
+        return indexed
+
+    def optimize(self) -> None:
+        """Merge the index's b-trees into one; worth doing after a large (re)build."""
+        connection = self._connect()
+        with connection:
+            connection.execute("INSERT INTO case_study_fts (case_study_fts) VALUES ('optimize')")
@@ -0,0 +1,58 @@
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Optional, Tuple
+
+
+class SectionCache:
+    """
+    Last good text of every section, keyed by input fingerprint.
+
+    Used as the stale fallback while the LLM circuit breaker is open: a
+    request for an input that was generated before gets the earlier
+    sections back (flagged ``stale``) instead of an error. One small JSON
+    file per (fingerprint, section), written atomically, so concurrent
+    section writers never clobber each other.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_age: Optional[float] = None):
+        self.directory = directory or os.path.join(os.getenv('CASE_STUDY_DIR') or tempfile.gettempdir(),
+                                                   'section_cache')
+        self.max_age = max_age
+        os.makedirs(self.directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional['SectionCache']:
+        """Cache from ``LLM_STALE_DIR``/``LLM_STALE_MAX_AGE``; None when ``LLM_STALE_FALLBACK=off``."""
+        if os.getenv('LLM_STALE_FALLBACK', 'on').lower() in ('off', '0', 'false'):
+            return None
+        max_age = os.getenv('LLM_STALE_MAX_AGE')
+        return cls(os.getenv('LLM_STALE_DIR') or None, float(max_age) if max_age else None)
+
+    def path(self, fingerprint: str, section_type: str) -> str:
+        if not re.fullmatch(r'[0-9a-f]+', fingerprint) or not re.fullmatch(r'[a-z_]+', section_type):
+            raise ValueError(f'Invalid section cache key: {fingerprint!r}/{section_type!r}')
+        return os.path.join(self.directory, f'{fingerprint}.{section_type}.json')
+
+    def put(self, fingerprint: str, section_type: str, content: str) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.section_', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'content': content, 'saved_at': time.time()}, f)
+            os.replace(tmp_path, self.path(fingerprint, section_type))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, fingerprint: str, section_type: str) -> Optional[Tuple[str, float]]:
+        """``(content, saved_at)`` or None if missing or older than ``max_age`` seconds."""
+        try:
+            with open(self.path(fingerprint, section_type), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if self.max_age is not None and time.time() - entry['saved_at'] > self.max_age:
+            return None
+        return entry['content'], entry['saved_at']
@@ -0,0 +1,185 @@
+import logging
+import os
+import re
+import secrets
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from models.case_study import CaseStudy, FeatureImage
+from runtime import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: updates are serialized within one process only
+    fcntl = None
+
+# One lock per case study file, shared by every store in the process
+_update_locks: Dict[str, threading.Lock] = {}
+_update_locks_guard = threading.Lock()
+
+
+class CaseStudyStore:
+    """
+    File-per-case-study JSON store.
+
+    Case studies are written as ``case_study_<id>.json`` in ``CASE_STUDY_DIR``
+    (the system temp directory by default, which is where the web app has
+    always kept preview data), with the feature image and its variants as
+    files in ``case_study_<id>.images/`` beside it. Writes are atomic so a
+    concurrent reader never sees a half-written file. Every save also updates the archive's full-text
+    search index (``storage.search``; ``SEARCH_INDEX=off`` disables it).
+    """
+
+    FILENAME = re.compile(r'^case_study_([0-9a-zA-Z_-]+)\.json$')
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getenv('CASE_STUDY_DIR') or tempfile.gettempdir()
+        os.makedirs(self.directory, exist_ok=True)
+        self._search_index = None
+        self._search_index_opened = False
+        self._search_index_lock = threading.Lock()
+
+    @property
+    def search_index(self):
+        """The archive's SearchIndex, opened on first use; None when disabled or unavailable."""
+        with self._search_index_lock:
+            if not self._search_index_opened:
+                from .search import SearchIndex
+                try:
+                    self._search_index = SearchIndex.from_env(self.directory)
+                except RuntimeError as e:
+                    logging.getLogger('case_study.search').warning('Search index disabled: %s', e)
+                self._search_index_opened = True
+            return self._search_index
+
+    def path(self, case_study_id: str) -> str:
+        if not re.fullmatch(r'[0-9a-zA-Z_-]+', case_study_id):
+            raise ValueError(f'Invalid case study id: {case_study_id!r}')
+        return os.path.join(self.directory, f'case_study_{case_study_id}.json')
+
+    def save(self, case_study: CaseStudy) -> str:
+        """Store a case study, assigning an id if it has none; return the id."""
+        if not case_study.id:
+            case_study.id = secrets.token_hex(8)
+        path = self.path(case_study.id)
+        image = case_study.feature_image
+        written = image is not None and self._save_images(case_study.id, image)
+        self._write(path, case_study.to_json().encode('utf-8'))
+        if written:
+            self._remove_unused_images(case_study.id, image)
+        self._index(case_study, path)
+        return case_study.id
+
+    def images_path(self, case_study_id: str) -> str:
+        return os.path.join(self.directory, f'case_study_{case_study_id}.images')
+
+    def _save_images(self, case_study_id: str, image: FeatureImage) -> bool:
+        """
+        Move the bytes of new image files out of the model into files, leaving
+        ``path`` behind; returns whether any were written. A base64 original
+        and its variants would otherwise make up most of the JSON file, and be
+        parsed on every load.
+        """
+        new = [file for file in image.files if file.data is not None]
+        if new:
+            directory = self.images_path(case_study_id)
+            os.makedirs(directory, exist_ok=True)
+            for file in new:
+                self._write(os.path.join(directory, file.filename), file.data)
+                file.path = f'{os.path.basename(directory)}/{file.filename}'
+                file.data = None
+        image.attach(self.directory)
+        return bool(new)
+
+    def _remove_unused_images(self, case_study_id: str, image: FeatureImage) -> None:
+        # Variants dropped by re-processing; only after the JSON stopped referencing them
+        used = {file.filename for file in image.files}
+        directory = self.images_path(case_study_id)
+        for name in os.listdir(directory):
+            if name not in used and not name.startswith('.'):
+                try:
+                    os.unlink(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.case_study_', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def update(self, case_study_id: str, change: Callable[[CaseStudy], None]) -> CaseStudy:
+        """
+        Load a case study, apply ``change`` to it and save it, holding a lock
+        on that case study so concurrent updates (from other threads, or
+        other worker processes where ``fcntl`` is available) aren't lost.
+        """
+        with self._locked(case_study_id):
+            case_study = self.load(case_study_id)
+            change(case_study)
+            self.save(case_study)
+        return case_study
+
+    @contextmanager
+    def _locked(self, case_study_id: str):
+        path = self.path(case_study_id)
+        with _update_locks_guard:
+            lock = _update_locks.setdefault(path, threading.Lock())
+        with lock:
+            if fcntl is None:
+                yield
+                return
+            fd = os.open(os.path.join(self.directory, f'.case_study_{case_study_id}.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)
+
+    def _index(self, case_study: CaseStudy, path: str) -> None:
+        # The file is the record; an index that can't be written is caught up by ``manage.py reindex``
+        index = self.search_index
+        if index is None:
+            return
+        try:
+            index.add(case_study, os.stat(path).st_mtime)
+        except (sqlite3.Error, OSError) as e:
+            metrics.increment('search.index_failed')
+            logging.getLogger('case_study.search').warning('Could not index case study %s: %s', case_study.id, e)
+
+    def load(self, case_study_id: str) -> CaseStudy:
+        """Load a case study; raises FileNotFoundError if it doesn't exist."""
+        with open(self.path(case_study_id), 'rb') as f:
+            case_study = CaseStudy.from_json(f.read())
+        if not case_study.id:
+            case_study.id = case_study_id
+        if case_study.feature_image is not None:
+            case_study.feature_image.attach(self.directory)
+        return case_study
+
+    def exists(self, case_study_id: str) -> bool:
+        return os.path.exists(self.path(case_study_id))
+
+    def ids(self) -> Iterator[str]:
+        """Ids of all stored case studies."""
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                match = self.FILENAME.match(entry.name)
+                if match:
+                    yield match.group(1)
+
+    def __iter__(self) -> Iterator[CaseStudy]:
+        for case_study_id in self.ids():
+            try:
+                yield self.load(case_study_id)
+            except (FileNotFoundError, ValueError):
+                # Deleted since listing, or not a case study we can read
+                continue
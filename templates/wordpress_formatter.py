@@ -1,5 +1,6 @@
 from jinja2 import Template
 from typing import List
+from runtime.timing import timed
 
 
 class WordPressFormatter:
@@ -68,6 +69,7 @@ class WordPressFormatter:
         return '\n\n'.join(result_lines)
     
     @staticmethod
+    @timed('format_section')
     def format_section(title: str, content: str) -> str:
         """Format a complete section with heading and content."""
         formatted_content = WordPressFormatter.parse_content_for_lists(content)
@@ -5,74 +5,161 @@ Case Study Generator Web Interface
 A Flask web application for generating case studies with AI assistance.
 """
 
+from __future__ import annotations
+
 import os
 import secrets
 import json
-import tempfile
-from flask import Flask, render_template, request, flash, redirect, url_for, jsonify, session
-from flask_wtf import FlaskForm
-from wtforms import StringField, TextAreaField, SubmitField
-from wtforms.validators import DataRequired, Length
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING
+from flask import (Flask, render_template, request, flash, redirect, url_for, jsonify, session, Response,
+                   stream_with_context, abort)
 from datetime import datetime
 
 # Load environment variables (only if dotenv is available and .env file exists)
-try:
-    from dotenv import load_dotenv
-    if os.path.exists('.env'):
+if os.path.exists('.env'):
+    try:
+        from dotenv import load_dotenv
         load_dotenv()
-except ImportError:
-    # dotenv not available, which is fine for production
-    pass
+    except ImportError:
+        # dotenv not available, which is fine for production
+        pass
 
-from models import CaseStudyInput, CaseStudy, CaseStudySection
-from ai import AIContentGenerator
-from templates import WordPressFormatter
+# Heavy dependencies (pydantic models, openai, wtforms, the formatter) are
+# imported inside the functions that need them so that a cold start serving
+# /health only pays for Flask. See benchmarks/cold_start.py.
+if TYPE_CHECKING:
+    from models import CaseStudyInput, CaseStudy
+    from ai import AIContentGenerator
+
+from runtime import timing, metrics, compression, usage
+from runtime.timing import phase
+from runtime.admission import AdmissionController, AdmissionRejected
+from runtime.breaker import CircuitOpen
+from runtime.deadline import DISCONNECTED, Deadline, DeadlineExceeded
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', secrets.token_hex(16))
+timing.init_app(app)
+compression.init_app(app)
+admission = AdmissionController.from_env()
+
+def offline_backend() -> bool:
+    """True when LLM_BACKEND=offline selects the canned-content stand-in."""
+    return os.getenv('LLM_BACKEND', 'openai').lower() == 'offline'
+
+
+def create_content_generator() -> AIContentGenerator:
+    """Create the content generator for the configured LLM backend."""
+    if offline_backend():
+        from ai import OfflineContentGenerator
+        return OfflineContentGenerator()
+    from ai import AIContentGenerator
+    return AIContentGenerator()
+
+
+_image_backend = None
+_image_backend_lock = threading.Lock()
+
+
+def get_image_backend():
+    """Feature image backend (FEATURE_IMAGE_BACKEND), or None when the image stage is off."""
+    global _image_backend
+    with _image_backend_lock:
+        if _image_backend is None:
+            from ai.images import create_image_backend
+            _image_backend = create_image_backend() or False
+        return _image_backend or None
+
+
+_image_processor = None
+
+
+def get_image_processor():
+    """Process pool that post-processes feature images, or None (see media.ImageProcessor.from_env)."""
+    global _image_processor
+    with _image_backend_lock:
+        if _image_processor is None:
+            from media import ImageProcessor
+            _image_processor = ImageProcessor.from_env() or False
+        return _image_processor or None
+
+
+_store = None
+
+
+def get_store():
+    """Case study store shared by the routes (CASE_STUDY_DIR, default: temp dir)."""
+    global _store
+    if _store is None:
+        from storage import CaseStudyStore
+        _store = CaseStudyStore()
+    return _store
+
+
+def json_response(body: str, status: int = 200) -> Response:
+    """Response for an already serialized JSON body."""
+    return Response(body, status=status, mimetype='application/json')
+
+
+def include_sections() -> bool:
+    """``?include_sections=false`` drops the raw sections from API responses."""
+    return request.args.get('include_sections', 'true').lower() not in ('0', 'false', 'no')
+
+
+def admission_client_key():
+    """Identity used for per-client fair share (ADMISSION_CLIENT_KEY=ip|api_key)."""
+    if os.getenv('ADMISSION_CLIENT_KEY', 'ip') == 'api_key':
+        return request.headers.get('X-API-Key') or request.remote_addr
+    return request.remote_addr
 
-class CaseStudyForm(FlaskForm):
-    """Form for case study input."""
-    client_name = StringField('Client/Company Name', 
-                             validators=[DataRequired(), Length(min=2, max=100)],
-                             render_kw={"placeholder": "e.g., Northeastern University London"})
-    
-    industry = StringField('Industry/Sector', 
-                          validators=[DataRequired(), Length(min=2, max=50)],
-                          render_kw={"placeholder": "e.g., Higher Education"})
-    
-    main_challenge = TextAreaField('Main Challenge', 
-                                  validators=[DataRequired(), Length(min=10, max=500)],
-                                  render_kw={"placeholder": "Describe the primary challenge faced by the client...", "rows": 3})
-    
-    solution_provided = TextAreaField('Solution Provided', 
-                                     validators=[DataRequired(), Length(min=10, max=500)],
-                                     render_kw={"placeholder": "Describe the solution that was implemented...", "rows": 3})
-    
-    location = StringField('Location (Optional)', 
-                          render_kw={"placeholder": "e.g., London, UK"})
-    
-    project_scale = StringField('Project Scale/Size (Optional)', 
-                               render_kw={"placeholder": "e.g., 2.5 floors, 1300 students"})
-    
-    technologies_used = StringField('Technologies Used (Optional)', 
-                                   render_kw={"placeholder": "e.g., CEL-FI QUATRA 1000, CAT-6 cabling (comma-separated)"})
-    
-    additional_context = TextAreaField('Additional Context (Optional)', 
-                                      render_kw={"placeholder": "Any additional details or context...", "rows": 2})
-    
-    submit = SubmitField('Generate Case Study', render_kw={"class": "btn btn-primary btn-lg"})
+
+@app.errorhandler(AdmissionRejected)
+@app.errorhandler(CircuitOpen)
+def admission_rejected(e):
+    """Fail fast with 503 + Retry-After when generation capacity is exhausted or the LLM API is down."""
+    headers = {'Retry-After': str(e.retry_after)}
+    if request.path.startswith('/api/'):
+        return jsonify({'error': str(e), 'retry_after': e.retry_after}), 503, headers
+    if isinstance(e, CircuitOpen):
+        flash(f'The AI service is unavailable right now. Please try again in {e.retry_after} seconds.', 'warning')
+    else:
+        flash(f'The generator is busy right now. Please try again in {e.retry_after} seconds.', 'warning')
+    from forms import CaseStudyForm
+    return render_template('index.html', form=CaseStudyForm()), 503, headers
+
+
+@app.errorhandler(DeadlineExceeded)
+def deadline_exceeded(e):
+    """504 when a generation ran out of request time (REQUEST_DEADLINE / X-Request-Timeout)."""
+    if request.path.startswith('/api/'):
+        return jsonify({'error': str(e)}), 504
+    flash('Generating the case study took too long. Please try again.', 'warning')
+    from forms import CaseStudyForm
+    return render_template('index.html', form=CaseStudyForm()), 504
+
+
+def request_deadline() -> Deadline:
+    return Deadline.from_request(request.headers.get('X-Request-Timeout'))
 
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
     """Main page with the case study form."""
+    from ai.pipeline import requested_candidates
+    from forms import CaseStudyForm
+    from models import CaseStudyInput
+    
     form = CaseStudyForm()
     
     if form.validate_on_submit():
         try:
             # Check for API key
-            if not os.getenv('OPENAI_API_KEY') or os.getenv('OPENAI_API_KEY') == 'your_openai_api_key_here':
+            from ai.cassette import replaying
+            api_key = os.getenv('OPENAI_API_KEY')
+            if not (offline_backend() or replaying()) and (not api_key or api_key == 'your_openai_api_key_here'):
                 flash('Please configure your OpenAI API key in the .env file', 'error')
                 return render_template('index.html', form=form)
             
@@ -94,39 +181,26 @@ def index():
             )
             
             # Generate case study
-            generator = AIContentGenerator()
-            case_study = generate_case_study(generator, case_input)
-            
-            # Store case study data in a temporary file for preview
-            case_study_data = {
-                'title': case_study.title,
-                'sections': [
-                    {
-                        'title': section.title,
-                        'content': section.content,
-                        'section_type': section.section_type
-                    }
-                    for section in case_study.sections
-                ],
-                'wordpress_content': case_study.wordpress_content,
-                'client_name': case_input.client_name
-            }
-            
-            # Create a unique filename for this case study
-            case_study_id = secrets.token_hex(8)
-            temp_file = os.path.join(tempfile.gettempdir(), f'case_study_{case_study_id}.json')
+            generator = create_content_generator()
+            with request_deadline().bind(), admission.admit(admission_client_key()):
+                case_study = generate_case_study(generator, case_input, requested_candidates(form.candidates.data))
             
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(case_study_data, f, ensure_ascii=False, indent=2)
+            # Store the case study for the preview page
+            with phase('store.write'):
+                case_study_id = get_store().save(case_study)
             
             # Store only the ID in session
             session['current_case_study_id'] = case_study_id
             
-            return render_template('result.html', 
-                                 case_study=case_study, 
-                                 client_name=case_input.client_name,
-                                 case_study_id=case_study_id)
+            with phase('render'):
+                return render_template('result.html', 
+                                     case_study=case_study, 
+                                     client_name=case_input.client_name,
+                                     case_study_id=case_study_id,
+                                     candidate_form=candidate_form())
             
+        except (AdmissionRejected, CircuitOpen, DeadlineExceeded):
+            raise
         except Exception as e:
             flash(f'Error generating case study: {str(e)}', 'error')
             return render_template('index.html', form=form)
@@ -137,98 +211,215 @@ def index():
 @app.route('/api/generate', methods=['POST'])
 def api_generate():
     """API endpoint for generating case studies."""
+    from ai.pipeline import requested_candidates
+    from models import CaseStudyInput
+    
     try:
         data = request.get_json()
         
-        # Validate required fields
-        required_fields = ['client_name', 'industry', 'main_challenge', 'solution_provided']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-        
-        # Parse technologies
-        tech_list = None
-        if data.get('technologies_used'):
-            if isinstance(data['technologies_used'], str):
-                tech_list = [tech.strip() for tech in data['technologies_used'].split(',') if tech.strip()]
-            else:
-                tech_list = data['technologies_used']
-        
-        # Create input model
-        case_input = CaseStudyInput(
-            client_name=data['client_name'],
-            industry=data['industry'],
-            main_challenge=data['main_challenge'],
-            solution_provided=data['solution_provided'],
-            location=data.get('location'),
-            project_scale=data.get('project_scale'),
-            technologies_used=tech_list,
-            additional_context=data.get('additional_context')
-        )
+        try:
+            case_input = CaseStudyInput.from_payload(data)
+            candidates = requested_candidates(data.get('candidates'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Generate case study
-        generator = AIContentGenerator()
-        case_study = generate_case_study(generator, case_input)
+        generator = create_content_generator()
+        with request_deadline().bind(), admission.admit(admission_client_key()):
+            case_study = generate_case_study(generator, case_input, candidates)
+        
+        # Stored so the returned id resolves (preview, search, quality, publish) and a paid image is kept
+        with phase('store.write'):
+            get_store().save(case_study)
         
-        return jsonify({
-            'title': case_study.title,
-            'wordpress_content': case_study.wordpress_content,
-            'sections': [
-                {
-                    'title': section.title,
-                    'content': section.content,
-                    'section_type': section.section_type
-                }
-                for section in case_study.sections
-            ]
-        })
+        return json_response(case_study.to_payload_json(include_sections()))
         
+    except (AdmissionRejected, CircuitOpen, DeadlineExceeded):
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
-def generate_case_study(generator: AIContentGenerator, case_input: CaseStudyInput) -> CaseStudy:
-    """Generate a complete case study."""
+@app.route('/api/generate/batch', methods=['POST'])
+def api_generate_batch():
+    """
+    Generate many case studies in one call.
     
-    # Generate content for each section
-    summary_content = generator.generate_summary(case_input)
-    client_content = generator.generate_client_section(case_input)
-    challenges_content = generator.generate_challenges_section(case_input)
-    solution_content = generator.generate_solution_section(case_input)
-    results_content = generator.generate_results_section(case_input)
+    Accepts a JSON array of inputs (or ``{"items": [...]}``). Every item is
+    validated before any generation starts; results are streamed back as
+    NDJSON, one line per item in completion order, followed by a summary line.
+    """
+    from models import CaseStudyInput
     
-    # Create sections
-    sections = [
-        CaseStudySection(title="Summary", content=summary_content, section_type="summary"),
-        CaseStudySection(title="The Client", content=client_content, section_type="client"),
-        CaseStudySection(title="The Challenges", content=challenges_content, section_type="challenges"),
-        CaseStudySection(title="The Solution", content=solution_content, section_type="solution"),
-        CaseStudySection(title="The Results", content=results_content, section_type="results")
-    ]
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Expected a non-empty JSON array of case study inputs'}), 400
     
-    # Format for WordPress
-    formatter = WordPressFormatter()
-    wordpress_content = format_wordpress_content(formatter, sections)
+    max_items = int(os.getenv('BATCH_MAX_ITEMS', '100'))
+    if len(items) > max_items:
+        return jsonify({'error': f'Batch too large: {len(items)} items (maximum {max_items})'}), 413
     
-    # Generate title
-    title = f"Case Study: {case_input.client_name} - {case_input.main_challenge}"
+    # Validate everything up front so a bad item can't waste a half-finished batch
+    inputs = []
+    invalid = []
+    for index, item in enumerate(items):
+        try:
+            inputs.append(CaseStudyInput.from_payload(item))
+        except ValueError as e:
+            invalid.append({'index': index, 'error': str(e)})
+    if invalid:
+        return jsonify({'error': 'Invalid batch items', 'items': invalid}), 400
+    
+    try:
+        generator = create_content_generator()
+        # Batches run far longer than one generation, so they have their own limit (none by default)
+        deadline = Deadline.from_request(request.headers.get('X-Request-Timeout'), 'BATCH_DEADLINE', 'off')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
     
-    return CaseStudy(
-        title=title,
-        sections=sections,
-        wordpress_content=wordpress_content
-    )
+    # The whole batch holds one admission slot; its own concurrency is bounded by the batch pool.
+    # From here the stream releases it, so anything failing before the stream starts must too.
+    ticket = admission.acquire(admission_client_key())
+    try:
+        return Response(stream_with_context(_stream_batch(generator, inputs, ticket, include_sections(), deadline)),
+                        mimetype='application/x-ndjson')
+    except BaseException:
+        ticket.release()
+        raise
+
+
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
 
 
-def format_wordpress_content(formatter: WordPressFormatter, sections) -> str:
-    """Format sections into WordPress block content."""
-    formatted_sections = []
+def _get_batch_executor() -> ThreadPoolExecutor:
+    """Process-wide pool shared by all batch requests (BATCH_MAX_CONCURRENCY)."""
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            _batch_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('BATCH_MAX_CONCURRENCY', '4')),
+                thread_name_prefix='batch-generate',
+            )
+        return _batch_executor
+
+
+def _generate_and_store(generator: AIContentGenerator, case_input) -> CaseStudy:
+    case_study = generate_case_study(generator, case_input)
+    with phase('store.write'):
+        get_store().save(case_study)
+    return case_study
+
+
+def _stream_batch(generator: AIContentGenerator, inputs, ticket, with_sections: bool = True,
+                  deadline: Deadline = None):
+    """
+    Yield one NDJSON line per finished item, then a summary line.
+
+    If the client disconnects, items not started yet are dropped and
+    running ones stop before their next LLM call.
+    """
+    from ai.pipeline import CASE_STUDY_SECTIONS, skip_sections
     
-    for section in sections:
-        formatted_section = formatter.format_section(section.title, section.content)
-        formatted_sections.append(formatted_section)
+    executor = _get_batch_executor()
+    batch_id = secrets.token_hex(8)
+    deadline = deadline or Deadline()
+    with usage.scope(batch=batch_id), deadline.bind():
+        futures = {
+            executor.submit(contextvars.copy_context().run, _generate_and_store, generator, case_input): index
+            for index, case_input in enumerate(inputs)
+        }
+    succeeded = failed = 0
+    finished = False
+    try:
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                case_study_json = future.result().to_payload_json(with_sections)
+                line = f'{{"index": {index}, "ok": true, "case_study": {case_study_json}}}'
+                succeeded += 1
+            except Exception as e:
+                line = json.dumps({'index': index, 'ok': False, 'error': str(e)}, ensure_ascii=False)
+                failed += 1
+            yield line + '\n'
+        yield json.dumps({'summary': {'batch': batch_id, 'total': len(inputs),
+                                      'succeeded': succeeded, 'failed': failed}}) + '\n'
+        finished = True
+    finally:
+        if not finished:
+            # The client went away: don't start items nobody will read, and stop the running ones
+            deadline.cancel(DISCONNECTED)
+            section_types = [section_type for _, section_type, _ in CASE_STUDY_SECTIONS]
+            for future, index in futures.items():
+                if future.cancel():
+                    skip_sections(generator, inputs[index], section_types)
+        ticket.release()
+
+
+_image_executor = None
+_image_executor_lock = threading.Lock()
+
+
+def _get_image_executor() -> ThreadPoolExecutor:
+    """Process-wide pool for feature images running alongside section calls (IMAGE_MAX_CONCURRENCY)."""
+    global _image_executor
+    with _image_executor_lock:
+        if _image_executor is None:
+            _image_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('IMAGE_MAX_CONCURRENCY', '4')),
+                thread_name_prefix='feature-image',
+            )
+        return _image_executor
+
+
+def generate_case_study(generator: AIContentGenerator, case_input: CaseStudyInput,
+                        candidates: int = 1) -> CaseStudy:
+    """
+    Generate a complete case study.
+
+    With ``candidates`` > 1 each section call asks for that many completions
+    at once (``n=``); they are ranked locally and stored on the section.
+    Each section is validated as soon as it arrives (``ai.validation``) and
+    only failing sections are regenerated, within a RetryBudget.
+    """
+    from ai.pipeline import (CASE_STUDY_SECTIONS, RetryBudget, assemble_case_study, generate_feature_image,
+                             generate_section, remember_sections, skip_sections)
     
-    return '\n\n'.join(formatted_sections)
+    # The image stage starts first so it overlaps the section calls
+    image_future = None
+    image_backend = get_image_backend()
+    if image_backend is not None:
+        image_future = _get_image_executor().submit(
+            contextvars.copy_context().run, generate_feature_image, image_backend, case_input,
+            get_image_processor())
+    
+    # Generate content for each section, regenerating only sections that fail validation
+    contents = {}
+    budget = RetryBudget()
+    # The id is assigned up front so the usage ledger can attribute every call to it
+    case_study_id = secrets.token_hex(8)
+    try:
+        with usage.scope(case_study=case_study_id):
+            for _, section_type, _ in CASE_STUDY_SECTIONS:
+                contents[section_type] = generate_section(generator, section_type, case_input, budget, candidates)
+    except Exception as e:
+        if image_future is not None:
+            image_future.cancel()
+        if isinstance(e, DeadlineExceeded):
+            # The refused call was counted by the generator; the sections after it never start
+            pending = [section_type for _, section_type, _ in CASE_STUDY_SECTIONS if section_type not in contents]
+            skip_sections(generator, case_input, pending[1:], candidates)
+        raise
+    
+    case_study = assemble_case_study(case_input, contents)
+    case_study.id = case_study_id
+    with phase('cache.write'):
+        remember_sections(case_input, case_study)
+    if image_future is not None:
+        with phase('image.wait'):
+            case_study.feature_image = image_future.result()
+    return case_study
 
 
 @app.route('/test-preview')
@@ -273,53 +464,41 @@ def test_preview():
     
     current_date = datetime.now().strftime("%B %d, %Y")
     
-    return render_template('uctel_website_preview.html', 
-                         case_study=case_study,
-                         current_date=current_date)
+    with phase('render'):
+        return render_template('uctel_website_preview.html', 
+                             case_study=case_study,
+                             current_date=current_date)
 
 
 @app.route('/preview')
 def website_preview_direct():
-    """Direct website preview using temporary file data."""
+    """Direct website preview of the case study stored for this session."""
     case_study_id = session.get('current_case_study_id')
     
     if not case_study_id:
         flash('Please generate a case study first to see the website preview.', 'info')
         return redirect(url_for('index'))
     
-    # Load case study data from temporary file
-    temp_file = os.path.join(tempfile.gettempdir(), f'case_study_{case_study_id}.json')
-    
-    if not os.path.exists(temp_file):
+    try:
+        with phase('store.read'):
+            case_study = get_store().load(case_study_id)
+    except FileNotFoundError:
         flash('Case study data not found. Please generate a new case study.', 'warning')
         return redirect(url_for('index'))
+    except Exception as e:
+        flash(f'Error loading case study preview: {str(e)}', 'error')
+        return redirect(url_for('index'))
     
     try:
-        with open(temp_file, 'r', encoding='utf-8') as f:
-            case_study_data = json.load(f)
-        
-        # Convert data back to case study object structure
-        from types import SimpleNamespace
-        
-        sections = []
-        for section_data in case_study_data['sections']:
-            section = SimpleNamespace()
-            section.title = section_data['title']
-            section.content = section_data['content']
-            section.section_type = section_data['section_type']
-            sections.append(section)
-        
-        case_study = SimpleNamespace()
-        case_study.title = case_study_data['title']
-        case_study.sections = sections
-        case_study.wordpress_content = case_study_data['wordpress_content']
-        case_study.client_name = case_study_data.get('client_name', 'Client Name')
+        if not case_study.client_name:
+            case_study.client_name = 'Client Name'
         
         current_date = datetime.now().strftime("%B %d, %Y")
         
-        return render_template('uctel_website_preview.html', 
-                             case_study=case_study,
-                             current_date=current_date)
+        with phase('render'):
+            return render_template('uctel_website_preview.html', 
+                                 case_study=case_study,
+                                 current_date=current_date)
     
     except Exception as e:
         flash(f'Error loading case study preview: {str(e)}', 'error')
@@ -338,12 +517,155 @@ def website_preview(case_study_id):
     return redirect(url_for('index'))
 
 
+@app.route('/case-studies/<case_study_id>')
+def case_study_result(case_study_id):
+    """Result page for a stored case study (where candidate switches return to)."""
+    try:
+        with phase('store.read'):
+            case_study = get_store().load(case_study_id)
+    except (FileNotFoundError, ValueError):
+        flash('Case study data not found. Please generate a new case study.', 'warning')
+        return redirect(url_for('index'))
+    
+    session['current_case_study_id'] = case_study.id
+    with phase('render'):
+        return render_template('result.html',
+                             case_study=case_study,
+                             client_name=case_study.client_name or 'Client Name',
+                             case_study_id=case_study.id,
+                             candidate_form=candidate_form())
+
+
+def candidate_form():
+    """CSRF token for the result page's draft switches."""
+    from forms import SelectCandidateForm
+    return SelectCandidateForm(formdata=None)
+
+
+def _select_stored_candidate(case_study_id: str, section_type: str, index) -> CaseStudy:
+    """Switch one section's candidate in the store; raises LookupError/ValueError."""
+    from ai.pipeline import candidate_index, select_candidate
+    
+    index = candidate_index(index)
+    with phase('store.write'):
+        return get_store().update(case_study_id, lambda case_study: select_candidate(case_study, section_type, index))
+
+
+@app.route('/case-studies/<case_study_id>/sections/<section_type>/candidate', methods=['POST'])
+def select_section_candidate(case_study_id, section_type):
+    """Switch a section to another stored candidate from the result page."""
+    from forms import SelectCandidateForm
+    
+    if not SelectCandidateForm().validate_on_submit():
+        abort(400, 'The form has expired or did not come from this site. Reload the page and try again.')
+    try:
+        _select_stored_candidate(case_study_id, section_type, request.form.get('index', ''))
+    except FileNotFoundError:
+        flash('Case study data not found. Please generate a new case study.', 'warning')
+        return redirect(url_for('index'))
+    except (LookupError, ValueError) as e:
+        flash(f'Could not switch candidate: {e}', 'error')
+    return redirect(url_for('case_study_result', case_study_id=case_study_id) + f'#section-{section_type}')
+
+
+@app.route('/api/case-studies/<case_study_id>/sections/<section_type>/candidate', methods=['POST'])
+def api_select_section_candidate(case_study_id, section_type):
+    """Switch a section to another stored candidate: ``{"index": 1}``."""
+    data = request.get_json(silent=True) or {}
+    try:
+        case_study = _select_stored_candidate(case_study_id, section_type, data.get('index'))
+    except FileNotFoundError:
+        return jsonify({'error': 'Case study not found'}), 404
+    except KeyError:
+        return jsonify({'error': f'Unknown section: {section_type}'}), 404
+    except (IndexError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return json_response(case_study.to_payload_json(include_sections()))
+
+
+@app.route('/case-studies/<case_study_id>/images/<filename>')
+def case_study_image(case_study_id, filename):
+    """A stored case study's feature image or one of its processed variants."""
+    data = None
+    try:
+        with phase('store.read'):
+            image = get_store().load(case_study_id).feature_image
+            if image is not None and filename != image.filename:
+                image = image.variant(filename)
+            if image is not None:
+                data = image.read()
+    except (FileNotFoundError, ValueError):
+        pass
+    if data is None:
+        return jsonify({'error': 'Image not found'}), 404
+    return Response(data, mimetype=image.mime_type, headers={'Cache-Control': 'public, max-age=3600'})
+
+
+@app.route('/api/search')
+def api_search():
+    """Full-text search over stored case studies: ``?q=CEL-FI QUATRA&limit=20&offset=0``."""
+    from storage.search import page_bounds
+    
+    index = get_store().search_index
+    if index is None:
+        return jsonify({'error': 'Search is disabled'}), 503
+    try:
+        limit, offset = page_bounds(request.args.get('limit'), request.args.get('offset'))
+        with phase('search'):
+            hits = index.search(request.args.get('q', ''), limit, offset)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'query': request.args.get('q', ''), 'offset': offset,
+                    'results': [hit.as_dict() for hit in hits]})
+
+
+@app.route('/api/case-studies/<case_study_id>/quality')
+def api_case_study_quality(case_study_id):
+    """Readability, sentence length, bullet density, repetition and keyword coverage of each section."""
+    from ai import quality
+    from ai.validation import quality_report
+    if not quality.available():
+        return jsonify({'error': 'Quality metrics need NumPy'}), 503
+    try:
+        with phase('store.read'):
+            case_study = get_store().load(case_study_id)
+    except (FileNotFoundError, ValueError):
+        return jsonify({'error': 'Case study not found'}), 404
+    with phase('quality'):
+        sections = quality_report(case_study)
+    return jsonify({'id': case_study.id, 'sections': sections})
+
+
+@app.route('/api/export/wxr')
+def api_export_wxr():
+    """The whole archive as a WordPress import (WXR) file, streamed; ``?gzip=1`` compresses it."""
+    from export.wxr import POST_STATUSES, stream_wxr
+    
+    # Checked before streaming starts: an error mid-stream can't change the response status
+    status = request.args.get('status', 'draft')
+    if status not in POST_STATUSES:
+        return jsonify({'error': f"status must be one of {', '.join(POST_STATUSES)}"}), 400
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    filename = 'case_studies.xml.gz' if compress else 'case_studies.xml'
+    chunks = stream_wxr(get_store(), compress, status=status,
+                        post_type=os.getenv('WORDPRESS_POST_TYPE', 'case'),
+                        category_taxonomy=os.getenv('WORDPRESS_CATEGORY_TAXONOMY', 'case_category'))
+    return Response(stream_with_context(chunks), mimetype='application/gzip' if compress else 'application/rss+xml',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
 @app.route('/health')
 def health():
     """Health check endpoint."""
     return jsonify({'status': 'healthy', 'message': 'Case Study Generator is running'})
 
 
+@app.route('/metrics')
+def metrics_snapshot():
+    """In-process counters and gauges for this worker."""
+    return jsonify(metrics.snapshot())
+
+
 if __name__ == '__main__':
     # Check if running in development
     debug_mode = os.getenv('FLASK_ENV') == 'development'
@@ -0,0 +1,7 @@
+from .client import WordPressClient, WordPressError, MediaFile
+from .publisher import Publisher, PublishJob, PublishResult, PublishLedger, SyncItem, SyncPlan, plan_sync
+from .taxonomy import TaxonomyCache
+
+__all__ = ['WordPressClient', 'WordPressError', 'MediaFile',
+           'Publisher', 'PublishJob', 'PublishResult', 'PublishLedger', 'SyncItem', 'SyncPlan', 'plan_sync',
+           'TaxonomyCache']
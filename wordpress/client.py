@@ -0,0 +1,167 @@
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class WordPressError(Exception):
+    """Raised when the WordPress REST API returns an error."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"WordPress API error {status}: {message}")
+        self.status = status
+
+
+# Methods the client resends after a transient failure. WordPress ignores
+# Idempotency-Key, so a POST that succeeded before a 5xx or a dropped
+# connection would create a second post or media item when resent.
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'PATCH', 'DELETE'})
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed request is worth trying again (connection errors, timeouts, 429 and 5xx)."""
+    if isinstance(error, WordPressError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+@dataclass
+class MediaFile:
+    """An image (or other attachment) to upload to the media library."""
+    data: bytes
+    filename: str
+    mime_type: str = 'image/png'
+    alt_text: str = ''
+
+
+def media_slug(filename: str) -> str:
+    """The slug WordPress gives an upload: its file name without the extension, sanitized."""
+    return re.sub(r'[^a-z0-9]+', '-', os.path.splitext(filename)[0].lower()).strip('-')
+
+
+class WordPressClient:
+    """
+    Thin WordPress REST client over one keep-alive ``requests.Session``.
+
+    The session's connection pool is sized for ``pool_size`` concurrent
+    requests, so bulk publishing threads reuse TCP/TLS connections instead of
+    handshaking per call. Transient failures (connection errors, 429 and 5xx)
+    of idempotent requests are retried with exponential backoff; creates are
+    sent once, and ``Publisher`` looks for the created post before retrying.
+    """
+
+    def __init__(self, api_url: str, username: str, password: str, post_type: str = 'case',
+                 category_taxonomy: str = 'case_category', pool_size: int = 8,
+                 timeout: float = 30.0, retries: int = 3):
+        api_url = api_url.rstrip('/')
+        # WORDPRESS_API_URL may point at the post type collection (…/wp/v2/case)
+        base, _, last = api_url.rpartition('/')
+        if last == post_type:
+            api_url = base
+        self.api_url = api_url
+        self.post_type = post_type
+        self.category_taxonomy = category_taxonomy
+        self.timeout = timeout
+        self.retries = retries
+
+        self.session = requests.Session()
+        self.session.auth = (username, password)
+        self.session.headers['Accept'] = 'application/json'
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    @classmethod
+    def from_env(cls, **kwargs) -> 'WordPressClient':
+        """Build a client from WORDPRESS_API_URL, WORDPRESS_USERNAME and WORDPRESS_PASSWORD."""
+        api_url = os.getenv('WORDPRESS_API_URL')
+        username = os.getenv('WORDPRESS_USERNAME')
+        password = os.getenv('WORDPRESS_PASSWORD')
+        if not (api_url and username and password):
+            raise ValueError("WORDPRESS_API_URL, WORDPRESS_USERNAME and WORDPRESS_PASSWORD are required")
+        kwargs.setdefault('post_type', os.getenv('WORDPRESS_POST_TYPE', 'case'))
+        kwargs.setdefault('category_taxonomy', os.getenv('WORDPRESS_CATEGORY_TAXONOMY', 'case_category'))
+        return cls(api_url, username, password, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def request(self, method: str, path: str, idempotent: bool = None, **kwargs) -> requests.Response:
+        """
+        Send a request to ``{api_url}/{path}``, retrying transient failures
+        when it is safe to repeat (``idempotent``, default: by method).
+        """
+        url = f"{self.api_url}/{path.lstrip('/')}"
+        kwargs.setdefault('timeout', self.timeout)
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        last_attempt = self.retries if idempotent else 0
+        for attempt in range(last_attempt + 1):
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.ConnectionError:
+                if attempt == last_attempt:
+                    raise
+            else:
+                if response.status_code != 429 and response.status_code < 500:
+                    return response
+                if attempt == last_attempt:
+                    return response
+            self.backoff(attempt)
+        raise AssertionError('unreachable')
+
+    @staticmethod
+    def backoff(attempt: int) -> None:
+        time.sleep(min(2 ** attempt * 0.5, 8))
+
+    def request_json(self, method: str, path: str, **kwargs) -> Any:
+        response = self.request(method, path, **kwargs)
+        if response.status_code >= 400:
+            raise WordPressError(response.status_code, response.text[:500])
+        return response.json()
+
+    def create_post(self, title: str, content: str, status: str = 'draft', slug: str = None,
+                    featured_media: int = None, extra: Dict[str, Any] = None,
+                    idempotency_key: str = None) -> dict:
+        """Create a post of the configured post type."""
+        payload: Dict[str, Any] = {'title': title, 'content': content, 'status': status}
+        if slug:
+            payload['slug'] = slug
+        if featured_media:
+            payload['featured_media'] = featured_media
+        if extra:
+            payload.update(extra)
+        headers = {'Idempotency-Key': idempotency_key} if idempotency_key else None
+        return self.request_json('POST', self.post_type, json=payload, headers=headers)
+
+    def update_post(self, post_id: int, fields: Dict[str, Any]) -> dict:
+        return self.request_json('PATCH', f"{self.post_type}/{post_id}", json=fields)
+
+    def find_post_by_slug(self, slug: str) -> Optional[dict]:
+        """Return the post with ``slug`` in any status, or None."""
+        posts = self.request_json('GET', self.post_type, params={
+            'slug': slug, 'status': 'publish,future,draft,pending,private', 'context': 'edit',
+        })
+        return posts[0] if posts else None
+
+    def find_media_by_slug(self, slug: str) -> Optional[dict]:
+        """Return the media item with ``slug`` (see ``media_slug``), or None."""
+        items = self.request_json('GET', 'media', params={'slug': slug, 'context': 'edit'})
+        return items[0] if items else None
+
+    def upload_media(self, media: MediaFile) -> dict:
+        """Upload a file to the media library (sent once; see ``Publisher`` for retries)."""
+        headers = {
+            'Content-Type': media.mime_type,
+            'Content-Disposition': f'attachment; filename="{media.filename}"',
+        }
+        uploaded = self.request_json('POST', 'media', data=media.data, headers=headers)
+        if media.alt_text:
+            # Updates an existing item, so it is safe to resend
+            uploaded = self.request_json('POST', f"media/{uploaded['id']}", idempotent=True,
+                                         json={'alt_text': media.alt_text})
+        return uploaded
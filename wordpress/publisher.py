@@ -0,0 +1,423 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional
+
+from models.case_study import CaseStudy
+from .client import MediaFile, WordPressClient, is_transient, media_slug
+from .taxonomy import TaxonomyCache
+
+
+def idempotency_key(case_study: CaseStudy) -> str:
+    """Stable key for a case study, so retried publishes map to the same post."""
+    identity = case_study.id or f"{case_study.client_name}\n{case_study.title}"
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]
+
+
+def post_slug(case_study: CaseStudy, key: str) -> str:
+    """Slug carrying the idempotency key, which makes the post findable after a lost response."""
+    base = re.sub(r'[^a-z0-9]+', '-', case_study.title.lower()).strip('-')[:80].rstrip('-')
+    return f"{base}-{key[:12]}"
+
+
+# Block delimiters: <!-- wp:name {...} -->, <!-- /wp:name --> and self-closing <!-- wp:name /-->
+_BLOCK_DELIMITER = re.compile(r'<!--\s+(/)?wp:[\w/-]+\b.*?(/)?-->', re.S)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def split_blocks(content: str) -> List[str]:
+    """
+    Top-level blocks of block-editor content (nested blocks such as list
+    items stay inside their parent). Text between blocks counts as a
+    block of its own unless it is only whitespace.
+    """
+    blocks = []
+    depth = start = 0
+    for match in _BLOCK_DELIMITER.finditer(content):
+        closing, self_closing = match.group(1), match.group(2)
+        if depth == 0:
+            if content[start:match.start()].strip():
+                blocks.append(content[start:match.start()].strip())
+            start = match.start()
+        if closing:
+            depth = max(depth - 1, 0)
+        elif not self_closing:
+            depth += 1
+        if depth == 0:
+            blocks.append(content[start:match.end()])
+            start = match.end()
+    if content[start:].strip():
+        blocks.append(content[start:].strip())
+    return blocks
+
+
+def content_hashes(case_study: CaseStudy) -> Dict:
+    """The ledger fields ``plan_sync`` compares: hashes of the title, the content and each block."""
+    return {
+        'title_hash': content_hash(case_study.title),
+        'content_hash': content_hash(case_study.wordpress_content),
+        'block_hashes': [content_hash(block) for block in split_blocks(case_study.wordpress_content)],
+    }
+
+
+class PublishLedger:
+    """
+    Local record of published case studies keyed by idempotency key.
+
+    Stored next to the case study archive as a log of JSON lines, one per
+    change, so recording a post appends a line instead of rewriting the
+    file. The log is compacted to one line per post when it is opened; a
+    ledger written as a single JSON object is read and converted.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        if self._load():
+            self._compact()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            return dict(entry) if entry else None
+
+    def record(self, key: str, **fields) -> None:
+        line = json.dumps({'key': key, **fields}, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._entries.setdefault(key, {}).update(fields)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode('utf-8'))
+            finally:
+                os.close(fd)
+
+    def entries(self) -> Dict[str, dict]:
+        with self._lock:
+            return {key: dict(entry) for key, entry in self._entries.items()}
+
+    def _load(self) -> bool:
+        """Read the ledger into memory; True when the file should be compacted."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return False
+        try:
+            legacy = json.loads(text)
+        except ValueError:
+            legacy = None
+        if isinstance(legacy, dict) and all(isinstance(entry, dict) for entry in legacy.values()):
+            self._entries = legacy
+            return True
+        lines, torn = 0, False
+        for line in text.splitlines():
+            try:
+                change = json.loads(line)
+            except ValueError:
+                # A torn last line from a crashed writer; rewritten away so the next append starts clean
+                torn = True
+                continue
+            lines += 1
+            self._entries.setdefault(change.pop('key'), {}).update(change)
+        return torn or lines > len(self._entries)
+
+    def _compact(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.ledger_', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for key, entry in self._entries.items():
+                    f.write(json.dumps({'key': key, **entry}, separators=(',', ':')) + '\n')
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+@dataclass
+class PublishJob:
+    """
+    One case study to publish, with its optional featured image (default:
+    the feature image stored with the case study).
+
+    ``categories`` default to the case study's industry (as the Next.js
+    route does); terms that don't exist yet are created.
+    """
+    case_study: CaseStudy
+    featured_image: Optional[MediaFile] = None
+    status: str = 'draft'
+    extra: Dict = field(default_factory=dict)
+    categories: Optional[List[str]] = None
+    tags: List[str] = field(default_factory=list)
+    author: Optional[str] = None
+
+    def category_names(self) -> List[str]:
+        if self.categories is not None:
+            return self.categories
+        case_input = self.case_study.case_input
+        return [case_input.industry] if case_input and case_input.industry else []
+
+
+@dataclass
+class PublishResult:
+    case_study_id: Optional[str]
+    post_id: Optional[int] = None
+    link: Optional[str] = None
+    created: bool = False
+    error: Optional[str] = None
+    updated: bool = False
+
+
+def _raw(post: dict, name: str) -> Optional[str]:
+    value = post.get(name)
+    return value.get('raw') if isinstance(value, dict) else None
+
+
+@dataclass
+class SyncItem:
+    """
+    What ``Publisher.sync`` will do for one case study: ``create`` a post,
+    ``update`` it with ``fields`` (only the ones whose hash changed) or
+    leave it ``unchanged``.
+    """
+    case_study: CaseStudy
+    key: str
+    action: str
+    post_id: Optional[int] = None
+    fields: Dict = field(default_factory=dict)
+    hashes: Dict = field(default_factory=dict)
+    blocks_changed: int = 0
+    blocks_total: int = 0
+
+    @property
+    def payload_bytes(self) -> int:
+        if self.action == 'create':
+            return len(json.dumps({'title': self.case_study.title, 'content': self.case_study.wordpress_content}))
+        return len(json.dumps(self.fields)) if self.fields else 0
+
+
+@dataclass
+class SyncPlan:
+    items: List[SyncItem] = field(default_factory=list)
+
+    def with_action(self, action: str) -> List[SyncItem]:
+        return [item for item in self.items if item.action == action]
+
+    @property
+    def pending(self) -> List[SyncItem]:
+        return [item for item in self.items if item.action != 'unchanged']
+
+    @property
+    def payload_bytes(self) -> int:
+        return sum(item.payload_bytes for item in self.items)
+
+    def summary(self) -> str:
+        updates = self.with_action('update')
+        blocks_changed = sum(item.blocks_changed for item in updates)
+        blocks_total = sum(item.blocks_total for item in updates)
+        return (f"{len(self.pending)} of {len(self.items)} posts to send: "
+                f"{len(self.with_action('create'))} new, {len(updates)} changed "
+                f"({blocks_changed} of {blocks_total} blocks), {len(self.with_action('unchanged'))} unchanged; "
+                f"{self.payload_bytes / 1024:,.1f} KB of content")
+
+
+def plan_sync(ledger: PublishLedger, case_studies: Iterable[CaseStudy]) -> SyncPlan:
+    """
+    Compare each case study with the hashes recorded in the ledger when it
+    was last sent, without contacting WordPress. A post published before
+    hashes were recorded has nothing to compare with and is updated once.
+    """
+    plan = SyncPlan()
+    for case_study in case_studies:
+        key = idempotency_key(case_study)
+        entry = ledger.get(key)
+        hashes = content_hashes(case_study)
+        if entry is None:
+            plan.items.append(SyncItem(case_study, key, 'create', hashes=hashes))
+            continue
+        fields = {}
+        if entry.get('title_hash') != hashes['title_hash']:
+            fields['title'] = case_study.title
+        if entry.get('content_hash') != hashes['content_hash']:
+            fields['content'] = case_study.wordpress_content
+        previous = Counter(entry.get('block_hashes') or ())
+        blocks_changed = sum((Counter(hashes['block_hashes']) - previous).values())
+        plan.items.append(SyncItem(case_study, key, 'update' if fields else 'unchanged', entry['post_id'],
+                                   fields, hashes, blocks_changed if 'content' in fields else 0,
+                                   len(hashes['block_hashes'])))
+    return plan
+
+
+class Publisher:
+    """Publishes case studies as WordPress posts, idempotently and in parallel."""
+
+    def __init__(self, client: WordPressClient, ledger: PublishLedger, max_workers: int = 4,
+                 taxonomy: TaxonomyCache = None):
+        self.client = client
+        self.ledger = ledger
+        self.max_workers = max_workers
+        self.taxonomy = taxonomy or TaxonomyCache(client)
+
+    def _term_fields(self, job: PublishJob) -> Dict:
+        """Category, tag and author ids for the post, resolved through the taxonomy cache."""
+        fields: Dict = {}
+        categories = self.taxonomy.resolve(self.client.category_taxonomy, job.category_names())
+        if categories:
+            fields[self.client.category_taxonomy] = categories
+        tags = self.taxonomy.resolve('tags', job.tags)
+        if tags:
+            fields['tags'] = tags
+        if job.author:
+            author = self.taxonomy.user_id(job.author)
+            if author is None:
+                raise ValueError(f"Unknown WordPress author: {job.author}")
+            fields['author'] = author
+        return fields
+
+    @staticmethod
+    def _stored_feature_image(case_study: CaseStudy) -> Optional[MediaFile]:
+        """The feature image generated with the case study, if any."""
+        image = case_study.feature_image
+        if image is None:
+            return None
+        # Upload the optimized encoding when the image has been processed
+        upload = image.best_variant() or image
+        filename = f"{post_slug(case_study, idempotency_key(case_study))}-{upload.filename}"
+        return MediaFile(upload.read(), filename, upload.mime_type, image.alt_text)
+
+    def publish(self, job: PublishJob) -> PublishResult:
+        """
+        Publish one case study unless it already exists.
+
+        The local ledger is checked first, then the remote site by slug (which
+        embeds the idempotency key), so a retry after a lost response doesn't
+        create a duplicate post.
+        """
+        case_study = job.case_study
+        key = idempotency_key(case_study)
+        existing = self.ledger.get(key)
+        if existing:
+            return PublishResult(case_study.id, existing['post_id'], existing.get('link'))
+
+        slug = post_slug(case_study, key)
+        remote = self.client.find_post_by_slug(slug)
+        if remote is None:
+            featured_media = None
+            featured_image = job.featured_image or self._stored_feature_image(case_study)
+            if featured_image is not None:
+                featured_media = self._create(
+                    lambda: self.client.upload_media(featured_image),
+                    lambda: self.client.find_media_by_slug(media_slug(featured_image.filename)))['id']
+            extra = {**self._term_fields(job), **job.extra}
+            remote = self._create(
+                lambda: self.client.create_post(
+                    title=case_study.title,
+                    content=case_study.wordpress_content,
+                    status=job.status,
+                    slug=slug,
+                    featured_media=featured_media,
+                    extra=extra,
+                    idempotency_key=key,
+                ),
+                lambda: self.client.find_post_by_slug(slug))
+            created = True
+            hashes = content_hashes(case_study)
+        else:
+            created = False
+            # Found by slug: record hashes only for what the site is known to hold
+            hashes = content_hashes(case_study)
+            if _raw(remote, 'title') != case_study.title:
+                del hashes['title_hash']
+            if _raw(remote, 'content') != case_study.wordpress_content:
+                del hashes['content_hash'], hashes['block_hashes']
+
+        self.ledger.record(key, case_study_id=case_study.id, post_id=remote['id'], link=remote.get('link'),
+                           slug=slug, published_at=datetime.now(timezone.utc).isoformat(), **hashes)
+        return PublishResult(case_study.id, remote['id'], remote.get('link'), created)
+
+    def _create(self, create: Callable[[], dict], find: Callable[[], Optional[dict]]) -> dict:
+        """
+        Call ``create`` (a POST, which the client sends once) and retry it
+        after transient failures, first checking with ``find`` whether the
+        failed attempt created the resource after all.
+        """
+        for attempt in range(self.client.retries + 1):
+            if attempt:
+                self.client.backoff(attempt - 1)
+                found = find()
+                if found is not None:
+                    return found
+            try:
+                return create()
+            except Exception as e:
+                if attempt == self.client.retries or not is_transient(e):
+                    raise
+        raise AssertionError('unreachable')
+
+    def bulk_publish(self, jobs: Iterable[PublishJob],
+                     on_result: Callable[[PublishResult], None] = None) -> List[PublishResult]:
+        """
+        Publish many case studies with at most ``max_workers`` in flight.
+
+        Media uploads for different posts run concurrently; a failure is
+        reported in that job's result and doesn't stop the rest. Taxonomies
+        and users are prefetched once up front, so the per-post work resolves
+        terms from the cache.
+        """
+        unique_jobs = {}
+        for job in jobs:
+            # Two jobs for the same case study would race each other into duplicates
+            unique_jobs.setdefault(idempotency_key(job.case_study), job)
+        if unique_jobs:
+            self.taxonomy.prefetch()
+        return self._in_parallel([(job.case_study.id, self.publish, job) for job in unique_jobs.values()], on_result)
+
+    def _in_parallel(self, calls, on_result: Callable[[PublishResult], None] = None) -> List[PublishResult]:
+        """Run ``(case_study_id, function, argument)`` calls, ``max_workers`` at a time."""
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='wp-publish') as executor:
+            futures = {executor.submit(function, argument): case_study_id
+                       for case_study_id, function, argument in calls}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = PublishResult(futures[future], error=str(e))
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+        return results
+
+    def update(self, item: SyncItem) -> PublishResult:
+        """PATCH the changed fields of one post and record its new hashes."""
+        remote = self.client.update_post(item.post_id, item.fields)
+        recorded = dict(item.hashes, synced_at=datetime.now(timezone.utc).isoformat())
+        if remote.get('link'):
+            recorded['link'] = remote['link']
+        self.ledger.record(item.key, **recorded)
+        return PublishResult(item.case_study.id, item.post_id, remote.get('link'), updated=True)
+
+    def sync(self, plan: SyncPlan, status: str = 'draft',
+             on_result: Callable[[PublishResult], None] = None) -> List[PublishResult]:
+        """
+        Send what ``plan`` (from ``plan_sync``) says has changed: new case
+        studies are published as ``status`` posts, changed ones are PATCHed
+        with only the changed fields, unchanged ones cost no request.
+        """
+        if plan.with_action('create'):
+            self.taxonomy.prefetch()
+        calls = [(item.case_study.id, self.update, item) for item in plan.with_action('update')]
+        calls += [(item.case_study.id, self.publish, PublishJob(item.case_study, status=status))
+                  for item in plan.with_action('create')]
+        return self._in_parallel(calls, on_result)
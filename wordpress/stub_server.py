@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+In-memory stand-in for the WordPress REST API.
+
+Implements the subset of ``/wp-json/wp/v2`` the Python publishing path uses
+(post type collections, media, taxonomies and users) with Basic auth, so the
+publisher can be exercised locally without a real site:
+
+    python -m wordpress.stub_server --port 8089
+    WORDPRESS_API_URL=http://127.0.0.1:8089/wp-json/wp/v2 \
+    WORDPRESS_USERNAME=admin WORDPRESS_PASSWORD=secret python manage.py publish --all
+"""
+
+import base64
+import hashlib
+import itertools
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import click
+
+API_PREFIX = '/wp-json/wp/v2'
+TAXONOMIES = ('categories', 'tags', 'case_category')
+
+
+class StubWordPress:
+    """State shared by the request handlers."""
+
+    def __init__(self, username: str = 'admin', password: str = 'secret', latency: float = 0.0):
+        self.auth = 'Basic ' + base64.b64encode(f'{username}:{password}'.encode()).decode()
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.posts = {}
+        self.media = {}
+        self.terms = {taxonomy: {} for taxonomy in TAXONOMIES}
+        self.users = {1: {'id': 1, 'name': 'admin', 'slug': 'admin'}}
+        self.requests = Counter()
+
+    def add_term(self, taxonomy: str, name: str) -> dict:
+        with self.lock:
+            term_id = next(self.ids)
+            slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+            term = {'id': term_id, 'name': name, 'slug': slug, 'taxonomy': taxonomy, 'count': 0}
+            self.terms[taxonomy][term_id] = term
+            return term
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    state: StubWordPress = None
+
+    def log_message(self, format, *args):
+        pass
+
+    # -- plumbing -------------------------------------------------------
+
+    def _send(self, status: int, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_collection(self, items):
+        body = json.dumps(items).encode()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('X-WP-Total', str(len(items)))
+        self.send_header('X-WP-TotalPages', '1')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _json_body(self) -> dict:
+        body = self._body()
+        return json.loads(body) if body else {}
+
+    def _route(self, method: str):
+        parts = urlsplit(self.path)
+        if not parts.path.startswith(API_PREFIX):
+            return self._send(404, {'code': 'rest_no_route'})
+        segments = [s for s in parts.path[len(API_PREFIX):].split('/') if s]
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        self.state.requests[f"{method} /{segments[0] if segments else ''}"] += 1
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        if self.headers.get('Authorization') != self.state.auth:
+            # Drain the body so the keep-alive connection stays usable
+            self._body()
+            return self._send(401, {'code': 'rest_not_logged_in'})
+        if not segments:
+            return self._send(404, {'code': 'rest_no_route'})
+
+        collection = segments[0]
+        item_id = int(segments[1]) if len(segments) > 1 and segments[1].isdigit() else None
+        if collection == 'media':
+            return self._media(method, item_id, query)
+        if collection == 'users':
+            return self._send_collection(list(self.state.users.values()))
+        if collection in TAXONOMIES:
+            return self._taxonomy(method, collection, query)
+        return self._posts(method, collection, item_id, query)
+
+    # -- resources ------------------------------------------------------
+
+    def _posts(self, method, post_type, post_id, query):
+        state = self.state
+        if method == 'GET' and post_id is None:
+            statuses = set(query.get('status', 'publish').split(','))
+            with state.lock:
+                posts = [p for p in state.posts.values()
+                         if p['type'] == post_type and p['status'] in statuses
+                         and ('slug' not in query or p['slug'] == query['slug'])]
+            return self._send_collection(posts)
+        if method == 'GET':
+            post = state.posts.get(post_id)
+            return self._send(200, post) if post else self._send(404, {'code': 'rest_post_invalid_id'})
+        if method == 'POST' and post_id is None:
+            fields = self._json_body()
+            with state.lock:
+                new_id = next(state.ids)
+                post = {
+                    'id': new_id,
+                    'type': post_type,
+                    'slug': fields.get('slug') or f'post-{new_id}',
+                    'status': fields.get('status', 'draft'),
+                    'title': {'raw': fields.get('title', '')},
+                    'content': {'raw': fields.get('content', '')},
+                    'featured_media': fields.get('featured_media', 0),
+                    'link': f'http://stub.local/{post_type}/{new_id}',
+                }
+                for key, value in fields.items():
+                    post.setdefault(key, value)
+                state.posts[new_id] = post
+            return self._send(201, post)
+        if method in ('POST', 'PUT', 'PATCH') and post_id is not None:
+            fields = self._json_body()
+            with state.lock:
+                post = state.posts.get(post_id)
+                if post is None:
+                    return self._send(404, {'code': 'rest_post_invalid_id'})
+                for key, value in fields.items():
+                    post[key] = {'raw': value} if key in ('title', 'content') else value
+            return self._send(200, post)
+        return self._send(405, {'code': 'rest_no_route'})
+
+    def _media(self, method, media_id, query):
+        state = self.state
+        if method == 'GET' and media_id is None:
+            with state.lock:
+                items = [m for m in state.media.values() if 'slug' not in query or m['slug'] == query['slug']]
+            return self._send_collection(items)
+        if method != 'POST':
+            return self._send(405, {'code': 'rest_no_route'})
+        if media_id is not None:
+            fields = self._json_body()
+            with state.lock:
+                item = state.media.get(media_id)
+                if item is None:
+                    return self._send(404, {'code': 'rest_post_invalid_id'})
+                item.update(fields)
+            return self._send(200, item)
+        data = self._body()
+        match = re.search(r'filename="([^"]+)"', self.headers.get('Content-Disposition', ''))
+        with state.lock:
+            new_id = next(state.ids)
+            filename = match.group(1) if match else str(new_id)
+            slug = re.sub(r'[^a-z0-9]+', '-', filename.rsplit('.', 1)[0].lower()).strip('-')
+            if any(m['slug'] == slug for m in state.media.values()):
+                slug = f'{slug}-{new_id}'
+            item = {'id': new_id, 'slug': slug, 'source_url': f'http://stub.local/uploads/{filename}',
+                    'mime_type': self.headers.get('Content-Type'), 'bytes': len(data)}
+            state.media[new_id] = item
+        return self._send(201, item)
+
+    def _taxonomy(self, method, taxonomy, query):
+        state = self.state
+        if method == 'GET':
+            with state.lock:
+                terms = list(state.terms[taxonomy].values())
+            if 'search' in query:
+                terms = [t for t in terms if query['search'].lower() in t['name'].lower()]
+            return self._send_collection(terms)
+        if method == 'POST':
+            name = self._json_body().get('name', '')
+            with state.lock:
+                if any(t['name'] == name for t in state.terms[taxonomy].values()):
+                    return self._send(400, {'code': 'term_exists'})
+            return self._send(201, state.add_term(taxonomy, name))
+        return self._send(405, {'code': 'rest_no_route'})
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        self._route('POST')
+
+    def do_PUT(self):
+        self._route('PUT')
+
+    def do_PATCH(self):
+        self._route('PATCH')
+
+
+class StubWordPressServer:
+    """
+    Run the stub on a background thread; use as a context manager.
+
+        with StubWordPressServer() as wp:
+            client = WordPressClient(wp.api_url, 'admin', 'secret')
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, **state_kwargs):
+        self.state = StubWordPress(**state_kwargs)
+        handler = type('Handler', (_Handler,), {'state': self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def api_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}{API_PREFIX}'
+
+    def start(self) -> 'StubWordPressServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+@click.command()
+@click.option('--port', default=8089, help='Port to listen on')
+@click.option('--latency-ms', default=0.0, help='Artificial latency added to every request')
+def main(port, latency_ms):
+    """Run the stub WordPress REST API in the foreground."""
+    server = StubWordPressServer(port=port, latency=latency_ms / 1000)
+    click.echo(f"Stub WordPress REST API at {server.api_url} (user 'admin', password 'secret')")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from .client import WordPressClient, WordPressError
+
+
+@dataclass
+class _CachedCollection:
+    terms: List[dict]
+    etags: List[Optional[str]]
+    fetched_at: float
+    by_name: Dict[str, dict] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.by_name = {}
+        for term in self.terms:
+            for key in (term.get('name'), term.get('slug')):
+                if key:
+                    self.by_name.setdefault(key.lower(), term)
+
+
+class TaxonomyCache:
+    """
+    TTL- and ETag-validated cache of WordPress taxonomy terms and users.
+
+    Within ``ttl`` seconds lookups are served from memory with no request at
+    all. After that each cached page is revalidated with ``If-None-Match``;
+    a ``304`` just refreshes the timestamp. Missing terms are created on
+    demand and added to the cache, so a warm cache resolves a post's
+    categories, tags and author without any taxonomy round trip.
+    """
+
+    USERS = 'users'
+
+    def __init__(self, client: WordPressClient, ttl: float = 300.0):
+        self.client = client
+        self.ttl = ttl
+        self._collections: Dict[str, _CachedCollection] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, collection: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(collection, threading.Lock())
+
+    def prefetch(self, collections: Iterable[str] = None) -> None:
+        """Warm the cache, typically once at the start of a batch."""
+        for collection in collections or (self.client.category_taxonomy, 'tags', self.USERS):
+            self.terms(collection)
+
+    def invalidate(self, collection: str = None) -> None:
+        """Drop one collection (or everything) so the next lookup refetches it."""
+        with self._locks_guard:
+            if collection is None:
+                self._collections.clear()
+            else:
+                self._collections.pop(collection, None)
+
+    def terms(self, collection: str) -> List[dict]:
+        """All terms of a taxonomy (or users), fetched or revalidated as needed."""
+        return self._collection(collection).terms
+
+    def _collection(self, collection: str) -> _CachedCollection:
+        cached = self._collections.get(collection)
+        if cached is not None and time.monotonic() - cached.fetched_at < self.ttl:
+            return cached
+        with self._lock(collection):
+            cached = self._collections.get(collection)
+            if cached is not None and time.monotonic() - cached.fetched_at < self.ttl:
+                return cached
+            cached = self._fetch(collection, cached)
+            self._collections[collection] = cached
+            return cached
+
+    def _fetch(self, collection: str, previous: Optional[_CachedCollection]) -> _CachedCollection:
+        terms: List[dict] = []
+        etags: List[Optional[str]] = []
+        not_modified = 0
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            previous_etag = previous.etags[page - 1] if previous and page <= len(previous.etags) else None
+            headers = {'If-None-Match': previous_etag} if previous_etag else {}
+            response = self.client.request('GET', collection, headers=headers,
+                                           params={'per_page': 100, 'page': page, 'context': 'edit'})
+            if response.status_code == 304:
+                not_modified += 1
+                etags.append(previous_etag)
+            elif response.status_code >= 400:
+                raise WordPressError(response.status_code, response.text[:500])
+            else:
+                etags.append(response.headers.get('ETag'))
+                terms.extend(response.json())
+            total_pages = int(response.headers.get('X-WP-TotalPages') or 1)
+            page += 1
+
+        if previous is not None and not_modified == len(etags) == len(previous.etags):
+            # Every page revalidated: keep the parsed terms
+            previous.fetched_at = time.monotonic()
+            return previous
+        if not_modified:
+            # Some pages changed and some didn't: refetch unconditionally for a consistent view
+            return self._fetch(collection, None)
+        return _CachedCollection(terms, etags, time.monotonic())
+
+    def find(self, collection: str, name: str) -> Optional[dict]:
+        """Look up a term or user by name or slug (case-insensitive)."""
+        return self._collection(collection).by_name.get(name.strip().lower())
+
+    def resolve(self, taxonomy: str, names: Iterable[str], create: bool = True) -> List[int]:
+        """Term ids for ``names``, creating missing terms when ``create`` is set."""
+        ids = []
+        for name in names:
+            if not name or not name.strip():
+                continue
+            term = self.find(taxonomy, name)
+            if term is None and create:
+                term = self._create_term(taxonomy, name.strip())
+            if term is not None:
+                ids.append(term['id'])
+        return ids
+
+    def user_id(self, name: str) -> Optional[int]:
+        user = self.find(self.USERS, name)
+        return user['id'] if user else None
+
+    def _create_term(self, taxonomy: str, name: str) -> Optional[dict]:
+        with self._lock(taxonomy):
+            cached = self._collections.get(taxonomy)
+            term = cached.by_name.get(name.lower()) if cached else None
+            if term is not None:
+                return term
+            try:
+                # A resent create is rejected with 400 term_exists, handled below
+                term = self.client.request_json('POST', taxonomy, idempotent=True, json={'name': name})
+            except WordPressError as e:
+                if e.status != 400:
+                    raise
+                # Created concurrently elsewhere: refresh and look again
+                self._collections[taxonomy] = self._fetch(taxonomy, None)
+                return self._collections[taxonomy].by_name.get(name.lower())
+            if cached is not None:
+                self._collections[taxonomy] = _CachedCollection(
+                    cached.terms + [term], cached.etags, cached.fetched_at)
+            return term